@@ -1,90 +1,207 @@
 from datetime import date
 import html
-from fastapi import APIRouter, Depends, Request
-from fastapi.responses import HTMLResponse
+import time
+from typing import Any, Dict, Iterator, List
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from datetime import timedelta
 
-from app.core.database import get_db
-from app.core.scheduler import generate_daily_tasks, generate_module_tasks
+from app.core.database import SessionLocal, get_db
+from app.core.job_worker import job_worker
+from app.core.llm_backends import ReplayBackend
+from app.core.scheduler import (
+    ai_selector,
+    module_fingerprint,
+    queue_refresh,
+    replace_module_plan,
+    stream_module_tasks,
+)
 from app.models.task import TodayTask
 from app.models.history import TaskHistory
 from app.models.daily_summary import DailySummary
 from app.services.loader import load_configs
+from app.services.config_watcher import config_watcher
+from app.services.job_queue import job_queue
+from app.services.module_streams import module_streams
+from app.services.template_sandbox import template_sandbox
 from app.core.config import get_settings
 
 router = APIRouter()
 settings = get_settings()
 templates = Jinja2Templates(directory="app/templates")
+REFRESH_POLL_SECONDS = 0.5
+# the browser reconnects on its own, so one stream never has to outlive a proxy timeout
+REFRESH_STREAM_SECONDS = 300
+
+
+def _refresh_context(
+    db: Session, job_id: str, coalesced: bool = False, force_ignored: List[str] | None = None
+) -> Dict[str, Any]:
+    modules = job_queue.run_progress(db, job_id)
+    statuses = {job["status"] for job in modules.values()}
+    if not statuses:
+        state = "unknown"
+    elif statuses == {"failed"}:
+        state = "failed"
+    elif statuses <= {"done", "failed"}:
+        state = "done"
+    else:
+        state = "running" if "running" in statuses else "queued"
+    return {
+        "job_id": job_id,
+        "state": state,
+        "modules": modules,
+        "module_labels": load_configs().index.module_labels,
+        "coalesced": coalesced,
+        "force_ignored": force_ignored or [],
+    }
 
 
 @router.post("/refresh")
-def refresh(db: Session = Depends(get_db)):
-    tasks = generate_daily_tasks(db)
-    return {"status": "refreshed", "count": len(tasks)}
+def refresh(request: Request, force: bool = False, db: Session = Depends(get_db)):
+    """Queues today's plan for regeneration and returns at once; progress is under /refresh/{job_id}."""
+    job_id, coalesced, force_ignored = queue_refresh(db, force=force)
+    job_worker.wake()
+    if request.headers.get("HX-Request"):
+        return templates.TemplateResponse(
+            "components/refresh_status_stream.html",
+            {"request": request, **_refresh_context(db, job_id, coalesced, force_ignored)},
+        )
+    return JSONResponse(
+        {
+            "status": "queued",
+            "job_id": job_id,
+            "coalesced": coalesced,
+            "force_ignored": force_ignored,
+            "progress_url": f"/refresh/{job_id}",
+            "stream_url": f"/refresh/{job_id}/stream",
+        },
+        status_code=202,
+    )
+
+
+@router.get("/refresh/{job_id}")
+def refresh_progress(job_id: str, db: Session = Depends(get_db)):
+    context = _refresh_context(db, job_id)
+    if not context["modules"]:
+        raise HTTPException(status_code=404, detail="Unknown refresh job")
+    return {"job_id": job_id, "state": context["state"], "modules": context["modules"]}
+
+
+@router.get("/refresh/{job_id}/stream")
+def refresh_progress_stream(job_id: str, db: Session = Depends(get_db)):
+    """SSE: a `progress` event (status HTML) on every change, then `done` once the run is over."""
+    if not job_queue.run_progress(db, job_id):
+        raise HTTPException(status_code=404, detail="Unknown refresh job")
+    status_template = templates.get_template("components/refresh_status.html")
+
+    def events() -> Iterator[str]:
+        session = SessionLocal()
+        last = None
+        started = time.monotonic()
+        try:
+            while time.monotonic() - started < REFRESH_STREAM_SECONDS:
+                context = _refresh_context(session, job_id)
+                session.rollback()
+                rendered = status_template.render(**context)
+                if context["state"] in ("done", "failed", "unknown"):
+                    yield _sse("done", rendered)
+                    return
+                if rendered != last:
+                    yield _sse("progress", rendered)
+                    last = rendered
+                time.sleep(REFRESH_POLL_SECONDS)
+        finally:
+            session.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post("/refresh/module/{module_id}", response_class=HTMLResponse)
-def refresh_module(module_id: str, request: Request, db: Session = Depends(get_db)):
-    loaded_configs = load_configs()
-    module_configs = getattr(loaded_configs, "modules", {}) if loaded_configs is not None else {}
-    module_config = module_configs.get(module_id)
-    if not module_config:
+def refresh_module(module_id: str, request: Request, force: bool = False, db: Session = Depends(get_db)):
+    """Starts regenerating one module; returns the fragment that follows it over SSE."""
+    if not load_configs().modules.get(module_id):
         return HTMLResponse(
             content=f"<p class='text-slate-400 text-sm'>Module '{module_id}' not found.</p>",
             status_code=404,
         )
-
-    # delete existing tasks/summary for this module today
-    db.query(TodayTask).filter(TodayTask.date == date.today(), TodayTask.module_id == module_id).delete()
-    db.query(DailySummary).filter(DailySummary.date == date.today(), DailySummary.module_id == module_id).delete()
-
-    tasks, summary_notes, raw_ai = generate_module_tasks(db, module_id, module_config, settings.task_sample_days)
-
-    created = 0
-    for item in tasks:
-        metadata = item.get("metadata") or {}
-        extra = {
-            "reason": item.get("reason"),
-            "metadata": metadata,
-            "action": metadata.get("action"),
-            "difficulty_estimate": item.get("difficulty_estimate"),
-        }
-        task = TodayTask(
-            date=date.today(),
-            module_id=module_id,
-            name=item.get("name"),
-            group=item.get("group"),
-            task_type=item.get("task_type") or "todo",
-            problem_text=item.get("problem_text"),
-            code_template=item.get("code_template"),
-            log=item.get("log"),
-            url=item.get("url"),
-            extra=extra,
-        )
-        db.add(task)
-        created += 1
-
-    db.add(
-        DailySummary(
-            date=date.today(),
-            module_id=module_id,
-            summary_text=summary_notes,
-            raw_ai_response=raw_ai,
+    if module_streams.busy(db, module_id):
+        return HTMLResponse(
+            content="<p class='text-slate-400 text-sm'>This module is already being regenerated.</p>",
+            status_code=409,
         )
-    )
+    ticket = module_streams.issue(db, module_id, force=force)
     db.commit()
-
-    refreshed = (
-        db.query(TodayTask)
-        .filter(TodayTask.date == date.today(), TodayTask.module_id == module_id)
-        .all()
+    return templates.TemplateResponse(
+        "components/module_task_stream.html",
+        {"request": request, "module_id": module_id, "ticket": ticket},
     )
 
-    return templates.TemplateResponse(
-        "components/module_task_list.html",
-        {"request": request, "items": refreshed, "module_id": module_id},
+
+def _sse(event: str, data: str) -> str:
+    lines = "\n".join(f"data: {line}" for line in data.splitlines() or [""])
+    return f"event: {event}\n{lines}\n\n"
+
+
+@router.get("/refresh/module/{module_id}/stream")
+def refresh_module_stream(module_id: str, ticket: str = ""):
+    """Runs the regeneration a POST ticketed, streaming its cards; each ticket streams once."""
+    module_config = load_configs().modules.get(module_id)
+    if not module_config:
+        return HTMLResponse(
+            content=f"<p class='text-slate-400 text-sm'>Module '{module_id}' not found.</p>",
+            status_code=404,
+        )
+    db = SessionLocal()
+    try:
+        claimed = module_streams.claim(db, ticket)
+        force = bool(claimed.force) if claimed is not None else False
+    finally:
+        db.close()
+    if claimed is None or claimed.module_id != module_id:
+        # 204 also tells EventSource to stop reconnecting
+        return Response(status_code=204)
+    card = templates.get_template("components/module_task_card.html")
+    task_list = templates.get_template("components/module_task_list.html")
+
+    def events() -> Iterator[str]:
+        # the request-scoped session is closed before streaming starts
+        session = SessionLocal()
+        try:
+            fingerprint = module_fingerprint(session, module_id, module_config, date.today())
+            for kind, payload in stream_module_tasks(
+                session, module_id, module_config, settings.task_sample_days, force=force
+            ):
+                if kind == "task":
+                    item = {**payload, "id": None, "extra": {"reason": payload.get("reason")}}
+                    yield _sse("task", card.render(item=item))
+                    continue
+                created = replace_module_plan(session, module_id, payload, date.today(), fingerprint)
+                session.commit()
+                yield _sse("done", task_list.render(items=created, module_id=module_id))
+        except Exception as exc:
+            # the module keeps its previous plan; replace the half-rendered cards with the error
+            session.rollback()
+            yield _sse(
+                "error",
+                f"<p class='text-rose-300 text-sm'>Could not regenerate this module: {html.escape(str(exc))}</p>",
+            )
+        finally:
+            try:
+                module_streams.finish(session, ticket)
+            finally:
+                session.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -142,3 +259,67 @@ def admin_summary(db: Session = Depends(get_db)):
         f"<div class='space-y-2'><p class='text-sm text-slate-200'>Summary: {text}</p>"
         f"<pre class='bg-slate-950 border border-slate-800 rounded p-2 text-[11px] overflow-auto'>{raw}</pre></div>"
     )
+
+
+@router.get("/admin/status", response_class=HTMLResponse)
+def admin_status(db: Session = Depends(get_db)):
+    status = config_watcher.status()
+    state = "disabled (CONFIG_WATCH=false)"
+    if status["enabled"]:
+        state = f"{status['mode']}, {'running' if status['running'] else 'stopped'}"
+    error = html.escape(status["last_error"] or "—")
+    prompt = ai_selector.prompt_compiler.stats()
+    cache = ai_selector.response_cache.stats()
+    breaker = ai_selector.breaker.status()
+    limiter = ai_selector.rate_limiter.stats()
+    limits = "off"
+    if limiter["enabled"]:
+        limits = (
+            f"{'shared' if limiter['shared'] else 'per-process'}, {limiter['waited']}/{limiter['acquired']} calls waited "
+            f"({limiter['wait_seconds']}s total, max {limiter['max_wait_seconds']}s), "
+            f"{limiter['queued']} queued, {limiter['timeouts']} timed out"
+        )
+    models = "; ".join(
+        f"{html.escape(model)}: {stats['valid']}/{stats['calls']} valid, p95 {stats['p95_ms'] or 0:.0f} ms, "
+        f"{stats['hedges']} hedged ({stats['hedge_wins']} won)"
+        for model, stats in ai_selector.routing.stats.snapshot().items()
+    )
+    payload = "off"
+    if ai_selector.compactor is not None:
+        compaction = ai_selector.compactor.stats()
+        payload = (
+            f"~{compaction['tokens_before']} → ~{compaction['tokens_after']} tokens over {compaction['modules']} modules"
+            f" (budget {ai_selector.compactor.token_budget}, {compaction['over_budget']} over)"
+        )
+    jobs = ", ".join(f"{count} {status}" for status, count in sorted(job_queue.counts(db).items())) or "empty"
+    worker = job_worker.status()
+    worker_state = f"running here, {worker['jobs_done']} done" if worker["running"] else "external"
+    if worker["last_error"]:
+        worker_state += f", last error: {html.escape(worker['last_error'])}"
+    backend = ai_selector.backend.name if ai_selector.backend else "none"
+    if isinstance(ai_selector.backend, ReplayBackend):
+        replay = ai_selector.backend.stats()
+        backend += (
+            f" ({replay['exact_hits']} exact, {replay['module_hits']} module fallback"
+            f"{'' if replay['module_fallback'] else ' off'}, {replay['misses']} missed of {replay['recordings']} recordings)"
+        )
+    breaker_state = breaker["state"].replace("_", "-")
+    if breaker["retry_in_seconds"] is not None:
+        breaker_state += f" (probe in {breaker['retry_in_seconds']}s)"
+    return (
+        "<div class='space-y-1 text-xs'>"
+        f"<div>Config watcher: {state}</div>"
+        f"<div>Reloads: {status['reload_count']} (last: {status['last_reload_at'] or '—'})</div>"
+        f"<div class='text-slate-400'>Last error: {error}</div>"
+        f"<div>Prompt prefix: {prompt['prefix_hash'][:12]} (~{prompt['prefix_tokens']} tokens)</div>"
+        f"<div>Module payloads: {payload}</div>"
+        f"<div>LLM cache: {cache['hits']} hits / {cache['misses']} misses</div>"
+        f"<div>LLM backend: {html.escape(backend)}</div>"
+        f"<div>Models: {models or '—'}</div>"
+        f"<div>Rate limit: {limits}</div>"
+        f"<div>Generation jobs: {jobs} (worker: {worker_state})</div>"
+        f"<div>Template sandbox: {template_sandbox.checked} checked, {template_sandbox.failed} failed</div>"
+        f"<div>LLM circuit: {breaker_state}, {breaker['consecutive_failures']} consecutive failures, "
+        f"{breaker['total_rejections']} skipped calls</div>"
+        "</div>"
+    )
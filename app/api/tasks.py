@@ -9,8 +9,13 @@ from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.job_worker import job_worker
+from app.core.scheduler import plan_status
 from app.models.task import TodayTask
 from app.models.history import TaskHistory
+from app.services.item_stats import record_history
+from app.services.job_queue import job_queue
+from app.services.loader import load_configs
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
@@ -137,6 +142,7 @@ def mark_done(payload: DonePayload, db: Session = Depends(get_db)):
         timestamp=datetime.utcnow(),
     )
     db.add(history)
+    record_history(db, history)
     db.commit()
     return {"status": "ok", "task_id": payload.task_id or (today_entry.id if today_entry else None)}
 
@@ -162,6 +168,7 @@ def feedback(payload: FeedbackPayload, db: Session = Depends(get_db)):
         timestamp=datetime.utcnow(),
     )
     db.add(history)
+    record_history(db, history)
     db.commit()
     return {"status": "recorded"}
 
@@ -190,6 +197,23 @@ def history(days: int = 7, db: Session = Depends(get_db)):
     ]
 
 
+def _generating(request: Request, db: Session, module_id: str, poll_url: str) -> HTMLResponse | None:
+    """The "generating" placeholder while the module is queued, running or not queued yet; None once it is done."""
+    status = plan_status(db).get(module_id, "ready")
+    if status == "ready":
+        return None
+    return templates.TemplateResponse(
+        "components/module_generating.html",
+        {
+            "request": request,
+            "module_id": module_id,
+            "module_labels": load_configs().index.module_labels,
+            "status": status,
+            "poll_url": poll_url,
+        },
+    )
+
+
 @router.get("/tasks/module/{module_id}/fragment", response_class=HTMLResponse)
 def module_tasks_fragment(module_id: str, request: Request, db: Session = Depends(get_db)):
     today = date.today()
@@ -199,6 +223,10 @@ def module_tasks_fragment(module_id: str, request: Request, db: Session = Depend
         .filter(TodayTask.module_id == module_id)
         .all()
     )
+    if not tasks:
+        placeholder = _generating(request, db, module_id, request.url.path)
+        if placeholder is not None:
+            return placeholder
     return templates.TemplateResponse(
         "components/module_task_list.html",
         {
@@ -209,6 +237,39 @@ def module_tasks_fragment(module_id: str, request: Request, db: Session = Depend
     )
 
 
+@router.get("/tasks/module/{module_id}/pending", response_class=HTMLResponse)
+def module_pending_fragment(module_id: str, request: Request, db: Session = Depends(get_db)):
+    """Dashboard cards for one module, or its placeholder again until it is generated."""
+    placeholder = _generating(request, db, module_id, request.url.path)
+    if placeholder is not None:
+        return placeholder
+    tasks = db.query(TodayTask).filter(TodayTask.date == date.today(), TodayTask.module_id == module_id).all()
+    return templates.TemplateResponse(
+        "components/today_module_cards.html",
+        {
+            "request": request,
+            "items": tasks,
+            "module_id": module_id,
+            "module_labels": load_configs().index.module_labels,
+        },
+    )
+
+
+@router.post("/tasks/module/{module_id}/queue", response_class=HTMLResponse)
+def queue_module(module_id: str, request: Request, poll_url: str = "", db: Session = Depends(get_db)):
+    """Queues today's job for a module nothing scheduled, then shows the polling placeholder."""
+    if module_id not in load_configs().modules:
+        raise HTTPException(status_code=404, detail="Unknown module")
+    job_queue.enqueue(db, date.today(), [module_id])
+    db.commit()
+    job_worker.wake()
+    if not poll_url.startswith(f"/tasks/module/{module_id}/"):
+        poll_url = f"/tasks/module/{module_id}/fragment"
+    return _generating(request, db, module_id, poll_url) or HTMLResponse(
+        "", headers={"HX-Refresh": "true"}
+    )
+
+
 @router.get("/tasks/{task_id}", response_class=HTMLResponse)
 def task_detail(request: Request, task_id: int, db: Session = Depends(get_db)):
     task = db.query(TodayTask).filter(TodayTask.id == task_id).first()
@@ -277,6 +338,7 @@ def complete_task(task_id: int, payload: CompletePayload, db: Session = Depends(
         timestamp=datetime.utcnow(),
     )
     db.add(history)
+    record_history(db, history)
     db.delete(task)
     db.commit()
     return {"status": "completed", "task_id": task_id}
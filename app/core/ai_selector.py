@@ -1,16 +1,32 @@
 from datetime import date
+import hashlib
 import json
-from typing import Any, Dict, List, Tuple
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Tuple
 
 from app.core.config import get_settings
-from app.services.prompt_loader import load_prompt_templates
+from app.core.database import SessionLocal
+from app.core.batch_backends import batch_line, build_batch_backend
+from app.core.llm_backends import build_backend
+from app.core.routing import ModelRoute, RoutingPolicy
+from app.core.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Deadline,
+    DeadlineExceeded,
+    backoff_delay,
+    is_transport_error,
+)
+from app.services.json_stream import TaskStreamParser
+from app.services.loader import ConfigIndex, load_configs
+from app.services.payload_compactor import PayloadCompactor, dumps_compact, estimate_tokens
+from app.services.rate_limiter import RateLimiter, SQLiteBucketStore
+from app.services.prompt_loader import PromptRegistry, get_prompt_registry
+from app.services.response_cache import ResponseCache
 from app.services.selector import select_with_fallback
 
-try:
-    from openai import OpenAI  # type: ignore
-except Exception:  # pragma: no cover
-    OpenAI = None  # type: ignore
-
 
 CODING_TEMPLATE_SNIPPET = """
 Example coding task format (Python, runnable with tests):
@@ -76,21 +92,130 @@ def _format_module_title(module_id: str) -> str:
     return module_id.replace("-", " ").replace("_", " ").title()
 
 
+PAYLOAD_FORMAT_NOTE = (
+    "Payload format: each module_config group lists its items as `rows` whose values follow `columns`. "
+    "Items solved within avoid_repetition_days are already removed. "
+    "History entries carry difficulty_stats (n, mean, min, max, last) instead of raw samples."
+)
+
+
+class SystemPromptCompiler:
+    """Builds system prompts as a shared, byte-stable prefix plus a module suffix.
+
+    The prefix (prompt bundle, coding template, schema) is identical for every
+    module, so provider-side prompt caching can reuse it across calls. It is
+    rebuilt only when the prompt bundle's content hash changes.
+    """
+
+    def __init__(self, prompts: PromptRegistry, shared_context: str | None = None):
+        self.prompts = prompts
+        self.shared_context = shared_context
+        self._lock = threading.Lock()
+        self._bundle_digest: str | None = None
+        self.prefix = ""
+        self.prefix_hash = ""
+        self._modules: Dict[str, str] = {}
+
+    def _ensure_prefix(self) -> None:
+        bundle = self.prompts.get()
+        if self.prompts.digest == self._bundle_digest:
+            return
+        with self._lock:
+            if self.prompts.digest == self._bundle_digest:
+                return
+            prefix = "\n\n".join(
+                [
+                    bundle or "",
+                    f"Coding task template guidance:\n{CODING_TEMPLATE_SNIPPET}",
+                    SCHEMA_SPEC.strip(),
+                    *([self.shared_context] if self.shared_context else []),
+                ]
+            )
+            self.prefix = prefix
+            self.prefix_hash = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+            self._modules = {}
+            self._bundle_digest = self.prompts.digest
+
+    def build(self, module_id: str | None = None, module_title: str | None = None) -> str:
+        self._ensure_prefix()
+        cache_key = module_id or ""
+        prompt = self._modules.get(cache_key)
+        if prompt is None:
+            if module_id:
+                suffix = (
+                    f"You are generating tasks for the module: {module_title or _format_module_title(module_id)} ({module_id}). "
+                    "Produce tasks strictly following the JSON schema. "
+                    "The output must be a standalone set of tasks for this module only."
+                )
+            else:
+                suffix = "Produce tasks strictly following the JSON schema."
+            prompt = f"{self.prefix}\n\n{suffix}"
+            self._modules[cache_key] = prompt
+        return prompt
+
+    def stats(self) -> Dict[str, Any]:
+        self._ensure_prefix()
+        prefix_tokens = estimate_tokens(self.prefix)
+        return {
+            "prefix_hash": self.prefix_hash,
+            "prefix_tokens": prefix_tokens,
+            "module_tokens": {
+                module_id: estimate_tokens(prompt) - prefix_tokens
+                for module_id, prompt in self._modules.items()
+                if module_id
+            },
+        }
+
+
 class AISelector:
     def __init__(self):
         self.settings = get_settings()
-        self.client = OpenAI(api_key=self.settings.openai_api_key) if OpenAI else None
-
-    def _build_system_prompt(self, module_id: str, module_title: str) -> str:
-        prompt_bundle = load_prompt_templates()
-        header = (
-            f"You are generating tasks for the module: {module_title} ({module_id}). "
-            "Produce tasks strictly following the JSON schema. "
-            "The output must be a standalone set of tasks for this module only."
+        self.backend = build_backend(self.settings)
+        self.compactor = (
+            PayloadCompactor(self.settings.llm_payload_token_budget, self.settings.avoid_days)
+            if self.settings.llm_payload_compaction
+            else None
+        )
+        # with compaction on, user settings live once in the shared prefix instead of every payload
+        shared_context = None
+        if self.compactor is not None:
+            shared_context = f"User settings: {dumps_compact(self._user_settings())}\n{PAYLOAD_FORMAT_NOTE}"
+        self.prompt_compiler = SystemPromptCompiler(get_prompt_registry(), shared_context)
+        self.batch_backend = build_batch_backend(self.settings, self.backend)
+        self.model = self.settings.llm_model
+        self.routing = RoutingPolicy(self.settings)
+        # primaries run here while hedging so a slow one can be raced by a second request
+        self._hedge_pool = ThreadPoolExecutor(
+            max_workers=2 * max(1, self.settings.generation_concurrency) + 2,
+            thread_name_prefix="llm-hedge",
         )
-        combined = "\n\n".join([header, prompt_bundle or ""])
-        coding_hint = f"\n\nCoding task template guidance:\n{CODING_TEMPLATE_SNIPPET}\n"
-        return combined + coding_hint + "\n\n" + SCHEMA_SPEC
+        self.breaker = CircuitBreaker(
+            failure_threshold=self.settings.breaker_failure_threshold,
+            reset_seconds=self.settings.breaker_reset_seconds,
+        )
+        self.rate_limiter = RateLimiter(
+            self.settings.llm_rpm_limit,
+            self.settings.llm_tpm_limit,
+            store=SQLiteBucketStore(SessionLocal) if self.settings.llm_rate_limit_shared else None,
+        )
+        self.response_cache = ResponseCache(
+            SessionLocal,
+            ttl_seconds=self.settings.llm_cache_ttl_seconds,
+            max_entries=self.settings.llm_cache_max_entries,
+        )
+
+    def _build_system_prompt(self, module_id: str | None = None, module_title: str | None = None) -> str:
+        return self.prompt_compiler.build(module_id, module_title)
+
+    def _user_settings(self) -> Dict[str, Any]:
+        return {
+            "daily_time_budget_minutes": self.settings.time_budget,
+            "task_limits": self.settings.task_limits,
+            "avoid_repetition_days": self.settings.avoid_days,
+            "difficulty_scale_definition": "1=very easy, 5=very hard",
+            "timezone": self.settings.timezone,
+            "max_items_total": self.settings.max_items,
+        }
 
     def _build_user_payload(
         self,
@@ -104,14 +229,7 @@ class AISelector:
             "recent_history": history_snippet,
             "recent_today_tasks": recent_tasks,
             "performance_window_days": self.settings.task_sample_days,
-            "user_settings": {
-                "daily_time_budget_minutes": self.settings.time_budget,
-                "task_limits": self.settings.task_limits,
-                "avoid_repetition_days": self.settings.avoid_days,
-                "difficulty_scale_definition": "1=very easy, 5=very hard",
-                "timezone": self.settings.timezone,
-                "max_items_total": self.settings.max_items,
-            },
+            "user_settings": self._user_settings(),
         }
         return json.dumps(payload, ensure_ascii=False)
 
@@ -120,28 +238,72 @@ class AISelector:
         module_id: str,
         module_config: List[Dict[str, Any]],
         history_snippet: List[Dict[str, Any]],
+        plan_date: date | None = None,
     ) -> str:
         module_title = _format_module_title(module_id)
         payload = {
-            "today_date": str(date.today()),
+            "today_date": str(plan_date or date.today()),
             "module_id": module_id,
             "module_title": module_title,
             "module_config": module_config,
             "history_for_module": history_snippet,
             "performance_window_days": self.settings.task_sample_days,
-            "user_settings": {
-                "daily_time_budget_minutes": self.settings.time_budget,
-                "task_limits": self.settings.task_limits,
-                "avoid_repetition_days": self.settings.avoid_days,
-                "difficulty_scale_definition": "1=very easy, 5=very hard",
-                "timezone": self.settings.timezone,
-                "max_items_total": self.settings.max_items,
-            },
+            "user_settings": self._user_settings(),
             "task_schema_description": "Use the provided schema exactly. coding tasks must include problem_text and code_template. todo tasks may include todo_text.",
         }
-        return json.dumps(payload, ensure_ascii=False)
+        content = json.dumps(payload, ensure_ascii=False)
+        if self.compactor is None:
+            return content
+        base = {k: v for k, v in payload.items() if k not in ("module_config", "history_for_module", "user_settings")}
+        compacted = self.compactor.compact(
+            module_id, base, module_config, history_snippet, tokens_before=estimate_tokens(content)
+        )
+        return dumps_compact(compacted)
+
+    def _clean_task(
+        self,
+        task: Any,
+        module_id: str | None = None,
+        index: ConfigIndex | None = None,
+    ) -> Dict[str, Any] | None:
+        if not isinstance(task, dict):
+            return None
+        name = task.get("name")
+        group = task.get("group")
+        if not name or not group:
+            return None
+        config_item: Dict[str, Any] = {}
+        if index is not None and module_id:
+            # group must come from the module config; new task names are allowed
+            if not index.has_group(module_id, group):
+                return None
+            config_item = index.get_item(module_id, group, name) or {}
+        task_type = task.get("task_type") or "todo"
+        problem_text = task.get("problem_text")
+        code_template = task.get("code_template")
+        todo_text = task.get("todo_text")
+        if task_type == "coding":
+            problem_text = problem_text or todo_text
+        return {
+            "name": name,
+            "group": group,
+            "task_type": task_type,
+            "problem_text": problem_text,
+            "code_template": code_template,
+            "todo_text": todo_text,
+            "importance": task.get("importance", config_item.get("importance")),
+            "difficulty_estimate": task.get("difficulty_estimate"),
+            "reason": task.get("reason"),
+            "url": task.get("url") or config_item.get("url"),
+            "metadata": task.get("metadata") or {},
+        }
 
-    def _validate_shape(self, data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], str]:
+    def _validate_shape(
+        self,
+        data: Dict[str, Any],
+        module_id: str | None = None,
+        index: ConfigIndex | None = None,
+    ) -> Tuple[List[Dict[str, Any]], str]:
         if not isinstance(data, dict):
             raise ValueError("AI response must be an object")
 
@@ -151,33 +313,9 @@ class AISelector:
 
         cleaned: List[Dict[str, Any]] = []
         for task in tasks:
-            if not isinstance(task, dict):
-                continue
-            name = task.get("name")
-            group = task.get("group")
-            if not name or not group:
-                continue
-            task_type = task.get("task_type") or "todo"
-            problem_text = task.get("problem_text")
-            code_template = task.get("code_template")
-            todo_text = task.get("todo_text")
-            if task_type == "coding":
-                problem_text = problem_text or todo_text
-            cleaned.append(
-                {
-                    "name": name,
-                    "group": group,
-                    "task_type": task_type,
-                    "problem_text": problem_text,
-                    "code_template": code_template,
-                    "todo_text": todo_text,
-                    "importance": task.get("importance"),
-                    "difficulty_estimate": task.get("difficulty_estimate"),
-                    "reason": task.get("reason"),
-                    "url": task.get("url"),
-                    "metadata": task.get("metadata") or {},
-                }
-            )
+            cleaned_task = self._clean_task(task, module_id, index)
+            if cleaned_task is not None:
+                cleaned.append(cleaned_task)
 
         if not cleaned:
             raise ValueError("AI response had no valid tasks")
@@ -188,25 +326,139 @@ class AISelector:
 
         return cleaned, summary_notes
 
-    def _call_model(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
-        if not self.client:
-            raise RuntimeError("OpenAI client not configured")
-        response = self.client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=messages,
-            response_format={"type": "json_object"},
-        )
-        content = response.choices[0].message.content
-        return json.loads(content)
+    def _reserve(self, messages: List[Dict[str, str]], timeout: float | None) -> Tuple[int, int, float | None]:
+        """Passes the breaker, then waits for rate-limit capacity; returns (prompt tokens, reserved tokens, remaining timeout).
+
+        Checking the breaker first means refused calls never take tokens.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError("LLM provider circuit is open")
+        prompt_tokens = sum(estimate_tokens(m.get("content") or "") for m in messages)
+        reserved = prompt_tokens + self.settings.llm_completion_token_estimate
+        try:
+            waited = self.rate_limiter.acquire(reserved, timeout)
+        except Exception:
+            # no call is made, so a half-open probe has no outcome to record
+            self.breaker.cancel_probe()
+            raise
+        return prompt_tokens, reserved, None if timeout is None else max(0.0, timeout - waited)
+
+    def _single_call(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        timeout: float | None,
+        validate: Callable[[Dict[str, Any]], Any] | None,
+    ) -> Dict[str, Any]:
+        prompt_tokens, reserved, timeout = self._reserve(messages, timeout)
+        started = time.perf_counter()
+        try:
+            content = self.backend.complete(model, messages, timeout=timeout)
+        except Exception as exc:
+            # the request went out, so the provider counts the prompt even without a reply
+            self.rate_limiter.settle(reserved, prompt_tokens)
+            self.routing.stats.record(model, "failed")
+            if is_transport_error(exc):
+                self.breaker.record_failure()
+            else:
+                # e.g. a 4xx: the provider is reachable, the request is the problem
+                self.breaker.record_success()
+            raise
+        latency_ms = (time.perf_counter() - started) * 1000
+        self.rate_limiter.settle(reserved, prompt_tokens + estimate_tokens(content))
+        # the provider answered; whether the content parses is a separate question
+        self.breaker.record_success()
+        try:
+            data = json.loads(content)
+            if validate is not None:
+                validate(data)
+        except ValueError:
+            self.routing.stats.record(model, "invalid", latency_ms)
+            raise
+        self.routing.stats.record(model, "valid", latency_ms)
+        return data
+
+    def _call_model(
+        self,
+        messages: List[Dict[str, str]],
+        timeout: float | None = None,
+        model: str | None = None,
+        validate: Callable[[Dict[str, Any]], Any] | None = None,
+        hedge_after: float | None = None,
+    ) -> Dict[str, Any]:
+        if not self.backend:
+            raise RuntimeError("LLM backend not configured")
+        model = model or self.model
+        if hedge_after is None or (timeout is not None and hedge_after >= timeout):
+            return self._single_call(model, messages, timeout, validate)
 
-    def _request_with_retries(self, messages: List[Dict[str, str]], retries: int = 2) -> Dict[str, Any]:
+        started = time.monotonic()
+        primary = self._hedge_pool.submit(self._single_call, model, messages, timeout, validate)
+        done, _ = wait([primary], timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        # the primary is slower than usual: race a second request, first valid reply wins
+        self.routing.stats.record_hedge(model)
+        remaining = None if timeout is None else max(0.0, timeout - (time.monotonic() - started))
+        hedge = self._hedge_pool.submit(self._single_call, model, messages, remaining, validate)
+        pending = {primary, hedge}
+        last_error: Exception | None = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    data = future.result()
+                except Exception as exc:
+                    last_error = exc
+                    continue
+                if future is hedge:
+                    self.routing.stats.record_hedge_win(model)
+                return data
+        raise last_error
+
+    def _module_deadline(self, run_deadline: Deadline | None) -> Deadline:
+        seconds = self.settings.llm_module_deadline_seconds
+        return run_deadline.child(seconds) if run_deadline is not None else Deadline(seconds)
+
+    def _request_with_retries(
+        self,
+        messages: List[Dict[str, str]],
+        retries: int = 2,
+        deadline: Deadline | None = None,
+        model: str | None = None,
+        validate: Callable[[Dict[str, Any]], Any] | None = None,
+        hedge_after: float | None = None,
+    ) -> Dict[str, Any]:
+        deadline = deadline or self._module_deadline(None)
         last_error: Exception | None = None
         working_messages = list(messages)
-        for _attempt in range(retries + 1):
+        for attempt in range(retries + 1):
+            remaining = deadline.remaining()
+            if remaining <= 0:
+                raise DeadlineExceeded("LLM time budget exhausted") from last_error
             try:
-                return self._call_model(working_messages)
-            except Exception as exc:  # pragma: no cover - runtime guard
+                return self._call_model(
+                    working_messages,
+                    timeout=min(self.settings.llm_attempt_timeout_seconds, remaining),
+                    model=model,
+                    validate=validate,
+                    hedge_after=hedge_after,
+                )
+            except CircuitOpenError:
+                raise
+            except Exception as exc:
                 last_error = exc
+                if is_transport_error(exc):
+                    # transport problems: back off, resend the same conversation
+                    if attempt < retries:
+                        delay = backoff_delay(
+                            attempt,
+                            self.settings.llm_backoff_base_seconds,
+                            self.settings.llm_backoff_max_seconds,
+                        )
+                        time.sleep(min(delay, deadline.remaining()))
+                    continue
                 correction_note = {
                     "role": "user",
                     "content": "Your last reply was invalid JSON. Reply again with ONLY valid JSON conforming to the schema.",
@@ -223,7 +475,7 @@ class AISelector:
         recent_tasks: List[Dict[str, Any]],
         session,
     ) -> Tuple[List[Dict[str, Any]], str, str]:
-        if not self.settings.use_ai or not self.client:
+        if not self.settings.use_ai or not self.backend:
             tasks = select_with_fallback(session, groups)
             return tasks, "Fallback selector used (AI disabled or unavailable).", "{}"
 
@@ -242,24 +494,226 @@ class AISelector:
             tasks = select_with_fallback(session, groups)
             return tasks, "Fallback selector used after AI failure.", "{}"
 
-    def generate_for_module(
+    def _module_messages(
         self,
         module_id: str,
         module_config: List[Dict[str, Any]],
         history_snippet: List[Dict[str, Any]],
-        settings: Dict[str, Any] | None = None,
-    ) -> Tuple[List[Dict[str, Any]], str, str]:
-        if not self.settings.use_ai or not self.client:
-            raise RuntimeError("AI selector unavailable for module generation.")
-
+        model: str,
+        plan_date: date | None = None,
+    ) -> Tuple[List[Dict[str, str]], str]:
         module_title = _format_module_title(module_id)
         system_prompt = self._build_system_prompt(module_id, module_title)
-        user_content = self._build_module_payload(module_id, module_config, history_snippet)
+        user_content = self._build_module_payload(module_id, module_config, history_snippet, plan_date)
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_content},
         ]
+        return messages, ResponseCache.make_key(model, system_prompt, user_content)
+
+    def _routed_request(
+        self,
+        route: ModelRoute,
+        messages: List[Dict[str, str]],
+        module_id: str,
+        index: ConfigIndex,
+        deadline: Deadline,
+    ) -> Tuple[Dict[str, Any], str]:
+        """Runs the primary model (hedged once its latency percentile is known),
+        then one attempt on the escalation model if every reply failed validation."""
 
-        data = self._request_with_retries(messages)
-        tasks, summary_notes = self._validate_shape(data)
+        def validate(data: Dict[str, Any]) -> None:
+            self._validate_shape(data, module_id, index)
+
+        try:
+            data = self._request_with_retries(
+                messages,
+                deadline=deadline,
+                model=route.primary,
+                validate=validate,
+                hedge_after=self.routing.hedge_after(route),
+            )
+            return data, route.primary
+        except ValueError:
+            if not route.escalation or route.escalation == route.primary or deadline.expired:
+                raise
+        data = self._request_with_retries(messages, retries=0, deadline=deadline, model=route.escalation, validate=validate)
+        return data, route.escalation
+
+    def _cached_result(
+        self,
+        cache_key: str,
+        module_id: str,
+        index: ConfigIndex,
+        use_cache: bool,
+    ) -> Tuple[List[Dict[str, Any]], str, str] | None:
+        if not (use_cache and self.settings.llm_cache_enabled):
+            return None
+        cached = self.response_cache.get(cache_key)
+        if cached is None:
+            return None
+        try:
+            tasks, summary_notes = self._validate_shape(cached, module_id, index)
+        except ValueError:
+            return None
+        return tasks, summary_notes, json.dumps(cached)
+
+    def generate_for_module(
+        self,
+        module_id: str,
+        module_config: List[Dict[str, Any]],
+        history_snippet: List[Dict[str, Any]],
+        settings: Dict[str, Any] | None = None,
+        use_cache: bool = True,
+        deadline: Deadline | None = None,
+        plan_date: date | None = None,
+    ) -> Tuple[List[Dict[str, Any]], str, str]:
+        if not self.settings.use_ai or not self.backend:
+            raise RuntimeError("AI selector unavailable for module generation.")
+
+        route = self.routing.route(module_id)
+        messages, cache_key = self._module_messages(
+            module_id, module_config, history_snippet, route.primary, plan_date
+        )
+        index = load_configs().index
+        cached = self._cached_result(cache_key, module_id, index, use_cache)
+        if cached is not None:
+            return cached
+
+        data, model = self._routed_request(route, messages, module_id, index, self._module_deadline(deadline))
+        tasks, summary_notes = self._validate_shape(data, module_id, index)
+        if self.settings.llm_cache_enabled:
+            self.response_cache.put(cache_key, model, data)
         return tasks, summary_notes, json.dumps(data)
+
+    def module_batch_line(
+        self,
+        module_id: str,
+        module_config: List[Dict[str, Any]],
+        history_snippet: List[Dict[str, Any]],
+        plan_date: date | None = None,
+    ) -> Tuple[Dict[str, Any], str]:
+        """Batch request line for a module (custom_id is the module id) and its response cache key."""
+        model = self.routing.route(module_id).primary
+        messages, cache_key = self._module_messages(module_id, module_config, history_snippet, model, plan_date)
+        return batch_line(module_id, model, messages), cache_key
+
+    def cached_module_result(self, cache_key: str, module_id: str) -> Tuple[List[Dict[str, Any]], str, str] | None:
+        return self._cached_result(cache_key, module_id, load_configs().index, use_cache=True)
+
+    def ingest_batch_result(
+        self,
+        module_id: str,
+        content: str,
+        cache_key: str,
+        model: str,
+    ) -> Tuple[List[Dict[str, Any]], str, str]:
+        """Validates one batch completion; raises ValueError like the interactive path."""
+        data = json.loads(content)
+        tasks, summary_notes = self._validate_shape(data, module_id, load_configs().index)
+        if self.settings.llm_cache_enabled:
+            self.response_cache.put(cache_key, model, data)
+        return tasks, summary_notes, json.dumps(data)
+
+    def repair_task(
+        self,
+        module_id: str,
+        task: Dict[str, Any],
+        error: str,
+        deadline: Deadline | None = None,
+    ) -> Dict[str, Any]:
+        """Asks for a corrected version of one coding task whose template failed the sandbox."""
+        route = self.routing.route(module_id)
+        payload = {
+            "module_id": module_id,
+            "repair_task": task,
+            "template_error": error,
+            "instruction": (
+                "The code_template of this task failed to run. Return {\"tasks\": [<the same task>]} with a corrected "
+                "code_template that compiles and whose run_tests() runs without raising. Keep name and group unchanged."
+            ),
+        }
+        messages = [
+            {"role": "system", "content": self._build_system_prompt(module_id, _format_module_title(module_id))},
+            {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
+        ]
+        index = load_configs().index
+
+        def validate(data: Dict[str, Any]) -> None:
+            self._validate_shape(data, module_id, index)
+
+        data = self._request_with_retries(
+            messages,
+            retries=1,
+            deadline=self._module_deadline(deadline),
+            model=route.escalation or route.primary,
+            validate=validate,
+        )
+        tasks, _ = self._validate_shape(data, module_id, index)
+        return tasks[0]
+
+    def stream_for_module(
+        self,
+        module_id: str,
+        module_config: List[Dict[str, Any]],
+        history_snippet: List[Dict[str, Any]],
+        use_cache: bool = True,
+    ) -> Iterator[Tuple[str, Any]]:
+        """Streams a module generation.
+
+        Yields ("task", task) for each task as soon as its object closes in the
+        stream, then ("done", (tasks, summary_notes, raw_ai)) with the fully
+        validated result. A single streaming attempt is made; callers fall back
+        to generate_for_module on failure.
+        """
+        if not self.settings.use_ai or not self.backend:
+            raise RuntimeError("AI selector unavailable for module generation.")
+
+        model = self.routing.route(module_id).primary
+        messages, cache_key = self._module_messages(module_id, module_config, history_snippet, model)
+        index = load_configs().index
+        cached = self._cached_result(cache_key, module_id, index, use_cache)
+        if cached is not None:
+            for task in cached[0]:
+                yield "task", task
+            yield "done", cached
+            return
+
+        timeout = min(self.settings.llm_attempt_timeout_seconds, self.settings.llm_module_deadline_seconds)
+        prompt_tokens, reserved, timeout = self._reserve(messages, timeout)
+        parser = TaskStreamParser()
+        started = time.perf_counter()
+        try:
+            for chunk in self.backend.stream(model, messages, timeout=timeout):
+                for task in parser.feed(chunk):
+                    cleaned = self._clean_task(task, module_id, index)
+                    if cleaned is not None:
+                        yield "task", cleaned
+        except GeneratorExit:
+            # the client went away mid-stream; without an outcome the half-open probe must not stay taken
+            self.rate_limiter.settle(reserved, prompt_tokens + estimate_tokens(parser.text))
+            self.breaker.cancel_probe()
+            raise
+        except Exception as exc:
+            # the prompt plus whatever was streamed before the failure is charged
+            self.rate_limiter.settle(reserved, prompt_tokens + estimate_tokens(parser.text))
+            self.routing.stats.record(model, "failed")
+            if is_transport_error(exc):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        latency_ms = (time.perf_counter() - started) * 1000
+        self.rate_limiter.settle(reserved, prompt_tokens + estimate_tokens(parser.text))
+        self.breaker.record_success()
+
+        try:
+            data = json.loads(parser.text)
+            tasks, summary_notes = self._validate_shape(data, module_id, index)
+        except ValueError:
+            self.routing.stats.record(model, "invalid", latency_ms)
+            raise
+        self.routing.stats.record(model, "valid", latency_ms)
+        if self.settings.llm_cache_enabled:
+            self.response_cache.put(cache_key, model, data)
+        yield "done", (tasks, summary_notes, json.dumps(data))
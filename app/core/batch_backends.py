@@ -0,0 +1,186 @@
+import json
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+from app.core.config import Settings
+from app.core.llm_backends import LLMBackend, OpenAIBackend, RecordingBackend
+from app.core.resilience import Deadline, DeadlineExceeded
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATES = ("completed", "failed", "expired", "cancelled")
+
+
+def batch_line(custom_id: str, model: str, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {"model": model, "messages": messages, "response_format": {"type": "json_object"}},
+    }
+
+
+def write_batch_file(path: Path, lines: List[Dict[str, Any]]) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    return path
+
+
+def parse_output(text: str) -> Dict[str, str | Exception]:
+    """Maps custom_id to the completion content, or to the error for that line."""
+    results: Dict[str, str | Exception] = {}
+    for raw in text.splitlines():
+        if not raw.strip():
+            continue
+        record = json.loads(raw)
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code", 200) >= 400:
+            error = record.get("error") or (response.get("body") or {}).get("error") or {}
+            results[record["custom_id"]] = RuntimeError(error.get("message") or "Batch request failed")
+            continue
+        choices = (response.get("body") or {}).get("choices") or [{}]
+        results[record["custom_id"]] = (choices[0].get("message") or {}).get("content") or ""
+    return results
+
+
+class BatchBackend:
+    name = "base"
+
+    def submit(self, input_path: Path) -> str:
+        raise NotImplementedError
+
+    def status(self, batch_id: str) -> str:
+        raise NotImplementedError
+
+    def results(self, batch_id: str) -> Dict[str, str | Exception]:
+        raise NotImplementedError
+
+    def run(self, input_path: Path, poll_seconds: float, deadline: Deadline) -> Dict[str, str | Exception]:
+        """Submits a batch file and blocks until it finishes or the deadline passes."""
+        batch_id = self.submit(input_path)
+        while True:
+            state = self.status(batch_id)
+            if state in TERMINAL_STATES:
+                break
+            if deadline.remaining() <= poll_seconds:
+                raise DeadlineExceeded(f"Batch {batch_id} still {state} at deadline")
+            time.sleep(poll_seconds)
+        if state != "completed":
+            raise RuntimeError(f"Batch {batch_id} ended as {state}")
+        return self.results(batch_id)
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """OpenAI Batch API; goes through the generic client calls since the pinned SDK predates `client.batches`."""
+
+    name = "openai"
+
+    def __init__(self, backend: OpenAIBackend):
+        self.client = backend.client
+        self._batches: Dict[str, Dict[str, Any]] = {}
+
+    def submit(self, input_path: Path) -> str:
+        with open(input_path, "rb") as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")  # type: ignore[arg-type]
+        batch = self.client.post(
+            "/batches",
+            cast_to=object,
+            body={"input_file_id": uploaded.id, "endpoint": BATCH_ENDPOINT, "completion_window": "24h"},
+        )
+        self._batches[batch["id"]] = batch
+        return batch["id"]
+
+    def status(self, batch_id: str) -> str:
+        batch = self.client.get(f"/batches/{batch_id}", cast_to=object)
+        self._batches[batch_id] = batch
+        return batch.get("status") or "unknown"
+
+    def results(self, batch_id: str) -> Dict[str, str | Exception]:
+        batch = self._batches.get(batch_id) or {}
+        results: Dict[str, str | Exception] = {}
+        for key in ("output_file_id", "error_file_id"):
+            if batch.get(key):
+                results.update(parse_output(self.client.files.content(batch[key]).text))
+        return results
+
+
+class LocalBatchBackend(BatchBackend):
+    """File-based stand-in for a batch API.
+
+    Batches live in `directory/<batch_id>/` as input.jsonl, output.jsonl and
+    status.json, in the provider's line formats. Work happens on the first
+    status poll, answered by an ordinary backend (usually the synthetic one).
+    """
+
+    name = "local"
+
+    def __init__(self, directory: Path, backend: LLMBackend):
+        self.directory = directory
+        self.backend = backend
+
+    def _path(self, batch_id: str, name: str) -> Path:
+        return self.directory / batch_id / name
+
+    def _write_status(self, batch_id: str, state: str, **extra: Any) -> None:
+        status = {"id": batch_id, "status": state, "updated_at": datetime.utcnow().isoformat(), **extra}
+        self._path(batch_id, "status.json").write_text(json.dumps(status), encoding="utf-8")
+
+    def submit(self, input_path: Path) -> str:
+        batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+        self._path(batch_id, "").mkdir(parents=True, exist_ok=True)
+        self._path(batch_id, "input.jsonl").write_bytes(input_path.read_bytes())
+        self._write_status(batch_id, "validating")
+        return batch_id
+
+    def _process(self, batch_id: str) -> None:
+        self._write_status(batch_id, "in_progress")
+        lines: List[str] = []
+        failed = 0
+        with open(self._path(batch_id, "input.jsonl"), "r", encoding="utf-8") as f:
+            for raw in f:
+                if not raw.strip():
+                    continue
+                request = json.loads(raw)
+                body = request.get("body") or {}
+                record: Dict[str, Any] = {"id": f"req_{uuid.uuid4().hex[:12]}", "custom_id": request.get("custom_id")}
+                try:
+                    content = self.backend.complete(body.get("model"), body.get("messages") or [])
+                    record["response"] = {
+                        "status_code": 200,
+                        "body": {"model": body.get("model"), "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}]},
+                    }
+                    record["error"] = None
+                except Exception as exc:
+                    failed += 1
+                    record["response"] = None
+                    record["error"] = {"code": "backend_error", "message": str(exc)}
+                lines.append(json.dumps(record, ensure_ascii=False))
+        self._path(batch_id, "output.jsonl").write_text("\n".join(lines) + "\n", encoding="utf-8")
+        self._write_status(
+            batch_id, "completed", request_counts={"total": len(lines), "completed": len(lines) - failed, "failed": failed}
+        )
+
+    def status(self, batch_id: str) -> str:
+        state = json.loads(self._path(batch_id, "status.json").read_text(encoding="utf-8")).get("status")
+        if state == "validating":
+            self._process(batch_id)
+            return "completed"
+        return state
+
+    def results(self, batch_id: str) -> Dict[str, str | Exception]:
+        return parse_output(self._path(batch_id, "output.jsonl").read_text(encoding="utf-8"))
+
+
+def build_batch_backend(settings: Settings, backend: LLMBackend | None) -> BatchBackend | None:
+    """The provider's batch API for openai/record, the file-based stand-in for offline backends."""
+    if backend is None:
+        return None
+    if isinstance(backend, RecordingBackend):
+        backend = backend.inner
+    if isinstance(backend, OpenAIBackend):
+        return OpenAIBatchBackend(backend)
+    return LocalBatchBackend(Path(settings.llm_batch_dir), backend)
@@ -19,6 +19,64 @@ class Settings(BaseSettings):
     time_budget: int = Field(default=60, description="Daily time budget in minutes")
     max_items: int = Field(default=6, description="Maximum items total per day")
     avoid_days: int = Field(default=2, description="Avoid repeating same task within N days")
+    llm_backend: str = Field(default="openai", description="openai | record | replay | synthetic")
+    llm_model: str = Field(default="gpt-4.1-mini", description="Primary model for module generation")
+    llm_escalation_model: str | None = Field(default="gpt-4.1", description="Retried once when a reply fails validation")
+    llm_hedge_percentile: float | None = Field(default=0.95, description="Hedge a call once it outlasts this latency percentile")
+    llm_hedge_min_samples: int = Field(default=10, description="Latency samples needed before hedging kicks in")
+    llm_routes: dict = Field(default_factory=dict, description="Per-module primary/escalation/hedge_percentile overrides")
+    llm_record_path: str = Field(default="llm_recordings.jsonl")
+    replay_simulate_latency: bool = Field(default=False)
+    replay_module_fallback: bool = Field(default=False, description="Serve the latest recording for the module on an exact-key miss")
+    synthetic_latency_ms: float = Field(default=800.0)
+    synthetic_latency_sigma: float = Field(default=0.5)
+    synthetic_failure_rate: float = Field(default=0.0)
+    synthetic_invalid_rate: float = Field(default=0.0)
+    synthetic_seed: int | None = Field(default=None)
+    synthetic_model_profiles: dict = Field(
+        default_factory=dict, description="Per-model latency_ms/latency_sigma/failure_rate/invalid_rate overrides"
+    )
+    llm_attempt_timeout_seconds: float = Field(default=45.0, description="Timeout for a single LLM request")
+    llm_module_deadline_seconds: float = Field(default=120.0, description="Total LLM budget per module")
+    llm_run_deadline_seconds: float = Field(default=300.0, description="Total LLM budget per generation run")
+    llm_backoff_base_seconds: float = Field(default=0.5)
+    llm_backoff_max_seconds: float = Field(default=8.0)
+    breaker_failure_threshold: int = Field(default=3, description="Consecutive transport failures before opening")
+    breaker_reset_seconds: float = Field(default=60.0, description="Open-circuit cool-down before a probe")
+    llm_payload_compaction: bool = Field(default=True, description="Send compact, budgeted module payloads")
+    llm_payload_token_budget: int = Field(default=3000, description="Target size of a module payload in tokens")
+    llm_rpm_limit: int = Field(default=500, description="Provider requests per minute (0 disables)")
+    llm_tpm_limit: int = Field(default=200_000, description="Provider tokens per minute (0 disables)")
+    llm_rate_limit_shared: bool = Field(default=False, description="Share the rate limit across workers via the database")
+    llm_completion_token_estimate: int = Field(default=1200, description="Tokens reserved for each completion")
+    llm_batch_nightly: bool = Field(default=True, description="Generate the 00:05 plan through the batch API")
+    llm_batch_dir: str = Field(default="llm_batches", description="Batch input files and the local batch stand-in")
+    llm_batch_poll_seconds: float = Field(default=30.0)
+    llm_batch_max_wait_seconds: float = Field(default=6 * 60 * 60, description="Fall back to interactive calls after this")
+    plan_staging: bool = Field(default=True, description="Precompute tomorrow's plan in the evening")
+    plan_stage_hour: int = Field(default=22)
+    plan_stage_minute: int = Field(default=30)
+    job_worker_embedded: bool = Field(default=True, description="Run the cron triggers and a queue worker in the web process")
+    job_poll_seconds: float = Field(default=5.0, description="Idle queue polling interval")
+    job_lease_seconds: float = Field(default=120.0, description="Claim lease, renewed while a job runs")
+    job_max_attempts: int = Field(default=3)
+    template_validation: bool = Field(default=True, description="Run generated code templates in a sandbox")
+    template_workers: int = Field(default=4, description="Templates checked in parallel")
+    template_timeout_seconds: float = Field(default=5.0)
+    template_cpu_seconds: int = Field(default=3)
+    template_memory_mb: int = Field(default=512)
+    fallback_history_days: int = Field(default=180, description="History window read by the fallback selector")
+    fallback_score_weights: dict = Field(
+        default_factory=dict,
+        description="Overrides for the fallback score weights: importance, recency, streak, difficulty",
+    )
+    generation_concurrency: int = Field(default=4, description="Max concurrent module LLM calls")
+    llm_cache_enabled: bool = Field(default=True, description="Reuse identical LLM responses")
+    llm_cache_ttl_seconds: int = Field(default=6 * 60 * 60)
+    llm_cache_max_entries: int = Field(default=500)
+    config_watch: bool = Field(default=True, description="Hot-reload configs/ and configs/prompts/")
+    config_watch_interval: float = Field(default=2.0, description="Polling interval in seconds without inotify")
+    config_cache_dir: str = Field(default=".cache", description="App-owned directory for the parsed config snapshot")
     task_limits: dict = Field(
         default_factory=lambda: {
             "DSA Fundamentals": 2,
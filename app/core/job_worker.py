@@ -0,0 +1,113 @@
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict
+
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.core.scheduler import run_generation_jobs
+from app.services.job_queue import JobClaim, JobQueue, job_queue
+
+settings = get_settings()
+
+
+class JobWorker:
+    """Claims generation jobs from the durable queue and runs them.
+
+    Runs in a background thread inside the web process (the default) or in
+    the foreground of `python -m app.worker`. Any number of workers can share
+    one database; the lease is renewed while a claim is being generated.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], queue: JobQueue, poll_seconds: float = 5.0):
+        self.session_factory = session_factory
+        self.queue = queue
+        self.poll_seconds = poll_seconds
+        self.jobs_done = 0
+        self.last_error: str | None = None
+        self.last_run_at: datetime | None = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def wake(self) -> None:
+        """Skips the rest of the current poll interval, e.g. right after enqueueing."""
+        self._wake.set()
+
+    def _renew(self, claim: JobClaim, done: threading.Event) -> None:
+        while not done.wait(self.queue.lease_seconds / 3):
+            session = self.session_factory()
+            try:
+                if not self.queue.renew(session, claim):
+                    return
+            except Exception as exc:
+                self.last_error = f"lease renewal: {exc}"
+            finally:
+                session.close()
+
+    def run_once(self) -> bool:
+        """Runs one claim; returns False when the queue had nothing runnable."""
+        session = self.session_factory()
+        try:
+            claim = self.queue.claim(session)
+            if claim is None:
+                return False
+            done = threading.Event()
+            renewer = threading.Thread(target=self._renew, args=(claim, done), name="job-lease", daemon=True)
+            renewer.start()
+            try:
+                run_generation_jobs(session, claim)
+                self.jobs_done += len(claim.job_ids)
+            except Exception as exc:
+                self.last_error = f"{claim.plan_date} {', '.join(claim.module_ids)}: {exc}"
+                self.queue.release(session, claim, repr(exc))
+            finally:
+                done.set()
+                renewer.join()
+            self.last_run_at = datetime.utcnow()
+            return True
+        finally:
+            session.close()
+
+    def run(self) -> None:
+        """Works the queue until stop() is called."""
+        self._stop.clear()
+        while not self._stop.is_set():
+            try:
+                if self.run_once():
+                    continue
+            except Exception as exc:
+                # database busy or unreachable; try again next poll
+                self.last_error = f"queue: {exc}"
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._thread = threading.Thread(target=self.run, name="job-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_seconds + 1)
+        self._thread = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "worker_id": self.queue.worker_id,
+            "jobs_done": self.jobs_done,
+            "last_error": self.last_error,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+        }
+
+
+job_worker = JobWorker(SessionLocal, job_queue, poll_seconds=settings.job_poll_seconds)
@@ -0,0 +1,376 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from app.core.config import Settings
+from app.core.resilience import TransportError
+from app.services.payload_compactor import table_items
+
+try:
+    from openai import OpenAI  # type: ignore
+except Exception:  # pragma: no cover
+    OpenAI = None  # type: ignore
+
+
+Messages = List[Dict[str, str]]
+STREAM_CHUNK_CHARS = 64
+
+
+class BackendError(TransportError):
+    """Raised by a backend when no completion could be produced."""
+
+
+def messages_key(model: str, messages: Messages) -> str:
+    raw = json.dumps([model, messages], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _module_payload(messages: Messages) -> Dict[str, Any]:
+    for message in messages:
+        if message.get("role") != "user":
+            continue
+        try:
+            payload = json.loads(message.get("content") or "")
+        except ValueError:
+            continue
+        if isinstance(payload, dict):
+            return payload
+    return {}
+
+
+class LLMBackend:
+    name = "base"
+
+    def complete(self, model: str, messages: Messages, timeout: float | None = None) -> str:
+        """Returns the raw message content of a JSON-mode chat completion."""
+        raise NotImplementedError
+
+    def stream(self, model: str, messages: Messages, timeout: float | None = None) -> Iterator[str]:
+        """Yields the completion content in chunks; backends without streaming yield it whole."""
+        yield self.complete(model, messages, timeout=timeout)
+
+
+def _sleep_within(delay: float, timeout: float | None) -> None:
+    if timeout is not None and delay > timeout:
+        time.sleep(timeout)
+        raise TimeoutError(f"Request timed out after {timeout:.1f}s")
+    if delay:
+        time.sleep(delay)
+
+
+def _chunked(content: str, delay: float = 0.0) -> Iterator[str]:
+    chunks = [content[i : i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)]
+    for chunk in chunks:
+        if delay:
+            time.sleep(delay / len(chunks))
+        yield chunk
+
+
+class OpenAIBackend(LLMBackend):
+    name = "openai"
+
+    def __init__(self, api_key: str):
+        self.client = OpenAI(api_key=api_key)
+
+    def _options(self, timeout: float | None) -> Dict[str, Any]:
+        # omit timeout entirely when unset; None would disable the client default
+        return {"timeout": timeout} if timeout is not None else {}
+
+    def complete(self, model: str, messages: Messages, timeout: float | None = None) -> str:
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            response_format={"type": "json_object"},
+            **self._options(timeout),
+        )
+        return response.choices[0].message.content or ""
+
+    def stream(self, model: str, messages: Messages, timeout: float | None = None) -> Iterator[str]:
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            response_format={"type": "json_object"},
+            stream=True,
+            **self._options(timeout),
+        )
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class RecordingBackend(LLMBackend):
+    """Passes calls through to another backend and appends them to a JSONL file."""
+
+    name = "record"
+
+    def __init__(self, inner: LLMBackend, path: Path):
+        self.inner = inner
+        self.path = path
+        self._lock = threading.Lock()
+
+    def complete(self, model: str, messages: Messages, timeout: float | None = None) -> str:
+        started = time.perf_counter()
+        content = self.inner.complete(model, messages, timeout=timeout)
+        self._write(model, messages, content, started)
+        return content
+
+    def stream(self, model: str, messages: Messages, timeout: float | None = None) -> Iterator[str]:
+        started = time.perf_counter()
+        parts: List[str] = []
+        for chunk in self.inner.stream(model, messages, timeout=timeout):
+            parts.append(chunk)
+            yield chunk
+        self._write(model, messages, "".join(parts), started)
+
+    def _write(self, model: str, messages: Messages, content: str, started: float) -> None:
+        record = {
+            "key": messages_key(model, messages),
+            "model": model,
+            "module_id": _module_payload(messages).get("module_id"),
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            "messages": messages,
+            "content": content,
+        }
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class SyntheticBackend(LLMBackend):
+    """Offline stand-in that answers with schema-valid plans built from the payload.
+
+    Latency is drawn from a lognormal distribution around `latency_ms`;
+    `failure_rate` raises BackendError and `invalid_rate` returns broken JSON,
+    so retry and fallback paths can be exercised too. `profiles` overrides any
+    of those per model name, e.g. to make the escalation model slower.
+    """
+
+    name = "synthetic"
+
+    def __init__(
+        self,
+        latency_ms: float = 800.0,
+        latency_sigma: float = 0.5,
+        failure_rate: float = 0.0,
+        invalid_rate: float = 0.0,
+        seed: int | None = None,
+        profiles: Dict[str, Dict[str, float]] | None = None,
+    ):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.failure_rate = failure_rate
+        self.invalid_rate = invalid_rate
+        self.profiles = profiles or {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _profile(self, model: str, key: str) -> float:
+        return self.profiles.get(model, {}).get(key, getattr(self, key))
+
+    def _draw(self, model: str) -> tuple[float, float]:
+        latency_ms = self._profile(model, "latency_ms")
+        sigma = self._profile(model, "latency_sigma")
+        with self._lock:
+            delay = self._rng.lognormvariate(0, sigma) * latency_ms if latency_ms > 0 else 0.0
+            return delay / 1000, self._rng.random()
+
+    def _coding_template(self, name: str, module_title: str) -> str:
+        return (
+            f"# Problem: {name}\n"
+            f"# Module: {module_title}\n\n"
+            "from typing import List, Optional\n\n\n"
+            "class Solution:\n"
+            "    def solve(self, *args, **kwargs):\n"
+            "        # TODO: implement your solution here\n"
+            "        pass\n\n\n"
+            "def run_tests():\n"
+            "    tests = [\n"
+            '        {"input": [[1, 2, 3]], "expected": None},\n'
+            "    ]\n"
+            "    for i, t in enumerate(tests):\n"
+            '        result = Solution().solve(*t["input"])\n'
+            "        print(f\"Test {i}: expected {t['expected']}, got {result}\")\n\n\n"
+            'if __name__ == "__main__":\n'
+            "    run_tests()\n"
+        )
+
+    def build_plan(self, messages: Messages) -> Dict[str, Any]:
+        payload = _module_payload(messages)
+        module_id = str(payload.get("module_id") or "module")
+        module_title = payload.get("module_title") or module_id
+        coding = any(token in module_id.lower() for token in ("dsa", "leetcode", "coding"))
+        if isinstance(payload.get("repair_task"), dict):
+            task = dict(payload["repair_task"])
+            task["code_template"] = self._coding_template(str(task.get("name")), module_title)
+            return {"date": str(date.today()), "tasks": [task], "summary_notes": ""}
+        tasks: List[Dict[str, Any]] = []
+        for group in payload.get("module_config") or []:
+            items = sorted(table_items(group), key=lambda i: i.get("importance", 1), reverse=True)
+            if not items:
+                continue
+            item = items[0]
+            task: Dict[str, Any] = {
+                "name": item.get("name"),
+                "group": group.get("group"),
+                "task_type": "coding" if coding else "todo",
+                "difficulty_estimate": 3,
+                "importance": item.get("importance"),
+                "reason": "Synthetic backend: highest-importance item in group",
+                "url": item.get("url"),
+                "metadata": {"synthetic": True},
+            }
+            if coding:
+                task["problem_text"] = f"Practice: {item.get('name')}"
+                task["code_template"] = self._coding_template(str(item.get("name")), module_title)
+            else:
+                task["todo_text"] = f"Spend 20 minutes on {item.get('name')}"
+            tasks.append(task)
+            if len(tasks) >= 2:
+                break
+        return {
+            "date": payload.get("today_date") or str(date.today()),
+            "tasks": tasks,
+            "summary_notes": f"Synthetic plan for {module_title}.",
+        }
+
+    def _respond(self, model: str, messages: Messages, roll: float) -> str:
+        failure_rate = self._profile(model, "failure_rate")
+        if roll < failure_rate:
+            raise BackendError("Synthetic backend failure")
+        if roll < failure_rate + self._profile(model, "invalid_rate"):
+            return '{"tasks": ['
+        return json.dumps(self.build_plan(messages), ensure_ascii=False)
+
+    def complete(self, model: str, messages: Messages, timeout: float | None = None) -> str:
+        delay, roll = self._draw(model)
+        _sleep_within(delay, timeout)
+        return self._respond(model, messages, roll)
+
+    def stream(self, model: str, messages: Messages, timeout: float | None = None) -> Iterator[str]:
+        # spread the drawn latency over the chunks like a token stream would
+        delay, roll = self._draw(model)
+        if timeout is not None and delay > timeout:
+            _sleep_within(delay, timeout)
+        yield from _chunked(self._respond(model, messages, roll), delay)
+
+
+class ReplayBackend(LLMBackend):
+    """Serves completions captured by RecordingBackend.
+
+    Calls are matched on the exact (model, messages) key first, then, with
+    `module_fallback`, on the most recent recording for the same module;
+    anything else goes to `fallback` when one is given.
+    """
+
+    name = "replay"
+
+    def __init__(
+        self,
+        path: Path,
+        fallback: LLMBackend | None = None,
+        simulate_latency: bool = False,
+        module_fallback: bool = False,
+    ):
+        self.path = path
+        self.fallback = fallback
+        self.simulate_latency = simulate_latency
+        self.module_fallback = module_fallback
+        self.exact_hits = 0
+        self.module_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.by_key: Dict[str, Dict[str, Any]] = {}
+        self.by_module: Dict[str, Dict[str, Any]] = {}
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.by_key[record.get("key")] = record
+                    if record.get("module_id"):
+                        self.by_module[record["module_id"]] = record
+
+    def _lookup(self, model: str, messages: Messages) -> Dict[str, Any] | None:
+        record = self.by_key.get(messages_key(model, messages))
+        counter = "exact_hits"
+        if record is None and self.module_fallback:
+            # a recording for a different prompt; counted so stale replays show up
+            record = self.by_module.get(_module_payload(messages).get("module_id"))
+            counter = "module_hits"
+        if record is None:
+            counter = "misses"
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+        if record is None and self.fallback is None:
+            raise BackendError("No recorded completion for request")
+        return record
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "recordings": len(self.by_key),
+                "exact_hits": self.exact_hits,
+                "module_hits": self.module_hits,
+                "misses": self.misses,
+                "module_fallback": self.module_fallback,
+            }
+
+    def _latency(self, record: Dict[str, Any]) -> float:
+        return record.get("latency_ms", 0) / 1000 if self.simulate_latency else 0.0
+
+    def complete(self, model: str, messages: Messages, timeout: float | None = None) -> str:
+        record = self._lookup(model, messages)
+        if record is None:
+            return self.fallback.complete(model, messages, timeout=timeout)
+        _sleep_within(self._latency(record), timeout)
+        return record.get("content") or ""
+
+    def stream(self, model: str, messages: Messages, timeout: float | None = None) -> Iterator[str]:
+        record = self._lookup(model, messages)
+        if record is None:
+            yield from self.fallback.stream(model, messages, timeout=timeout)
+            return
+        delay = self._latency(record)
+        if timeout is not None and delay > timeout:
+            _sleep_within(delay, timeout)
+        yield from _chunked(record.get("content") or "", self._latency(record))
+
+
+def build_backend(settings: Settings) -> LLMBackend | None:
+    kind = (settings.llm_backend or "openai").lower()
+    record_path = Path(settings.llm_record_path)
+    synthetic = SyntheticBackend(
+        latency_ms=settings.synthetic_latency_ms,
+        latency_sigma=settings.synthetic_latency_sigma,
+        failure_rate=settings.synthetic_failure_rate,
+        invalid_rate=settings.synthetic_invalid_rate,
+        seed=settings.synthetic_seed,
+        profiles=settings.synthetic_model_profiles,
+    )
+    if kind == "synthetic":
+        return synthetic
+    if kind == "replay":
+        return ReplayBackend(
+            record_path,
+            fallback=synthetic,
+            simulate_latency=settings.replay_simulate_latency,
+            module_fallback=settings.replay_module_fallback,
+        )
+
+    if OpenAI is None or not settings.openai_api_key:
+        return None
+    backend: LLMBackend = OpenAIBackend(settings.openai_api_key)
+    if kind == "record":
+        backend = RecordingBackend(backend, record_path)
+    return backend
@@ -0,0 +1,133 @@
+import random
+import threading
+import time
+from typing import Any, Dict
+
+try:
+    import openai  # type: ignore
+except Exception:  # pragma: no cover
+    openai = None  # type: ignore
+
+
+class TransportError(RuntimeError):
+    """The provider could not be reached or did not answer in time."""
+
+
+class CircuitOpenError(TransportError):
+    """The circuit breaker is open; the provider is skipped entirely."""
+
+
+class DeadlineExceeded(TransportError):
+    """The time budget for a module or run ran out."""
+
+
+# deliberately not OSError: a full disk or a permission error is a local fault, not the provider's;
+# backends report their own failures as BackendError (a TransportError)
+TRANSPORT_ERRORS: tuple = (TransportError, TimeoutError, ConnectionError)
+if openai is not None:
+    TRANSPORT_ERRORS += (openai.APIConnectionError, openai.APITimeoutError, openai.RateLimitError)
+
+
+def is_transport_error(exc: BaseException) -> bool:
+    if isinstance(exc, TRANSPORT_ERRORS):
+        return True
+    if openai is not None and isinstance(exc, openai.APIStatusError):
+        return exc.status_code >= 500 or exc.status_code == 429
+    # anything else (bad JSON, schema problems, 4xx) is the model's answer, not the network
+    return False
+
+
+class Deadline:
+    """Monotonic time budget; child deadlines never outlive their parent."""
+
+    def __init__(self, seconds: float, parent: "Deadline | None" = None):
+        expires_at = time.monotonic() + seconds
+        if parent is not None:
+            expires_at = min(expires_at, parent.expires_at)
+        self.expires_at = expires_at
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def child(self, seconds: float) -> "Deadline":
+        return Deadline(seconds, parent=self)
+
+
+def backoff_delay(attempt: int, base: float, cap: float, rng: random.Random | None = None) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(cap, base * 2 ** attempt))."""
+    return (rng or random).uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive transport failures.
+
+    While open every call is refused until `reset_seconds` pass; then a single
+    probe is let through (half-open) and its outcome closes or re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_seconds: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at: float | None = None
+        self.total_failures = 0
+        self.total_rejections = 0
+        self._probe_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls would be refused without a probe."""
+        return self.state == "open" and time.monotonic() - (self.opened_at or 0) < self.reset_seconds
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - (self.opened_at or 0) >= self.reset_seconds:
+                self.state = "half_open"
+                self._probe_in_flight = False
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.total_rejections += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.total_failures += 1
+            self.consecutive_failures += 1
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def cancel_probe(self) -> None:
+        """Frees the half-open probe slot when an allowed call ends without an outcome, e.g. a closed stream."""
+        with self._lock:
+            if self.state == "half_open":
+                self._probe_in_flight = False
+
+    def status(self) -> Dict[str, Any]:
+        retry_in = None
+        if self.state == "open" and self.opened_at is not None:
+            retry_in = max(0.0, round(self.reset_seconds - (time.monotonic() - self.opened_at), 1))
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "total_failures": self.total_failures,
+            "total_rejections": self.total_rejections,
+            "retry_in_seconds": retry_in,
+        }
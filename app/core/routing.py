@@ -0,0 +1,93 @@
+import threading
+from collections import deque
+from typing import Any, Dict, NamedTuple
+
+from app.core.config import Settings
+
+LATENCY_WINDOW = 200
+
+
+class ModelRoute(NamedTuple):
+    primary: str
+    escalation: str | None
+    hedge_percentile: float | None
+
+
+class ModelStats:
+    """Rolling per-model latency window plus outcome counters."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, deque] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _bump(self, model: str, counter: str) -> None:
+        counters = self._counters.setdefault(
+            model, {"calls": 0, "valid": 0, "invalid": 0, "failed": 0, "hedges": 0, "hedge_wins": 0}
+        )
+        counters[counter] += 1
+
+    def record(self, model: str, outcome: str, latency_ms: float | None = None) -> None:
+        """outcome is one of valid / invalid / failed."""
+        with self._lock:
+            self._bump(model, "calls")
+            self._bump(model, outcome)
+            if latency_ms is not None:
+                self._latencies.setdefault(model, deque(maxlen=self.window)).append(latency_ms)
+
+    def record_hedge(self, model: str) -> None:
+        with self._lock:
+            self._bump(model, "hedges")
+
+    def record_hedge_win(self, model: str) -> None:
+        with self._lock:
+            self._bump(model, "hedge_wins")
+
+    def percentile(self, model: str, pct: float, min_samples: int = 1) -> float | None:
+        with self._lock:
+            samples = sorted(self._latencies.get(model) or ())
+        if len(samples) < max(1, min_samples):
+            return None
+        index = min(len(samples) - 1, int(round(pct * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            models = list(self._counters)
+            counters = {model: dict(self._counters[model]) for model in models}
+        for model in models:
+            counters[model]["p50_ms"] = self.percentile(model, 0.5)
+            counters[model]["p95_ms"] = self.percentile(model, 0.95)
+        return counters
+
+
+class RoutingPolicy:
+    """Resolves the model route for a module from settings.
+
+    `llm_routes` maps a module id to any of primary / escalation /
+    hedge_percentile; missing keys fall back to the global defaults.
+    """
+
+    def __init__(self, settings: Settings, stats: ModelStats | None = None):
+        self.default = ModelRoute(
+            primary=settings.llm_model,
+            escalation=settings.llm_escalation_model or None,
+            hedge_percentile=settings.llm_hedge_percentile or None,
+        )
+        self.overrides: Dict[str, Dict[str, Any]] = dict(settings.llm_routes or {})
+        self.hedge_min_samples = settings.llm_hedge_min_samples
+        self.stats = stats or ModelStats()
+
+    def route(self, module_id: str | None) -> ModelRoute:
+        override = self.overrides.get(module_id or "")
+        if not override:
+            return self.default
+        return self.default._replace(**{k: v for k, v in override.items() if k in ModelRoute._fields})
+
+    def hedge_after(self, route: ModelRoute) -> float | None:
+        """Seconds to wait on the primary before hedging, once enough samples exist."""
+        if not route.hedge_percentile:
+            return None
+        latency_ms = self.stats.percentile(route.primary, route.hedge_percentile, self.hedge_min_samples)
+        return latency_ms / 1000 if latency_ms is not None else None
@@ -1,66 +1,49 @@
-from datetime import date, timedelta
-from typing import List, Dict, Any, Tuple
+import hashlib
+import json
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, List, Dict, Any, Iterator, Tuple
 import pytz
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.services.item_stats import load_item_stats
 from app.services.loader import load_configs
+from app.services.prompt_loader import get_prompt_registry
 from app.services.selector import select_with_fallback
 from app.core.ai_selector import AISelector
+from app.core.batch_backends import write_batch_file
+from app.core.resilience import Deadline
 from app.models.task import TodayTask
 from app.models.history import TaskHistory
 from app.models.daily_summary import DailySummary
+from app.models.job import GenerationJob
+from app.models.plan_stage import PlanStage
+from app.services.job_queue import JobClaim, job_queue
+from app.services.template_sandbox import template_sandbox
 
 
 settings = get_settings()
 scheduler = BackgroundScheduler(timezone=pytz.timezone(settings.timezone))
 ai_selector = AISelector()
+FALLBACK_NOTES = "Fallback selector used (AI disabled or unavailable)."
 
+# called with (module_ids, stage) as modules move through a generation run
+Progress = Callable[[List[str], str], None]
+# called with (module_id, (tasks, summary_notes, raw_ai)) once a module's result is final
+ModuleResultHandler = Callable[[str, Tuple[List[Dict[str, Any]], str, str]], None]
 
-def _serialize_history(rows: List[TaskHistory]) -> List[Dict[str, Any]]:
-    grouped: Dict[str, List[TaskHistory]] = {}
-    for r in rows:
-        key = f"{r.group}:{r.name}"
-        grouped.setdefault(key, []).append(r)
-
-    payload: List[Dict[str, Any]] = []
-    today = date.today()
-    for records in grouped.values():
-        records.sort(key=lambda x: x.timestamp, reverse=True)
-        last_completed = next((r for r in records if r.completed), None)
-        days_since_last_solved = (today - last_completed.date).days if last_completed else None
-
-        # streak counted from most recent backwards until a non-completion
-        streak = 0
-        for r in records:
-            if r.completed:
-                streak += 1
-            else:
-                break
 
-        difficulties = [r.difficulty for r in records if r.difficulty is not None]
-        avg_difficulty = sum(difficulties) / len(difficulties) if difficulties else None
-        solved_today = any(r.date == today and r.completed for r in records)
-
-        sample = records[0]
-        payload.append(
-            {
-                "name": sample.name,
-                "group": sample.group,
-                "module_id": getattr(sample, "module_id", None),
-                "task_type": getattr(sample, "task_type", None),
-                "last_seen": str(sample.date),
-                "days_since_last_solved": days_since_last_solved,
-                "streak": streak,
-                "average_difficulty": avg_difficulty,
-                "solved_today": solved_today,
-                "difficulty_samples": difficulties,
-                "total_sessions": len(records),
-            }
-        )
-    return payload
+def _report(progress: Progress | None, module_ids: List[str], stage: str) -> None:
+    if progress is not None and module_ids:
+        progress(module_ids, stage)
 
 
 def _serialize_today_tasks(rows: List[TodayTask]) -> List[Dict[str, Any]]:
@@ -79,103 +62,656 @@ def _serialize_today_tasks(rows: List[TodayTask]) -> List[Dict[str, Any]]:
     return payload
 
 
+def _load_history_snippet(
+    session: Session,
+    module_id: str,
+    history_window_days: int,
+    as_of: date | None = None,
+) -> List[Dict[str, Any]]:
+    as_of = as_of or date.today()
+    return load_item_stats(session, module_id, as_of - timedelta(days=history_window_days), as_of)
+
+
+def _fallback_module_tasks(
+    session: Session,
+    module_id: str,
+    module_config: List[Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], str, str]:
+    fallback_tasks = select_with_fallback(session, module_config, module_id)
+    return fallback_tasks, FALLBACK_NOTES, "{}"
+
+
+def _checked_tasks(
+    module_id: str,
+    tasks: List[Dict[str, Any]],
+    deadline: Deadline | None = None,
+) -> List[Dict[str, Any]] | None:
+    """Runs one module's generated code templates in the sandbox.
+
+    Broken templates get one targeted repair request each, in parallel, and
+    tasks that are still broken are dropped. Returns None when that leaves
+    the module without tasks. Needs no session, so it can run in a pool.
+    """
+    coding = [task for task in tasks if task.get("code_template")]
+    if not coding:
+        return tasks
+    checks = template_sandbox.check_many([task["code_template"] for task in coding])
+    broken = [(task, check.error) for task, check in zip(coding, checks) if not check.ok]
+    if not broken:
+        return tasks
+
+    repaired: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+    if settings.use_ai and ai_selector.backend and not ai_selector.breaker.is_open:
+        workers = max(1, min(settings.generation_concurrency, len(broken)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="template-repair") as pool:
+            futures = {
+                pool.submit(ai_selector.repair_task, module_id, task, error or "", deadline): task
+                for task, error in broken
+            }
+            for future in as_completed(futures):
+                try:
+                    fixed = future.result()
+                except Exception:
+                    continue
+                if fixed.get("code_template"):
+                    repaired.append((futures[future], fixed))
+    rechecks = template_sandbox.check_many([fixed["code_template"] for _, fixed in repaired])
+    fixes = {id(original): fixed for (original, fixed), check in zip(repaired, rechecks) if check.ok}
+
+    broken_ids = {id(task) for task, _ in broken}
+    kept = [fixes.get(id(task)) if id(task) in broken_ids else task for task in tasks]
+    return [task for task in kept if task is not None] or None
+
+
+def _validate_templates(
+    session: Session,
+    module_configs: Dict[str, List[Dict[str, Any]]],
+    results: Dict[str, Tuple[List[Dict[str, Any]], str, str]],
+    deadline: Deadline | None = None,
+    progress: Progress | None = None,
+) -> Dict[str, Tuple[List[Dict[str, Any]], str, str]]:
+    """Template-checks several modules' results concurrently; emptied modules fall back to the selector."""
+    if not settings.template_validation or not results:
+        return results
+    workers = max(1, min(settings.generation_concurrency, len(results)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="template-check") as pool:
+        checked = dict(
+            zip(results, pool.map(lambda module_id: _checked_tasks(module_id, results[module_id][0], deadline), results))
+        )
+    for module_id, tasks in checked.items():
+        _, summary_notes, raw_ai = results[module_id]
+        if tasks is not None:
+            results[module_id] = (tasks, summary_notes, raw_ai)
+        else:
+            results[module_id] = _fallback_module_tasks(session, module_id, module_configs[module_id])
+            _report(progress, [module_id], "fell_back")
+    return results
+
+
 def generate_module_tasks(
     session: Session,
     module_id: str,
     module_config: List[Dict[str, Any]],
     history_window_days: int,
+    force: bool = False,
 ) -> Tuple[List[Dict[str, Any]], str, str]:
-    today = date.today()
-    history_window_start = today - timedelta(days=history_window_days)
-    history_rows = (
-        session.query(TaskHistory)
-        .filter(
-            TaskHistory.date >= history_window_start,
-            TaskHistory.module_id == module_id,
-        )
-        .order_by(TaskHistory.timestamp.desc())
-        .all()
-    )
-    history_snippet = _serialize_history(history_rows)
+    history_snippet = _load_history_snippet(session, module_id, history_window_days)
 
     try:
         tasks, summary_notes, raw_ai = ai_selector.generate_for_module(
             module_id,
             module_config,
             history_snippet,
+            use_cache=not force,
         )
-        return tasks, summary_notes, raw_ai
     except Exception:
-        fallback_tasks = select_with_fallback(session, module_config)
-        return fallback_tasks, "Fallback selector used (AI disabled or unavailable).", "{}"
+        return _fallback_module_tasks(session, module_id, module_config)
+    results = _validate_templates(session, {module_id: module_config}, {module_id: (tasks, summary_notes, raw_ai)})
+    return results[module_id]
 
 
-def generate_daily_tasks(session: Session) -> List[TodayTask]:
-    loaded_configs = load_configs()
-    module_configs = getattr(loaded_configs, "modules", {}) if loaded_configs is not None else {}
-    today = date.today()
+def stream_module_tasks(
+    session: Session,
+    module_id: str,
+    module_config: List[Dict[str, Any]],
+    history_window_days: int,
+    force: bool = False,
+) -> Iterator[Tuple[str, Any]]:
+    """Streaming counterpart of generate_module_tasks with the same fallbacks.
 
-    session.query(TodayTask).filter(TodayTask.date == today).delete()
-    session.query(DailySummary).filter(DailySummary.date == today).delete()
+    Yields ("task", task) as tasks become available and ends with
+    ("done", (tasks, summary_notes, raw_ai)). A stream that fails before
+    its first task is retried as one regular call; once cards were sent,
+    only the fallback selector's "done" follows, so no card repeats.
+    """
+    history_snippet = _load_history_snippet(session, module_id, history_window_days)
+    streamed = False
+    try:
+        for kind, payload in ai_selector.stream_for_module(
+            module_id, module_config, history_snippet, use_cache=not force
+        ):
+            if kind == "done":
+                # streamed cards are provisional; the done list reflects template validation
+                payload = _validate_templates(session, {module_id: module_config}, {module_id: payload})[module_id]
+            streamed = True
+            yield kind, payload
+        return
+    except Exception:
+        pass
 
-    created: List[TodayTask] = []
-    for module_id, module_config in module_configs.items():
-        tasks, summary_notes, raw_ai = generate_module_tasks(
+    if streamed:
+        yield "done", _fallback_module_tasks(session, module_id, module_config)
+        return
+    try:
+        result = ai_selector.generate_for_module(module_id, module_config, history_snippet, use_cache=not force)
+        result = _validate_templates(session, {module_id: module_config}, {module_id: result})[module_id]
+    except Exception:
+        result = _fallback_module_tasks(session, module_id, module_config)
+    for task in result[0]:
+        yield "task", task
+    yield "done", result
+
+
+def _generate_checked(
+    module_id: str,
+    module_config: List[Dict[str, Any]],
+    history_snippet: List[Dict[str, Any]],
+    force: bool,
+    deadline: Deadline,
+    plan_date: date | None,
+    progress: Progress | None,
+) -> Tuple[List[Dict[str, Any]], str, str] | None:
+    """Pool side of one module: the LLM call and its template checks; None if no task survives."""
+    tasks, summary_notes, raw_ai = ai_selector.generate_for_module(
+        module_id, module_config, history_snippet, use_cache=not force, deadline=deadline, plan_date=plan_date
+    )
+    if not settings.template_validation:
+        return tasks, summary_notes, raw_ai
+    _report(progress, [module_id], "validating")
+    checked = _checked_tasks(module_id, tasks, deadline)
+    return None if checked is None else (checked, summary_notes, raw_ai)
+
+
+def generate_all_module_tasks(
+    session: Session,
+    module_configs: Dict[str, List[Dict[str, Any]]],
+    history_window_days: int,
+    force: bool = False,
+    plan_date: date | None = None,
+    progress: Progress | None = None,
+    on_result: ModuleResultHandler | None = None,
+) -> Dict[str, Tuple[List[Dict[str, Any]], str, str]]:
+    """Runs the per-module LLM calls and template checks concurrently.
+
+    Only the pool work is threaded; history reads, fallbacks and `on_result`
+    use the caller's session on this thread, called per module as soon as
+    it is final, so the fastest modules are handled first.
+    """
+    snippets = {
+        module_id: _load_history_snippet(session, module_id, history_window_days, plan_date)
+        for module_id in module_configs
+    }
+    results: Dict[str, Tuple[List[Dict[str, Any]], str, str]] = {}
+    if not module_configs:
+        return results
+    if ai_selector.breaker.is_open:
+        # provider is known to be down; don't spend the run waiting on it
+        _report(progress, list(module_configs), "fell_back")
+        for module_id, module_config in module_configs.items():
+            results[module_id] = _fallback_module_tasks(session, module_id, module_config)
+            if on_result is not None:
+                on_result(module_id, results[module_id])
+        return results
+
+    _report(progress, list(module_configs), "calling_llm")
+    run_deadline = Deadline(settings.llm_run_deadline_seconds)
+    workers = max(1, min(settings.generation_concurrency, len(module_configs)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="module-gen") as pool:
+        futures = {
+            pool.submit(
+                _generate_checked,
+                module_id,
+                module_config,
+                snippets[module_id],
+                force,
+                run_deadline,
+                plan_date,
+                progress,
+            ): module_id
+            for module_id, module_config in module_configs.items()
+        }
+        for future in as_completed(futures):
+            module_id = futures[future]
+            try:
+                result = future.result()
+            except Exception:
+                result = None
+            if result is None:
+                result = _fallback_module_tasks(session, module_id, module_configs[module_id])
+                _report(progress, [module_id], "fell_back")
+            results[module_id] = result
+            if on_result is not None:
+                on_result(module_id, result)
+    return results
+
+
+def generate_all_module_tasks_batch(
+    session: Session,
+    module_configs: Dict[str, List[Dict[str, Any]]],
+    history_window_days: int,
+    force: bool = False,
+    plan_date: date | None = None,
+    progress: Progress | None = None,
+    on_result: ModuleResultHandler | None = None,
+) -> Dict[str, Tuple[List[Dict[str, Any]], str, str]]:
+    """Nightly counterpart of generate_all_module_tasks using the batch API.
+
+    Every uncached module request goes into one JSONL batch file that is
+    submitted and polled until done. Modules the batch could not answer
+    (errors, invalid replies, timeout) go through the interactive path
+    after the batch results have been handed to `on_result`.
+    """
+    batch_backend = ai_selector.batch_backend
+    if batch_backend is None or not settings.use_ai or ai_selector.breaker.is_open:
+        return generate_all_module_tasks(
             session,
-            module_id,
-            module_config,
-            settings.task_sample_days,
+            module_configs,
+            history_window_days,
+            force=force,
+            plan_date=plan_date,
+            progress=progress,
+            on_result=on_result,
         )
 
-        for item in tasks:
-            metadata = item.get("metadata") or {}
-            task_type = item.get("task_type") or "todo"
-            extra = {
-                "reason": item.get("reason"),
-                "metadata": metadata,
-                "action": metadata.get("action"),
-                "difficulty_estimate": item.get("difficulty_estimate"),
-            }
-            task = TodayTask(
-                date=today,
-                module_id=module_id,
-                name=item.get("name"),
-                group=item.get("group"),
-                task_type=task_type,
-                problem_text=item.get("problem_text"),
-                todo_text=item.get("todo_text"),
-                code_template=item.get("code_template"),
-                log=item.get("log"),
-                url=item.get("url"),
-                extra=extra,
+    results: Dict[str, Tuple[List[Dict[str, Any]], str, str]] = {}
+    lines: List[Dict[str, Any]] = []
+    pending: Dict[str, Tuple[str, str]] = {}
+    for module_id, module_config in module_configs.items():
+        snippet = _load_history_snippet(session, module_id, history_window_days, plan_date)
+        line, cache_key = ai_selector.module_batch_line(module_id, module_config, snippet, plan_date)
+        cached = None if force else ai_selector.cached_module_result(cache_key, module_id)
+        if cached is not None:
+            results[module_id] = cached
+            _report(progress, [module_id], "validating")
+            continue
+        lines.append(line)
+        pending[module_id] = (cache_key, line["body"]["model"])
+
+    if lines:
+        _report(progress, list(pending), "calling_llm")
+        batch_path = Path(settings.llm_batch_dir) / f"{plan_date or date.today()}-{uuid.uuid4().hex[:8]}.jsonl"
+        try:
+            outputs = batch_backend.run(
+                write_batch_file(batch_path, lines),
+                settings.llm_batch_poll_seconds,
+                Deadline(settings.llm_batch_max_wait_seconds),
             )
-            session.add(task)
-            created.append(task)
-
-        session.add(
-            DailySummary(
-                date=today,
-                module_id=module_id,
-                summary_text=summary_notes,
-                raw_ai_response=raw_ai,
+        except Exception:
+            outputs = {}
+        for module_id, (cache_key, model) in pending.items():
+            content = outputs.get(module_id)
+            if not isinstance(content, str):
+                continue
+            try:
+                results[module_id] = ai_selector.ingest_batch_result(module_id, content, cache_key, model)
+                _report(progress, [module_id], "validating")
+            except ValueError:
+                continue
+
+    results = _validate_templates(session, module_configs, results, progress=progress)
+    if on_result is not None:
+        for module_id, result in results.items():
+            on_result(module_id, result)
+
+    missing = {module_id: config for module_id, config in module_configs.items() if module_id not in results}
+    if missing:
+        results.update(
+            generate_all_module_tasks(
+                session,
+                missing,
+                history_window_days,
+                force=force,
+                plan_date=plan_date,
+                progress=progress,
+                on_result=on_result,
             )
         )
+    return results
+
+
+def persist_module_tasks(
+    session: Session,
+    module_id: str,
+    tasks: List[Dict[str, Any]],
+    summary_notes: str,
+    raw_ai: str,
+    plan_date: date,
+    fingerprint: str | None = None,
+) -> List[TodayTask]:
+    created: List[TodayTask] = []
+    for item in tasks:
+        metadata = item.get("metadata") or {}
+        task_type = item.get("task_type") or "todo"
+        extra = {
+            "reason": item.get("reason"),
+            "metadata": metadata,
+            "action": metadata.get("action"),
+            "difficulty_estimate": item.get("difficulty_estimate"),
+        }
+        task = TodayTask(
+            date=plan_date,
+            module_id=module_id,
+            name=item.get("name"),
+            group=item.get("group"),
+            task_type=task_type,
+            problem_text=item.get("problem_text"),
+            todo_text=item.get("todo_text"),
+            code_template=item.get("code_template"),
+            log=item.get("log"),
+            url=item.get("url"),
+            extra=extra,
+        )
+        session.add(task)
+        created.append(task)
+
+    session.add(
+        DailySummary(
+            date=plan_date,
+            module_id=module_id,
+            summary_text=summary_notes,
+            raw_ai_response=raw_ai,
+            fingerprint=fingerprint,
+        )
+    )
+    return created
+
+
+def replace_module_plan(
+    session: Session,
+    module_id: str,
+    result: Tuple[List[Dict[str, Any]], str, str],
+    plan_date: date,
+    fingerprint: str | None = None,
+) -> List[TodayTask]:
+    """Swaps one module's plan rows for `plan_date`; the caller commits, so readers see old or new, never none.
+
+    `fingerprint` is the module_fingerprint its inputs had when generation
+    started. A fallback plan is stored without one, so the next run retries.
+    """
+    session.query(TodayTask).filter(TodayTask.date == plan_date, TodayTask.module_id == module_id).delete(
+        synchronize_session=False
+    )
+    session.query(DailySummary).filter(DailySummary.date == plan_date, DailySummary.module_id == module_id).delete(
+        synchronize_session=False
+    )
+    tasks, summary_notes, raw_ai = result
+    if summary_notes == FALLBACK_NOTES:
+        fingerprint = None
+    return persist_module_tasks(session, module_id, tasks, summary_notes, raw_ai, plan_date, fingerprint)
 
+
+def module_fingerprint(
+    session: Session,
+    module_id: str,
+    module_config: List[Dict[str, Any]],
+    plan_date: date,
+) -> str:
+    """Hash of what generating the module reads: its config items, the prompt bundle, its history snippet and the date."""
+    prompts = get_prompt_registry()
+    prompts.get()
+    history_snippet = _load_history_snippet(session, module_id, settings.task_sample_days, plan_date)
+    inputs = json.dumps(
+        [module_config, prompts.digest, history_snippet, plan_date.isoformat()], sort_keys=True, default=str
+    )
+    return hashlib.sha256(inputs.encode("utf-8")).hexdigest()
+
+
+def _changed_modules(
+    session: Session,
+    module_configs: Dict[str, List[Dict[str, Any]]],
+    plan_date: date,
+) -> Tuple[Dict[str, str], List[str]]:
+    """Fingerprints every module; returns them with the modules whose stored plan was made from other inputs."""
+    fingerprints = {
+        module_id: module_fingerprint(session, module_id, module_config, plan_date)
+        for module_id, module_config in module_configs.items()
+    }
+    stored = dict(
+        session.query(DailySummary.module_id, DailySummary.fingerprint).filter(
+            DailySummary.date == plan_date, DailySummary.module_id.in_(list(module_configs))
+        )
+    )
+    changed = [module_id for module_id in module_configs if stored.get(module_id) != fingerprints[module_id]]
+    return fingerprints, changed
+
+
+def _drop_unconfigured_modules(session: Session, module_ids: List[str], plan_date: date) -> None:
+    if not module_ids:
+        # an empty config set is never a reason to wipe the plan
+        return
+    session.query(TodayTask).filter(TodayTask.date == plan_date, TodayTask.module_id.notin_(module_ids)).delete(
+        synchronize_session=False
+    )
+    session.query(DailySummary).filter(
+        DailySummary.date == plan_date, DailySummary.module_id.notin_(module_ids)
+    ).delete(synchronize_session=False)
+
+
+def _history_marks(session: Session, module_ids: List[str]) -> Dict[str, int]:
+    marks = {module_id: 0 for module_id in module_ids}
+    rows = (
+        session.query(TaskHistory.module_id, func.max(TaskHistory.id))
+        .filter(TaskHistory.module_id.in_(module_ids))
+        .group_by(TaskHistory.module_id)
+    )
+    for module_id, max_id in rows:
+        marks[module_id] = max_id or 0
+    return marks
+
+
+def _record_stages(session: Session, plan_date: date, marks: Dict[str, int]) -> None:
+    session.query(PlanStage).filter(PlanStage.plan_date == plan_date, PlanStage.module_id.in_(list(marks))).delete(
+        synchronize_session=False
+    )
+    for module_id, mark in marks.items():
+        session.add(PlanStage(plan_date=plan_date, module_id=module_id, history_mark=mark))
+
+
+def _job_progress(claim: JobClaim) -> Progress:
+    """Records stages on the claimed jobs in short transactions of their own, so other processes can follow."""
+
+    def report(module_ids: List[str], stage: str) -> None:
+        session = SessionLocal()
+        try:
+            job_queue.set_stage(session, claim, module_ids, stage)
+            session.commit()
+        except SQLAlchemyError:
+            # progress is informational; never fail the run over it
+            session.rollback()
+        finally:
+            session.close()
+
+    return report
+
+
+def run_generation_jobs(session: Session, claim: JobClaim) -> List[TodayTask]:
+    """Generates and writes the plan rows of one claimed group of (date, module) jobs.
+
+    Each module lands in its own short transaction as soon as its result is
+    final: the job is marked done and the module's rows are swapped, but
+    only while this worker still holds the job. Unless the claim is forced,
+    modules whose fingerprint matches their stored plan finish at once as
+    "unchanged" without being generated. A plan for a future date is
+    a staged plan: rows carry that date, so `TodayTask.date == today`
+    queries ignore them until it arrives, and each module's history
+    high-water mark is kept in PlanStage for promotion.
+    """
+    all_configs = load_configs().modules
+    module_configs = {module_id: all_configs[module_id] for module_id in claim.module_ids if module_id in all_configs}
+    removed = [module_id for module_id in claim.module_ids if module_id not in module_configs]
+    if removed:
+        job_queue.finish(session, claim, removed)
+        session.commit()
+    fingerprints, changed = _changed_modules(session, module_configs, claim.plan_date)
+    unchanged = [module_id for module_id in module_configs if module_id not in changed]
+    if unchanged and not claim.force:
+        job_queue.set_stage(session, claim, unchanged, "unchanged")
+        job_queue.finish(session, claim, unchanged)
+        session.commit()
+        module_configs = {module_id: module_configs[module_id] for module_id in changed}
+    staged = claim.plan_date > date.today()
+    marks = _history_marks(session, list(module_configs)) if staged else {}
+    created: List[TodayTask] = []
+
+    def land(module_id: str, result: Tuple[List[Dict[str, Any]], str, str]) -> None:
+        try:
+            if job_queue.finish(session, claim, [module_id]):
+                rows = replace_module_plan(session, module_id, result, claim.plan_date, fingerprints[module_id])
+                if staged:
+                    _record_stages(session, claim.plan_date, {module_id: marks[module_id]})
+            else:
+                rows = []
+            session.commit()
+        except Exception as exc:
+            # only this module goes back to the queue; the others keep landing
+            job_queue.release(session, claim, repr(exc), [module_id])
+            return
+        created.extend(rows)
+
+    generate = generate_all_module_tasks_batch if claim.batch else generate_all_module_tasks
+    generate(
+        session,
+        module_configs,
+        settings.task_sample_days,
+        force=claim.force,
+        plan_date=claim.plan_date,
+        progress=_job_progress(claim),
+        on_result=land,
+    )
+    _drop_unconfigured_modules(session, list(all_configs), claim.plan_date)
     session.commit()
     return created
 
 
+def queue_next_day_plan(session: Session, batch: bool = False) -> None:
+    """Queues tomorrow's plan so it is generated ahead of time."""
+    module_ids = list(load_configs().modules)
+    job_queue.enqueue(session, date.today() + timedelta(days=1), module_ids, batch=batch)
+    session.commit()
+
+
+def queue_daily_plan(session: Session, batch: bool = False) -> List[str]:
+    """Queues whatever today's plan still needs and returns those modules.
+
+    Modules without rows for today get a job, as do staged modules whose
+    history grew after staging; their stages are marked promoted. Safe to
+    call from every process: jobs are keyed per (date, module).
+    """
+    today = date.today()
+    module_ids = list(load_configs().modules)
+    stages = {
+        stage.module_id: stage
+        for stage in session.query(PlanStage).filter(PlanStage.plan_date == today, PlanStage.promoted_at.is_(None))
+    }
+    marks = _history_marks(session, module_ids)
+    stale = [
+        module_id
+        for module_id in module_ids
+        if module_id in stages and marks[module_id] > stages[module_id].history_mark
+    ]
+    planned = {
+        module_id for (module_id,) in session.query(TodayTask.module_id).filter(TodayTask.date == today).distinct()
+    }
+    missing = [module_id for module_id in module_ids if module_id not in planned and module_id not in stale]
+
+    run_id = job_queue.enqueue(session, today, stale, batch=batch, redo=True)
+    job_queue.enqueue(session, today, missing, batch=batch, run_id=run_id)
+    promoted_at = datetime.utcnow()
+    for stage in stages.values():
+        stage.promoted_at = promoted_at
+    session.commit()
+    return stale + missing
+
+
+def queue_refresh(session: Session, force: bool = False) -> Tuple[str, bool, List[str]]:
+    """Queues a regeneration of today's plan.
+
+    Returns (run id, joined an active run, modules `force` could not reach).
+    While any of today's jobs is queued or running, a refresh joins that run
+    instead of starting another one. A forced refresh still upgrades the run
+    it joins: its queued jobs become forced and finished ones are queued again
+    under it. Only jobs already running keep their mode; they are returned.
+    """
+    today = date.today()
+    module_ids = list(load_configs().modules)
+    active = job_queue.active_run(session, today)
+    if active is not None:
+        if not force:
+            return active, True, []
+        job_queue.enqueue(session, today, module_ids, force=True, run_id=active)
+        session.commit()
+        unforced = session.query(GenerationJob.module_id).filter(
+            GenerationJob.plan_date == today,
+            GenerationJob.module_id.in_(module_ids),
+            GenerationJob.status == "running",
+            GenerationJob.force.is_(False),
+        )
+        return active, True, [module_id for (module_id,) in unforced]
+    run_id = job_queue.enqueue(session, today, module_ids, force=force, redo=True)
+    session.commit()
+    # a refresh queued concurrently by another process may own the rows
+    return job_queue.active_run(session, today) or run_id, False, []
+
+
+def plan_status(session: Session, plan_date: date | None = None) -> Dict[str, str]:
+    """Per configured module: "ready", "queued", "running", "failed" or "missing".
+
+    A module is ready once it has rows for the date or its job is done; a
+    finished plan can be empty, e.g. after its tasks were completed.
+    """
+    plan_date = plan_date or date.today()
+    module_ids = list(load_configs().modules)
+    ready = {
+        module_id
+        for (module_id,) in session.query(TodayTask.module_id).filter(TodayTask.date == plan_date).distinct()
+    }
+    jobs = dict(
+        session.query(GenerationJob.module_id, GenerationJob.status).filter(
+            GenerationJob.plan_date == plan_date, GenerationJob.module_id.in_(module_ids)
+        )
+    )
+    return {
+        module_id: "ready" if module_id in ready or jobs.get(module_id) == "done" else jobs.get(module_id, "missing")
+        for module_id in module_ids
+    }
+
+
 def start_scheduler(get_session_callable):
+    """Cron triggers that queue the daily and next-day plans; workers run the jobs."""
     if scheduler.running:
         return
 
     def job_wrapper():
         session = get_session_callable()
         try:
-            generate_daily_tasks(session)
+            queue_daily_plan(session, batch=settings.llm_batch_nightly)
+        finally:
+            session.close()
+
+    def stage_wrapper():
+        session = get_session_callable()
+        try:
+            queue_next_day_plan(session, batch=settings.llm_batch_nightly)
         finally:
             session.close()
 
     trigger = CronTrigger(hour=0, minute=5)
     scheduler.add_job(job_wrapper, trigger=trigger, name="daily-task-generation", replace_existing=True)
+    if settings.plan_staging:
+        scheduler.add_job(
+            stage_wrapper,
+            trigger=CronTrigger(hour=settings.plan_stage_hour, minute=settings.plan_stage_minute),
+            name="next-day-plan-staging",
+            replace_existing=True,
+        )
     scheduler.start()
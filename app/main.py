@@ -1,20 +1,32 @@
-from datetime import date
+import threading
+from datetime import date, datetime
 from typing import Dict, List
 from fastapi import FastAPI, Depends, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from app.services.avatar_picker import pick_random_avatar, pick_quote_for_avatar
 from app.services.loader import load_configs
+from app.services.config_watcher import config_watcher
 
 from app.api import tasks as tasks_router
 from app.api import admin as admin_router
-from app.core.database import Base, engine, get_db, SessionLocal
-from app.core.scheduler import start_scheduler, generate_daily_tasks, scheduler
+from app.core.config import get_settings
+from app.core.database import Base, add_missing_columns, engine, get_db, SessionLocal
+from app.core.scheduler import plan_status, start_scheduler, queue_daily_plan, scheduler
+from app.core.job_worker import job_worker
 from app.models.task import TodayTask
 from app.models.daily_summary import DailySummary  # noqa: F401 - ensure table creation
+from app.models.llm_cache import LLMResponseCache  # noqa: F401 - ensure table creation
+from app.models.rate_limit import LLMRateBucket  # noqa: F401 - ensure table creation
+from app.models.plan_stage import PlanStage  # noqa: F401 - ensure table creation
+from app.models.item_stats import TaskItemStats  # noqa: F401 - ensure table creation
+from app.models.job import GenerationJob  # noqa: F401 - ensure table creation
+from app.models.module_stream import ModuleStream  # noqa: F401 - ensure table creation
+from app.services.item_stats import ensure_item_stats
 from app.models.history import TaskHistory
 
+settings = get_settings()
 app = FastAPI(title="Adaptive Daily Task Scheduler")
 app.include_router(tasks_router.router)
 app.include_router(admin_router.router)
@@ -23,24 +35,42 @@ app.mount("/static", StaticFiles(directory="app/static"), name="static")
 templates = Jinja2Templates(directory="app/templates")
 
 
-@app.on_event("startup")
-def startup_event():
-    Base.metadata.create_all(bind=engine)
-    start_scheduler(SessionLocal)
-    # ensure today has tasks
+warm_up_state: Dict[str, str | None] = {"finished_at": None, "error": None}
+
+
+def warm_up():
+    """Background part of startup: history stats and queueing today's plan."""
     session = SessionLocal()
     try:
-        exists = session.query(TodayTask).filter(TodayTask.date == date.today()).first()
-        if not exists:
-            generate_daily_tasks(session)
+        ensure_item_stats(session)
+        # a plan staged last night only needs promoting
+        if queue_daily_plan(session):
+            job_worker.wake()
+    except Exception as exc:
+        warm_up_state["error"] = str(exc)
     finally:
         session.close()
+        warm_up_state["finished_at"] = datetime.utcnow().isoformat()
+
+
+@app.on_event("startup")
+def startup_event():
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    if settings.config_watch:
+        config_watcher.start()
+    if settings.job_worker_embedded:
+        start_scheduler(SessionLocal)
+        job_worker.start()
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
 
 
 @app.on_event("shutdown")
 def shutdown_event():
     if scheduler.running:
         scheduler.shutdown(wait=False)
+    job_worker.stop()
+    config_watcher.stop()
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -51,6 +81,7 @@ def home(request: Request, db=Depends(get_db)):
     module_tasks: Dict[str, List[TodayTask]] = {}
     for t in tasks:
         module_tasks.setdefault(t.module_id, []).append(t)
+    pending = {module_id: status for module_id, status in plan_status(db, today).items() if status != "ready"}
 
     avatar = pick_random_avatar()
     if avatar:
@@ -59,9 +90,9 @@ def home(request: Request, db=Depends(get_db)):
             avatar = {**avatar, "quote": avatar_quote}
 
     loaded_configs = load_configs()
-    configs = getattr(loaded_configs, "modules", {}) if loaded_configs is not None else {}
-    tabs = ["today"] + sorted(configs.keys())
-    module_labels = {mid: mid.replace("-", " ").replace("_", " ").title() for mid in configs.keys()}
+    configs = loaded_configs.modules
+    tabs = ["today"] + loaded_configs.index.module_ids
+    module_labels = loaded_configs.index.module_labels
     tab_param = request.query_params.get("tab", "today")
     active_tab = tab_param if tab_param in tabs else "today"
 
@@ -70,6 +101,7 @@ def home(request: Request, db=Depends(get_db)):
         {
             "request": request,
             "module_tasks": module_tasks,
+            "pending": pending,
             "module_labels": module_labels,
             "configs": configs,
             "date": today,
@@ -80,6 +112,30 @@ def home(request: Request, db=Depends(get_db)):
     )
 
 
+@app.get("/healthz")
+def healthz():
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz(db=Depends(get_db)):
+    """Ready once configs load and no module of today's plan is still waiting to be generated."""
+    checks: Dict[str, object] = {"warm_up": bool(warm_up_state["finished_at"]) and not warm_up_state["error"]}
+    try:
+        checks["configs"] = bool(load_configs().modules)
+        modules = plan_status(db)
+    except Exception as exc:
+        checks["configs"] = False
+        modules = {}
+        checks["error"] = str(exc)
+    checks["plan"] = bool(modules) and all(status in ("ready", "failed") for status in modules.values())
+    ready = bool(checks["warm_up"] and checks["configs"] and checks["plan"])
+    return JSONResponse(
+        {"status": "ready" if ready else "starting", "checks": checks, "modules": modules},
+        status_code=200 if ready else 503,
+    )
+
+
 @app.get("/admin", response_class=HTMLResponse)
 def admin(request: Request, db=Depends(get_db)):
     today = date.today()
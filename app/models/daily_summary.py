@@ -13,3 +13,5 @@ class DailySummary(Base):
     module_id = Column(String, nullable=False, index=True)
     summary_text = Column(Text, nullable=True)
     raw_ai_response = Column(Text, nullable=True)
+    # module_fingerprint of the inputs this plan was generated from; None forces the next run to regenerate
+    fingerprint = Column(String, nullable=True)
@@ -0,0 +1,26 @@
+from datetime import datetime
+from sqlalchemy import Column, Date, DateTime, Float, Integer, String, UniqueConstraint
+
+from app.core.database import Base
+
+
+class TaskItemStats(Base):
+    __tablename__ = "task_item_stats"
+    __table_args__ = (UniqueConstraint("module_id", "group", "name", name="uq_task_item_stats_item"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    module_id = Column(String, nullable=False, index=True)
+    group = Column(String, nullable=False)
+    name = Column(String, nullable=False)
+    task_type = Column(String, nullable=True)
+    total_sessions = Column(Integer, nullable=False, default=0)
+    completed_count = Column(Integer, nullable=False, default=0)
+    difficulty_count = Column(Integer, nullable=False, default=0)
+    difficulty_sum = Column(Float, nullable=False, default=0)
+    difficulty_min = Column(Integer, nullable=True)
+    difficulty_max = Column(Integer, nullable=True)
+    last_difficulty = Column(Integer, nullable=True)
+    streak = Column(Integer, nullable=False, default=0)
+    last_seen = Column(Date, nullable=True, index=True)
+    last_completed = Column(Date, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)
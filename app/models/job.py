@@ -0,0 +1,30 @@
+from datetime import datetime
+from sqlalchemy import Boolean, Column, Date, DateTime, Float, Integer, String, Text, UniqueConstraint
+
+from app.core.database import Base
+
+
+class GenerationJob(Base):
+    """One plan generation job per (plan_date, module_id); the key makes enqueueing idempotent."""
+
+    __tablename__ = "generation_jobs"
+    __table_args__ = (UniqueConstraint("plan_date", "module_id", name="uq_generation_job_date_module"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    plan_date = Column(Date, nullable=False, index=True)
+    module_id = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="queued", index=True)  # queued | running | done | failed
+    # progress within a run: queued | calling_llm | validating | persisted | fell_back | unchanged | failed
+    stage = Column(String, nullable=False, default="queued")
+    # jobs queued together (one refresh or trigger) share a run id
+    run_id = Column(String, nullable=True, index=True)
+    force = Column(Boolean, nullable=False, default=False)
+    batch = Column(Boolean, nullable=False, default=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    # set while claimed; an expired lease makes the job claimable again
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(Float, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
@@ -0,0 +1,17 @@
+from sqlalchemy import Boolean, Column, Float, String
+
+from app.core.database import Base
+
+
+class ModuleStream(Base):
+    """One-time ticket for a single-module regeneration stream, issued by POST and redeemed by the SSE GET."""
+
+    __tablename__ = "module_streams"
+
+    token = Column(String, primary_key=True)
+    module_id = Column(String, nullable=False, index=True)
+    force = Column(Boolean, nullable=False, default=False)
+    created_at = Column(Float, nullable=False)
+    # set once the stream connects; a ticket is never redeemed twice
+    claimed_at = Column(Float, nullable=True)
+    finished_at = Column(Float, nullable=True)
@@ -0,0 +1,17 @@
+from datetime import datetime
+from sqlalchemy import Column, Date, DateTime, Integer, String, UniqueConstraint
+
+from app.core.database import Base
+
+
+class PlanStage(Base):
+    __tablename__ = "plan_stages"
+    __table_args__ = (UniqueConstraint("plan_date", "module_id", name="uq_plan_stage_date_module"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    plan_date = Column(Date, nullable=False, index=True)
+    module_id = Column(String, nullable=False)
+    # highest task_history id for the module when the plan was staged
+    history_mark = Column(Integer, nullable=False, default=0)
+    staged_at = Column(DateTime, default=datetime.utcnow)
+    promoted_at = Column(DateTime, nullable=True)
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Float, String
+
+from app.core.database import Base
+
+
+class LLMRateBucket(Base):
+    __tablename__ = "llm_rate_buckets"
+
+    name = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)
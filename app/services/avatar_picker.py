@@ -1,6 +1,7 @@
 import random
+import threading
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import yaml
 
@@ -8,6 +9,7 @@ AVATAR_PATHS = [
     Path(__file__).resolve().parents[2] / "configs" / "avatars.yaml",
     Path(__file__).resolve().parents[2] / "configs" / "avatars.yml",
 ]
+NGRAM = 3
 
 
 def _get_avatar_file() -> Optional[Path]:
@@ -17,15 +19,89 @@ def _get_avatar_file() -> Optional[Path]:
     return None
 
 
-def load_avatars() -> List[Dict[str, Any]]:
+def _ngrams(text: str) -> Set[str]:
+    return {text[i : i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class AvatarCatalog:
+    """Parsed avatars with a lowercase category -> avatar positions index.
+
+    Substring lookups go through a trigram index over category names, so a
+    group only has to be verified against categories sharing all its trigrams.
+    """
+
+    def __init__(self, avatars: List[Dict[str, Any]]):
+        self.avatars = avatars
+        self.quotes: List[Tuple[str, ...]] = []
+        self.categories: Dict[str, List[int]] = {}
+        self._ngrams: Dict[str, Set[str]] = {}
+        self._group_cache: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._positions: Dict[int, int] = {id(avatar): position for position, avatar in enumerate(avatars)}
+        for position, avatar in enumerate(avatars):
+            quotes = avatar.get("quotes") if isinstance(avatar, dict) else None
+            self.quotes.append(tuple(str(q) for q in quotes or []))
+            categories = avatar.get("categories", []) if isinstance(avatar, dict) else []
+            for category in categories:
+                category = str(category).lower()
+                self.categories.setdefault(category, []).append(position)
+                for gram in _ngrams(category):
+                    self._ngrams.setdefault(gram, set()).add(category)
+
+    def _matching_categories(self, needle: str) -> List[str]:
+        if len(needle) < NGRAM:
+            return [c for c in self.categories if needle in c]
+        candidates: Set[str] | None = None
+        for gram in _ngrams(needle):
+            found = self._ngrams.get(gram)
+            if not found:
+                return []
+            candidates = set(found) if candidates is None else candidates & found
+        return [c for c in candidates or () if needle in c]
+
+    def for_group(self, group: str) -> Optional[Dict[str, Any]]:
+        if not self.avatars:
+            return None
+        group_lower = group.lower()
+        if group_lower not in self._group_cache:
+            positions = [p for c in self._matching_categories(group_lower) for p in self.categories[c]]
+            self._group_cache[group_lower] = self.avatars[min(positions)] if positions else self.avatars[0]
+        return self._group_cache[group_lower]
+
+    def quotes_for(self, avatar: Dict[str, Any]) -> Tuple[str, ...]:
+        position = self._positions.get(id(avatar))
+        if position is not None and self.avatars[position] is avatar:
+            return self.quotes[position]
+        quotes = avatar.get("quotes") if isinstance(avatar, dict) else None
+        return tuple(quotes or ())
+
+
+_EMPTY = AvatarCatalog([])
+_cache: Dict[str, Any] = {"key": None, "catalog": _EMPTY}
+_cache_lock = threading.Lock()
+
+
+def get_avatar_catalog() -> AvatarCatalog:
     path = _get_avatar_file()
     if not path:
-        return []
-    with open(path, "r", encoding="utf-8") as f:
-        data = yaml.safe_load(f) or []
-    if not isinstance(data, list):
-        return []
-    return data
+        return _EMPTY
+    try:
+        stat = path.stat()
+    except OSError:
+        return _EMPTY
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    if _cache["key"] == key:
+        return _cache["catalog"]
+    with _cache_lock:
+        if _cache["key"] != key:
+            with open(path, "r", encoding="utf-8") as f:
+                data = yaml.safe_load(f) or []
+            _cache["catalog"] = AvatarCatalog(data if isinstance(data, list) else [])
+            _cache["key"] = key
+        return _cache["catalog"]
+
+
+def load_avatars() -> List[Dict[str, Any]]:
+    return get_avatar_catalog().avatars
 
 
 def pick_avatar_for_day(seed: int) -> Optional[Dict[str, Any]]:
@@ -44,20 +120,13 @@ def pick_random_avatar() -> Optional[Dict[str, Any]]:
 
 
 def pick_avatar_for_group(group: str) -> Optional[Dict[str, Any]]:
-    avatars = load_avatars()
-    if not avatars:
-        return None
-    group_lower = group.lower()
-    filtered = [
-        avatar
-        for avatar in avatars
-        if any(group_lower in str(cat).lower() for cat in avatar.get("categories", []))
-    ]
-    return filtered[0] if filtered else avatars[0]
+    return get_avatar_catalog().for_group(group)
 
 
 def pick_quote_for_avatar(avatar: Dict[str, Any]) -> Optional[str]:
-    quotes = avatar.get("quotes") if isinstance(avatar, dict) else None
+    if not isinstance(avatar, dict):
+        return None
+    quotes = get_avatar_catalog().quotes_for(avatar)
     if not quotes:
         return None
     return random.choice(quotes)
@@ -0,0 +1,131 @@
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+from app.core.config import get_settings
+from app.services.loader import ConfigRegistry, get_config_registry
+from app.services.prompt_loader import PromptRegistry, get_prompt_registry
+
+try:
+    from watchfiles import watch  # type: ignore
+except Exception:  # pragma: no cover
+    watch = None  # type: ignore
+
+
+settings = get_settings()
+WATCHED_SUFFIXES = (".yaml", ".yml", ".md", ".txt", ".json")
+
+
+def _is_source_file(_change: Any, path: str) -> bool:
+    return path.endswith(WATCHED_SUFFIXES)
+
+
+class ConfigWatcher:
+    """Re-validates configs/ and configs/prompts/ in a background thread.
+
+    Uses inotify through watchfiles when it is installed and stat-polling
+    otherwise. While running, load_configs() and load_prompt_templates() serve
+    the last good snapshot without touching the filesystem.
+    """
+
+    def __init__(self, configs: ConfigRegistry, prompts: PromptRegistry, interval: float = 2.0, enabled: bool = True):
+        self.configs = configs
+        self.prompts = prompts
+        self.interval = interval
+        self.enabled = enabled
+        self.reload_count = 0
+        self.last_error: str | None = None
+        self.last_reload_at: datetime | None = None
+        self._mode = "inotify" if watch is not None else "polling"
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def mode(self) -> str:
+        return self._mode if self.enabled else "disabled"
+
+    def check(self) -> bool:
+        reloaded = False
+        failed = False
+        for name, registry in (("configs", self.configs), ("prompts", self.prompts)):
+            try:
+                if registry.refresh():
+                    reloaded = True
+            except Exception as exc:
+                # keep serving the previous snapshot
+                self.last_error = f"{name}: {exc}"
+                failed = True
+        if reloaded:
+            self.reload_count += 1
+            self.last_reload_at = datetime.utcnow()
+            if not failed:
+                self.last_error = None
+        return reloaded
+
+    def _watch_paths(self) -> List[Path]:
+        paths = [self.configs.config_dir]
+        if self.configs.config_dir not in self.prompts.directory.parents:
+            paths.append(self.prompts.directory)
+        return [path for path in paths if path.exists()]
+
+    def _run(self) -> None:
+        if watch is not None:
+            try:
+                # the periodic timeout doubles as a safety poll for missed events
+                for _changes in watch(
+                    *self._watch_paths(),
+                    watch_filter=_is_source_file,
+                    stop_event=self._stop,
+                    rust_timeout=int(self.interval * 1000),
+                    yield_on_timeout=True,
+                ):
+                    self.check()
+                return
+            except Exception as exc:  # pragma: no cover - fall back to polling
+                self.last_error = f"watcher: {exc}"
+                self._mode = "polling"
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        # make sure there is a good snapshot before serving it blindly
+        self.configs.get()
+        self.prompts.get()
+        self.configs.watched = True
+        self.prompts.watched = True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+        self._thread = None
+        self.configs.watched = False
+        self.prompts.watched = False
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": self.running,
+            "mode": self.mode,
+            "reload_count": self.reload_count,
+            "last_error": self.last_error,
+            "last_reload_at": self.last_reload_at.isoformat() if self.last_reload_at else None,
+        }
+
+
+config_watcher = ConfigWatcher(
+    get_config_registry(),
+    get_prompt_registry(),
+    interval=settings.config_watch_interval,
+    enabled=settings.config_watch,
+)
@@ -0,0 +1,112 @@
+from datetime import date, datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import case, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.history import TaskHistory
+from app.models.item_stats import TaskItemStats
+
+ITEM_KEY = ("module_id", "group", "name")
+
+
+def record_history(session: Session, history: TaskHistory) -> None:
+    """Folds one new history row into its item's running stats.
+
+    A single INSERT .. ON CONFLICT statement, so it joins the caller's
+    transaction and needs no read first. History rows arrive newest-last,
+    which is what keeps the streak arithmetic valid.
+    """
+    stats = TaskItemStats.__table__.c
+    completed = bool(history.completed)
+    difficulty = history.difficulty
+    insert = sqlite_insert(TaskItemStats.__table__).values(
+        module_id=history.module_id,
+        group=history.group,
+        name=history.name,
+        task_type=history.task_type,
+        total_sessions=1,
+        completed_count=int(completed),
+        difficulty_count=int(difficulty is not None),
+        difficulty_sum=difficulty or 0,
+        difficulty_min=difficulty,
+        difficulty_max=difficulty,
+        last_difficulty=difficulty,
+        streak=int(completed),
+        last_seen=history.date,
+        last_completed=history.date if completed else None,
+        updated_at=datetime.utcnow(),
+    )
+    changes: Dict[str, Any] = {
+        "task_type": insert.excluded.task_type,
+        "total_sessions": stats.total_sessions + 1,
+        "completed_count": stats.completed_count + int(completed),
+        "streak": stats.streak + 1 if completed else 0,
+        "last_seen": insert.excluded.last_seen,
+        "updated_at": insert.excluded.updated_at,
+    }
+    if completed:
+        changes["last_completed"] = insert.excluded.last_completed
+    if difficulty is not None:
+        changes.update(
+            difficulty_count=stats.difficulty_count + 1,
+            difficulty_sum=stats.difficulty_sum + difficulty,
+            difficulty_min=case((stats.difficulty_min.is_(None), difficulty), else_=func.min(stats.difficulty_min, difficulty)),
+            difficulty_max=case((stats.difficulty_max.is_(None), difficulty), else_=func.max(stats.difficulty_max, difficulty)),
+            last_difficulty=difficulty,
+        )
+    session.execute(insert.on_conflict_do_update(index_elements=list(ITEM_KEY), set_=changes))
+
+
+def serialize_item_stats(row: TaskItemStats, today: date) -> Dict[str, Any]:
+    difficulty_stats = None
+    average_difficulty = None
+    if row.difficulty_count:
+        average_difficulty = row.difficulty_sum / row.difficulty_count
+        difficulty_stats = {
+            "n": row.difficulty_count,
+            "mean": round(average_difficulty, 2),
+            "min": row.difficulty_min,
+            "max": row.difficulty_max,
+            "last": row.last_difficulty,
+        }
+    return {
+        "name": row.name,
+        "group": row.group,
+        "module_id": row.module_id,
+        "task_type": row.task_type,
+        "last_seen": str(row.last_seen),
+        "days_since_last_solved": (today - row.last_completed).days if row.last_completed else None,
+        "streak": row.streak,
+        "average_difficulty": average_difficulty,
+        "solved_today": row.last_completed == today,
+        "difficulty_stats": difficulty_stats,
+        "total_sessions": row.total_sessions,
+    }
+
+
+def load_item_stats(session: Session, module_id: str, since: date, today: date) -> List[Dict[str, Any]]:
+    """One row per item seen in the module since `since`, most recent first."""
+    rows = (
+        session.query(TaskItemStats)
+        .filter(TaskItemStats.module_id == module_id, TaskItemStats.last_seen >= since)
+        .order_by(TaskItemStats.last_seen.desc(), TaskItemStats.updated_at.desc())
+        .all()
+    )
+    return [serialize_item_stats(row, today) for row in rows]
+
+
+def rebuild_item_stats(session: Session) -> int:
+    """Recomputes the table from task_history in one transaction; returns the item count."""
+    session.query(TaskItemStats).delete()
+    for history in session.query(TaskHistory).order_by(TaskHistory.timestamp, TaskHistory.id).all():
+        record_history(session, history)
+    session.commit()
+    return session.query(TaskItemStats).count()
+
+
+def ensure_item_stats(session: Session) -> None:
+    """Builds the table once for databases that predate it."""
+    if session.query(TaskItemStats.id).first() is None and session.query(TaskHistory.id).first() is not None:
+        rebuild_item_stats(session)
@@ -0,0 +1,251 @@
+import os
+import socket
+import time
+import uuid
+from datetime import date, datetime
+from typing import Dict, List, NamedTuple
+
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.job import GenerationJob
+
+settings = get_settings()
+
+
+class JobClaim(NamedTuple):
+    owner: str
+    plan_date: date
+    force: bool
+    batch: bool
+    job_ids: List[int]
+    module_ids: List[str]
+
+
+class JobQueue:
+    """Durable plan generation queue in the application database.
+
+    Jobs are keyed by (plan_date, module_id), so enqueueing the same plan from
+    several processes is a no-op. A worker claims every runnable job of one
+    plan date at once under a time-limited lease and must renew it while it
+    works; a crashed worker's jobs become claimable again when the lease
+    lapses. All state changes are conditional UPDATEs, which SQLite applies
+    one writer at a time.
+    """
+
+    def __init__(self, lease_seconds: float = 120.0, max_attempts: int = 3):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    @staticmethod
+    def _claimable(now: float):
+        return or_(
+            GenerationJob.status == "queued",
+            and_(GenerationJob.status == "running", GenerationJob.lease_expires_at < now),
+        )
+
+    def enqueue(
+        self,
+        session: Session,
+        plan_date: date,
+        module_ids: List[str],
+        force: bool = False,
+        batch: bool = False,
+        redo: bool = False,
+        run_id: str | None = None,
+    ) -> str:
+        """Queues one job per module and returns the run id; the caller commits.
+
+        Finished jobs are only queued again with `redo` or `force`, and
+        failed ones always are. Running jobs are left alone.
+        """
+        run_id = run_id or uuid.uuid4().hex
+        if not module_ids:
+            return run_id
+        session.execute(
+            sqlite_insert(GenerationJob.__table__)
+            .values(
+                [
+                    {
+                        "plan_date": plan_date,
+                        "module_id": module_id,
+                        "status": "queued",
+                        "stage": "queued",
+                        "run_id": run_id,
+                        "force": force,
+                        "batch": batch,
+                        "attempts": 0,
+                        "created_at": datetime.utcnow(),
+                    }
+                    for module_id in module_ids
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["plan_date", "module_id"])
+        )
+        restart = ["failed", "done"] if redo or force else ["failed"]
+        jobs = session.query(GenerationJob).filter(
+            GenerationJob.plan_date == plan_date, GenerationJob.module_id.in_(module_ids)
+        )
+        jobs.filter(GenerationJob.status.in_(restart)).update(
+            {
+                GenerationJob.status: "queued",
+                GenerationJob.stage: "queued",
+                GenerationJob.run_id: run_id,
+                GenerationJob.force: force,
+                GenerationJob.batch: batch,
+                GenerationJob.attempts: 0,
+                GenerationJob.error: None,
+                GenerationJob.finished_at: None,
+            },
+            synchronize_session=False,
+        )
+        if force:
+            jobs.filter(GenerationJob.status == "queued").update({GenerationJob.force: True}, synchronize_session=False)
+        return run_id
+
+    def claim(self, session: Session) -> JobClaim | None:
+        """Leases every runnable job sharing the oldest plan date and run options."""
+        now = time.time()
+        session.query(GenerationJob).filter(
+            GenerationJob.status == "running",
+            GenerationJob.lease_expires_at < now,
+            GenerationJob.attempts >= self.max_attempts,
+        ).update(
+            {
+                GenerationJob.status: "failed",
+                GenerationJob.stage: "failed",
+                GenerationJob.lease_owner: None,
+                GenerationJob.error: "Lease expired",
+            },
+            synchronize_session=False,
+        )
+        head = (
+            session.query(GenerationJob)
+            .filter(self._claimable(now))
+            .order_by(GenerationJob.plan_date, GenerationJob.id)
+            .first()
+        )
+        if head is None:
+            session.commit()
+            return None
+        plan_date, force, batch = head.plan_date, head.force, head.batch
+        owner = f"{self.worker_id}:{uuid.uuid4().hex[:8]}"
+        session.query(GenerationJob).filter(
+            self._claimable(now),
+            GenerationJob.plan_date == plan_date,
+            GenerationJob.force == force,
+            GenerationJob.batch == batch,
+        ).update(
+            {
+                GenerationJob.status: "running",
+                GenerationJob.lease_owner: owner,
+                GenerationJob.lease_expires_at: now + self.lease_seconds,
+                GenerationJob.attempts: GenerationJob.attempts + 1,
+                GenerationJob.started_at: datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+        session.commit()
+        rows = session.query(GenerationJob.id, GenerationJob.module_id).filter(GenerationJob.lease_owner == owner).all()
+        if not rows:
+            return None
+        return JobClaim(owner, plan_date, force, batch, [job_id for job_id, _ in rows], [module_id for _, module_id in rows])
+
+    def renew(self, session: Session, claim: JobClaim) -> bool:
+        """Extends the lease; False once another worker has taken the jobs over."""
+        renewed = (
+            session.query(GenerationJob)
+            .filter(GenerationJob.id.in_(claim.job_ids), GenerationJob.lease_owner == claim.owner)
+            .update({GenerationJob.lease_expires_at: time.time() + self.lease_seconds}, synchronize_session=False)
+        )
+        session.commit()
+        return renewed > 0
+
+    def finish(self, session: Session, claim: JobClaim, module_ids: List[str] | None = None) -> List[str]:
+        """Marks the still-leased jobs (of `module_ids`, default all) done and returns their modules; the caller commits.
+
+        The first UPDATE takes the database write lock, so whatever the caller
+        writes before committing cannot race a worker that took over a lapsed lease.
+        """
+        owned = (
+            session.query(GenerationJob)
+            .filter(GenerationJob.id.in_(claim.job_ids), GenerationJob.lease_owner == claim.owner)
+        )
+        if module_ids is not None:
+            owned = owned.filter(GenerationJob.module_id.in_(module_ids))
+        owned.update({GenerationJob.lease_expires_at: time.time() + self.lease_seconds}, synchronize_session=False)
+        module_ids = [module_id for (module_id,) in owned.with_entities(GenerationJob.module_id)]
+        owned.update(
+            {
+                GenerationJob.status: "done",
+                GenerationJob.stage: case(
+                    (GenerationJob.stage.in_(("fell_back", "unchanged")), GenerationJob.stage), else_="persisted"
+                ),
+                GenerationJob.lease_owner: None,
+                GenerationJob.lease_expires_at: None,
+                GenerationJob.error: None,
+                GenerationJob.finished_at: datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+        return module_ids
+
+    def release(self, session: Session, claim: JobClaim, error: str, module_ids: List[str] | None = None) -> None:
+        """Returns failed jobs to the queue, or marks them failed after the last attempt."""
+        session.rollback()
+        owned = session.query(GenerationJob).filter(
+            GenerationJob.id.in_(claim.job_ids), GenerationJob.lease_owner == claim.owner
+        )
+        if module_ids is not None:
+            owned = owned.filter(GenerationJob.module_id.in_(module_ids))
+        out_of_attempts = GenerationJob.attempts >= self.max_attempts
+        owned.update(
+            {
+                GenerationJob.status: case((out_of_attempts, "failed"), else_="queued"),
+                GenerationJob.stage: case((out_of_attempts, "failed"), else_="queued"),
+                GenerationJob.finished_at: case((out_of_attempts, datetime.utcnow()), else_=None),
+                GenerationJob.lease_owner: None,
+                GenerationJob.lease_expires_at: None,
+                GenerationJob.error: error[-1000:],
+            },
+            synchronize_session=False,
+        )
+        session.commit()
+
+    def set_stage(self, session: Session, claim: JobClaim, module_ids: List[str], stage: str) -> None:
+        session.query(GenerationJob).filter(
+            GenerationJob.id.in_(claim.job_ids),
+            GenerationJob.module_id.in_(module_ids),
+            GenerationJob.lease_owner == claim.owner,
+        ).update({GenerationJob.stage: stage}, synchronize_session=False)
+
+    def active_run(self, session: Session, plan_date: date) -> str | None:
+        """Run id of the newest queued or running job for the date."""
+        row = (
+            session.query(GenerationJob.run_id)
+            .filter(GenerationJob.plan_date == plan_date, GenerationJob.status.in_(["queued", "running"]))
+            .order_by(GenerationJob.id.desc())
+            .first()
+        )
+        return row[0] if row else None
+
+    def run_progress(self, session: Session, run_id: str) -> Dict[str, Dict[str, str | None]]:
+        rows = (
+            session.query(GenerationJob.module_id, GenerationJob.status, GenerationJob.stage, GenerationJob.error)
+            .filter(GenerationJob.run_id == run_id)
+            .order_by(GenerationJob.id)
+        )
+        return {
+            module_id: {"status": status, "stage": stage, "error": error}
+            for module_id, status, stage, error in rows
+        }
+
+    def counts(self, session: Session) -> Dict[str, int]:
+        rows = session.query(GenerationJob.status, func.count(GenerationJob.id)).group_by(GenerationJob.status)
+        return {status: count for status, count in rows}
+
+
+job_queue = JobQueue(lease_seconds=settings.job_lease_seconds, max_attempts=settings.job_max_attempts)
@@ -0,0 +1,67 @@
+import json
+from typing import Any, Dict, List
+
+
+class TaskStreamParser:
+    """Pulls complete task objects out of a streamed plan JSON document.
+
+    Feed it text chunks as they arrive; every call returns the objects from the
+    top-level "tasks" array that closed within the new text. Only string and
+    nesting state is tracked, so each character is looked at once.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = -1
+        self._last_key: str | None = None
+        self._in_tasks = False
+        self._task_start = -1
+        self._pos = 0
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self._text += chunk
+        found: List[Dict[str, Any]] = []
+        text = self._text
+        for pos in range(self._pos, len(text)):
+            ch = text[pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        # a string directly inside the root object; keep it as a key candidate
+                        self._last_key = text[self._string_start + 1 : pos]
+                continue
+            if ch == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif ch in "{[":
+                self._depth += 1
+                if ch == "[" and self._depth == 2 and self._last_key == "tasks":
+                    self._in_tasks = True
+                elif ch == "{" and self._in_tasks and self._depth == 3:
+                    self._task_start = pos
+            elif ch in "}]":
+                if ch == "}" and self._in_tasks and self._depth == 3 and self._task_start >= 0:
+                    try:
+                        task = json.loads(text[self._task_start : pos + 1])
+                    except ValueError:
+                        task = None
+                    if isinstance(task, dict):
+                        found.append(task)
+                    self._task_start = -1
+                elif ch == "]" and self._in_tasks and self._depth == 2:
+                    self._in_tasks = False
+                self._depth -= 1
+        self._pos = len(text)
+        return found
@@ -1,9 +1,84 @@
-import yaml
+import hashlib
+import json
+import os
+import sys
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+import yaml
+
+from app.core.config import get_settings
 
 CONFIG_DIR = Path(__file__).resolve().parents[2] / "configs"
 EXCLUDED_STEMS = {"avatars"}
+SNAPSHOT_VERSION = 2
+
+# libyaml-backed loader is several times faster; fall back to pure Python.
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+_ITEM_KEYS: Dict[Tuple[str, str], str] = {}
+
+
+def item_key(group: str, name: str) -> str:
+    """Interned "group:name" key shared by the config index and history lookups."""
+    key = _ITEM_KEYS.get((group, name))
+    if key is None:
+        key = _ITEM_KEYS.setdefault((group, name), sys.intern(f"{group}:{name}"))
+    return key
+
+
+def format_module_label(module_id: str) -> str:
+    return module_id.replace("-", " ").replace("_", " ").title()
+
+
+class IndexedItem(NamedTuple):
+    key: str
+    name: str
+    importance: Any
+    position: int
+    item: Dict[str, Any]
+
+
+def rank_items(group: str, items: List[Dict[str, Any]]) -> List[IndexedItem]:
+    indexed = [
+        IndexedItem(item_key(group, item["name"]), item["name"], item.get("importance", 1), position, item)
+        for position, item in enumerate(items)
+    ]
+    # stable sort keeps config order between items of equal importance
+    indexed.sort(key=lambda entry: entry.importance, reverse=True)
+    return indexed
+
+
+class ConfigIndex:
+    """Lookup tables built once per config snapshot."""
+
+    def __init__(self, modules: Dict[str, List[Dict[str, Any]]]):
+        self.module_ids: List[str] = sorted(modules.keys())
+        self.module_labels: Dict[str, str] = {mid: format_module_label(mid) for mid in self.module_ids}
+        self.groups: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.items: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self.ranked: Dict[Tuple[str, str], List[IndexedItem]] = {}
+        for module_id, groups in modules.items():
+            table = self.groups.setdefault(module_id, {})
+            for group_data in groups:
+                group = group_data["group"]
+                table[group] = group_data
+                ranked = rank_items(group, group_data["items"])
+                self.ranked[(module_id, group)] = ranked
+                for entry in ranked:
+                    self.items.setdefault((module_id, group, entry.name), entry.item)
+
+    def get_item(self, module_id: str, group: str, name: str) -> Dict[str, Any] | None:
+        return self.items.get((module_id, group, name))
+
+    def has_group(self, module_id: str, group: str) -> bool:
+        return group in self.groups.get(module_id, {})
+
+    def ranked_items(self, module_id: str, group: str) -> List[IndexedItem] | None:
+        return self.ranked.get((module_id, group))
 
 
 class LoadedConfigs(list):
@@ -13,6 +88,7 @@ class LoadedConfigs(list):
         super().__init__(flat)
         self.modules = modules
         self.flat = flat
+        self.index = ConfigIndex(modules)
 
 
 def _validate_group(data: Dict[str, Any], path: Path) -> Dict[str, Any]:
@@ -26,29 +102,200 @@ def _validate_group(data: Dict[str, Any], path: Path) -> Dict[str, Any]:
     return data
 
 
-def load_configs(config_dir: Path | None = None) -> LoadedConfigs:
-    base = config_dir or CONFIG_DIR
-    configs: Dict[str, List[Dict[str, Any]]] = {}
-    flat_groups: List[Dict[str, Any]] = []
+def _discover_files(base: Path) -> List[Path]:
+    files: List[Path] = []
     seen: set[str] = set()
-    patterns = ("*.yaml", "*.yml")
-    for pattern in patterns:
+    for pattern in ("*.yaml", "*.yml"):
         for file in sorted(base.glob(pattern)):
             if file.stem in EXCLUDED_STEMS or file.stem in seen:
                 continue
             seen.add(file.stem)
-            with open(file, "r", encoding="utf-8") as f:
-                content = yaml.safe_load(f)
-                if content is None:
-                    continue
-                entries: List[Dict[str, Any]] = []
-                if isinstance(content, list):
-                    for entry in content:
-                        entries.append(_validate_group(entry, file))
-                elif isinstance(content, dict):
-                    entries.append(_validate_group(content, file))
-                if entries:
-                    configs[file.stem] = entries
-                    flat_groups.extend(entries)
-
-    return LoadedConfigs(configs, flat_groups)
+            files.append(file)
+    return files
+
+
+def _parse_entries(raw: bytes, path: Path) -> List[Dict[str, Any]]:
+    content = yaml.load(raw.decode("utf-8"), Loader=YamlLoader)
+    entries: List[Dict[str, Any]] = []
+    if isinstance(content, list):
+        for entry in content:
+            entries.append(_validate_group(entry, path))
+    elif isinstance(content, dict):
+        entries.append(_validate_group(content, path))
+    return entries
+
+
+@dataclass
+class _FileEntry:
+    signature: Tuple[int, int]
+    digest: str
+    entries: List[Dict[str, Any]]
+
+
+class ConfigRegistry:
+    """Process-wide cache of parsed module configs.
+
+    Files are keyed by (mtime_ns, size); when that changes the content hash
+    decides whether the file is actually re-parsed. Unchanged files keep their
+    parsed entries, so an edit to one module only re-parses that module.
+
+    Validated entries are persisted as a JSON snapshot in the app's cache
+    dir, keyed by the same (mtime_ns, size) signatures, so a cold worker
+    reuses them for unchanged files without reading or parsing the YAML.
+    """
+
+    def __init__(self, config_dir: Path, snapshot_path: Path):
+        self.config_dir = config_dir
+        self.snapshot_path = snapshot_path
+        self._lock = threading.Lock()
+        self._files: Dict[Path, _FileEntry] = {}
+        self._key: Tuple[Tuple[str, int, int], ...] | None = None
+        self._snapshot: LoadedConfigs | None = None
+        self._snapshot_checked = False
+        self.watched = False
+
+    def _read_snapshot(self) -> Dict[Path, _FileEntry]:
+        try:
+            data = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != SNAPSHOT_VERSION:
+            return {}
+        try:
+            return {
+                self.config_dir / name: _FileEntry(tuple(signature), digest, entries)
+                for name, (signature, digest, entries) in data.get("files", {}).items()
+                if isinstance(entries, list)
+            }
+        except (TypeError, ValueError):
+            return {}
+
+    def write_snapshot(self) -> bool:
+        data = {
+            "version": SNAPSHOT_VERSION,
+            "files": {
+                path.name: [list(entry.signature), entry.digest, entry.entries]
+                for path, entry in self._files.items()
+            },
+        }
+        try:
+            text = json.dumps(data)
+        except (TypeError, ValueError):
+            return False
+        if json.loads(text) != data:
+            # YAML values without a faithful JSON form (dates, non-string keys)
+            return False
+        tmp_path = self.snapshot_path.with_name(f"{self.snapshot_path.name}.{os.getpid()}.tmp")
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(text, encoding="utf-8")
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError:
+            # the cache dir may be read-only; the YAML path still works
+            tmp_path.unlink(missing_ok=True)
+            return False
+        return True
+
+    def _scan(self) -> List[Tuple[Path, Tuple[int, int]]]:
+        scanned: List[Tuple[Path, Tuple[int, int]]] = []
+        for file in _discover_files(self.config_dir):
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            scanned.append((file, (stat.st_mtime_ns, stat.st_size)))
+        return scanned
+
+    def _load_file(self, file: Path, signature: Tuple[int, int]) -> _FileEntry:
+        cached = self._files.get(file)
+        if cached and cached.signature == signature:
+            return cached
+        raw = file.read_bytes()
+        digest = hashlib.sha1(raw).hexdigest()
+        if cached and cached.digest == digest:
+            return _FileEntry(signature, digest, cached.entries)
+        return _FileEntry(signature, digest, _parse_entries(raw, file))
+
+    def _rebuild(self, scanned: List[Tuple[Path, Tuple[int, int]]], key: Tuple) -> LoadedConfigs:
+        if not self._snapshot_checked:
+            self._files = self._read_snapshot()
+            self._snapshot_checked = True
+        previous = self._files
+        files: Dict[Path, _FileEntry] = {}
+        configs: Dict[str, List[Dict[str, Any]]] = {}
+        flat_groups: List[Dict[str, Any]] = []
+        for file, signature in scanned:
+            entry = self._load_file(file, signature)
+            files[file] = entry
+            if entry.entries:
+                configs[file.stem] = entry.entries
+                flat_groups.extend(entry.entries)
+        stale = files.keys() != previous.keys() or any(
+            entry is not previous.get(path) for path, entry in files.items()
+        )
+        # everything above may raise; only swap once the new snapshot is complete
+        self._files = files
+        if not stale and self._snapshot is not None:
+            self._key = key
+            return self._snapshot
+        self._snapshot = LoadedConfigs(configs, flat_groups)
+        self._key = key
+        if stale:
+            self.write_snapshot()
+        return self._snapshot
+
+    def get(self) -> LoadedConfigs:
+        snapshot = self._snapshot
+        if self.watched and snapshot is not None:
+            # the watcher keeps the snapshot current; skip the stat pass
+            return snapshot
+        scanned = self._scan()
+        key = tuple((str(path), *signature) for path, signature in scanned)
+        if snapshot is not None and key == self._key:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is not None and key == self._key:
+                return self._snapshot
+            return self._rebuild(scanned, key)
+
+    def refresh(self) -> bool:
+        """Re-validate changed files; returns True when a new snapshot was swapped in.
+
+        Invalid files raise and leave the current snapshot untouched.
+        """
+        scanned = self._scan()
+        key = tuple((str(path), *signature) for path, signature in scanned)
+        with self._lock:
+            if self._snapshot is not None and key == self._key:
+                return False
+            previous = self._snapshot
+            return self._rebuild(scanned, key) is not previous
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._files = {}
+            self._key = None
+            self._snapshot = None
+            self._snapshot_checked = True
+
+
+_registries: Dict[Path, ConfigRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_config_registry(config_dir: Path | None = None) -> ConfigRegistry:
+    base = (config_dir or CONFIG_DIR).resolve()
+    registry = _registries.get(base)
+    if registry is None:
+        with _registries_lock:
+            if base not in _registries:
+                tag = hashlib.sha1(str(base).encode()).hexdigest()[:12]
+                snapshot_path = Path(get_settings().config_cache_dir) / f"configs-{tag}.json"
+                _registries[base] = ConfigRegistry(base, snapshot_path)
+            registry = _registries[base]
+    return registry
+
+
+def load_configs(config_dir: Path | None = None) -> LoadedConfigs:
+    return get_config_registry(config_dir).get()
@@ -0,0 +1,79 @@
+import time
+import uuid
+
+from sqlalchemy import and_, exists
+from sqlalchemy.orm import Session, aliased
+
+from app.models.module_stream import ModuleStream
+
+# a ticket must be redeemed this soon after the POST that issued it
+TICKET_SECONDS = 60.0
+# a stream that never reported finishing stops blocking its module after this long
+ACTIVE_SECONDS = 300.0
+
+
+class ModuleStreams:
+    """Tickets that tie each single-module regeneration stream to one POST.
+
+    The SSE endpoint only generates for an unredeemed ticket, so EventSource
+    reconnects, prefetchers and crawlers issuing GETs cannot start another
+    regeneration, and a module has at most one live stream across processes.
+    """
+
+    @staticmethod
+    def _active(now: float):
+        return and_(
+            ModuleStream.claimed_at.isnot(None),
+            ModuleStream.finished_at.is_(None),
+            ModuleStream.claimed_at >= now - ACTIVE_SECONDS,
+        )
+
+    def busy(self, session: Session, module_id: str) -> bool:
+        return (
+            session.query(ModuleStream.token)
+            .filter(ModuleStream.module_id == module_id, self._active(time.time()))
+            .first()
+            is not None
+        )
+
+    def issue(self, session: Session, module_id: str, force: bool = False) -> str:
+        """Returns a new ticket and prunes old ones; the caller commits."""
+        now = time.time()
+        session.query(ModuleStream).filter(ModuleStream.created_at < now - 86400).delete(synchronize_session=False)
+        token = uuid.uuid4().hex
+        session.add(ModuleStream(token=token, module_id=module_id, force=force, created_at=now))
+        return token
+
+    def claim(self, session: Session, token: str) -> ModuleStream | None:
+        """Redeems the ticket unless it is used, expired, or its module already has a live stream."""
+        now = time.time()
+        other = aliased(ModuleStream)
+        live = exists().where(
+            other.module_id == ModuleStream.module_id,
+            other.claimed_at.isnot(None),
+            other.finished_at.is_(None),
+            other.claimed_at >= now - ACTIVE_SECONDS,
+        )
+        claimed = (
+            session.query(ModuleStream)
+            .filter(
+                ModuleStream.token == token,
+                ModuleStream.claimed_at.is_(None),
+                ModuleStream.created_at >= now - TICKET_SECONDS,
+                ~live,
+            )
+            .update({ModuleStream.claimed_at: now}, synchronize_session=False)
+        )
+        session.commit()
+        if not claimed:
+            return None
+        return session.get(ModuleStream, token)
+
+    def finish(self, session: Session, token: str) -> None:
+        session.query(ModuleStream).filter(ModuleStream.token == token).update(
+            {ModuleStream.finished_at: time.time()}, synchronize_session=False
+        )
+        session.commit()
+
+
+module_streams = ModuleStreams()
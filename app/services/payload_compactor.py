@@ -0,0 +1,146 @@
+import json
+import threading
+from typing import Any, Dict, List, Tuple
+
+ITEM_COLUMNS = ("name", "importance", "url", "tags")
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting without a tokenizer
+    return (len(text) + 3) // 4
+
+
+def dumps_compact(payload: Dict[str, Any]) -> str:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+def table_items(group: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Items of a group in either the YAML shape or the compact column/row shape."""
+    if "rows" not in group:
+        return list(group.get("items") or [])
+    columns = group.get("columns") or []
+    return [dict(zip(columns, row)) for row in group.get("rows") or []]
+
+
+def _difficulty_stats(samples: List[Any]) -> Dict[str, Any] | None:
+    values = [v for v in samples or [] if isinstance(v, (int, float))]
+    if not values:
+        return None
+    return {
+        "n": len(values),
+        "mean": round(sum(values) / len(values), 2),
+        "min": min(values),
+        "max": max(values),
+        "last": values[0],
+    }
+
+
+class PayloadCompactor:
+    """Shrinks the per-module user payload to fit a token budget.
+
+    - items solved within `avoid_days` are dropped (the model must not pick them)
+    - item lists become column/row tables, omitting columns that are empty
+    - raw difficulty samples become fixed-size stats
+    - if still over budget, the lowest-importance rows and then the least
+      recent history entries are trimmed
+    """
+
+    def __init__(self, token_budget: int, avoid_days: int):
+        self.token_budget = token_budget
+        self.avoid_days = avoid_days
+        self.reports: Dict[str, Dict[str, Any]] = {}
+        # compact() runs on generation threads while stats() is read by /admin
+        self._lock = threading.Lock()
+
+    def _blocked(self, history: List[Dict[str, Any]]) -> set[Tuple[str, str]]:
+        blocked: set[Tuple[str, str]] = set()
+        for entry in history:
+            days = entry.get("days_since_last_solved")
+            if days is not None and days < self.avoid_days:
+                blocked.add((entry.get("group"), entry.get("name")))
+        return blocked
+
+    def _table(self, group: Dict[str, Any], blocked: set[Tuple[str, str]], limit: int | None) -> Dict[str, Any]:
+        group_name = group.get("group")
+        items = [item for item in group.get("items") or [] if (group_name, item.get("name")) not in blocked]
+        if limit is not None and len(items) > limit:
+            keep = sorted(range(len(items)), key=lambda i: items[i].get("importance", 1), reverse=True)[:limit]
+            items = [items[i] for i in sorted(keep)]
+        columns = [c for c in ITEM_COLUMNS if any(item.get(c) not in (None, "", []) for item in items)]
+        table: Dict[str, Any] = {"group": group_name, "columns": columns, "rows": [[item.get(c) for c in columns] for item in items]}
+        extra = {k: v for k, v in group.items() if k not in ("group", "items")}
+        if extra:
+            table.update(extra)
+        return table
+
+    def _history(self, history: List[Dict[str, Any]], limit: int | None) -> List[Dict[str, Any]]:
+        entries = sorted(history, key=lambda e: str(e.get("last_seen") or ""), reverse=True)
+        if limit is not None:
+            entries = entries[:limit]
+        compact: List[Dict[str, Any]] = []
+        for entry in entries:
+            row = {
+                k: v
+                for k, v in entry.items()
+                if k not in ("difficulty_samples", "difficulty_stats", "module_id") and v is not None
+            }
+            stats = entry.get("difficulty_stats") or _difficulty_stats(entry.get("difficulty_samples"))
+            if stats:
+                row.pop("average_difficulty", None)
+                row["difficulty_stats"] = stats
+            compact.append(row)
+        return compact
+
+    def compact(
+        self,
+        module_id: str,
+        base_payload: Dict[str, Any],
+        module_config: List[Dict[str, Any]],
+        history: List[Dict[str, Any]],
+        tokens_before: int,
+    ) -> Dict[str, Any]:
+        blocked = self._blocked(history)
+
+        row_limit: int | None = None
+        history_limit: int | None = None
+        largest = max((len(g.get("items") or []) for g in module_config), default=0)
+        while True:
+            payload = {
+                **base_payload,
+                "module_config": [self._table(g, blocked, row_limit) for g in module_config],
+                "history_for_module": self._history(history, history_limit),
+            }
+            after = estimate_tokens(dumps_compact(payload))
+            if after <= self.token_budget:
+                break
+            current_rows = row_limit if row_limit is not None else largest
+            if current_rows > 1:
+                row_limit = max(1, current_rows * 3 // 4)
+                continue
+            current_history = history_limit if history_limit is not None else len(history)
+            if current_history > 0:
+                history_limit = current_history // 2
+                continue
+            break
+
+        report = {
+            "tokens_before": tokens_before,
+            "tokens_after": after,
+            "dropped_recent_items": len(blocked),
+            "row_limit": row_limit,
+            "history_limit": history_limit,
+            "within_budget": after <= self.token_budget,
+        }
+        with self._lock:
+            self.reports[module_id] = report
+        return payload
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            reports = list(self.reports.values())
+        return {
+            "modules": len(reports),
+            "tokens_before": sum(r["tokens_before"] for r in reports),
+            "tokens_after": sum(r["tokens_after"] for r in reports),
+            "over_budget": sum(1 for r in reports if not r["within_budget"]),
+        }
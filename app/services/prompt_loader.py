@@ -1,27 +1,110 @@
+import hashlib
+import json
+import threading
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Tuple
 
 PROMPT_DIR = Path(__file__).resolve().parents[2] / "configs" / "prompts"
 
 
-def load_prompt_templates(base_dir: Path | None = None) -> str:
-    directory = base_dir or PROMPT_DIR
+def _prompt_files(directory: Path) -> List[Path]:
+    text_files = sorted(list(directory.glob("*.md")) + list(directory.glob("*.txt")))
+    examples_file = directory / "examples.json"
+    if examples_file.exists():
+        text_files.append(examples_file)
+    return text_files
+
+
+def _read_bundle(directory: Path) -> str:
     if not directory.exists():
         return ""
 
     parts: List[str] = []
-    text_files = sorted(list(directory.glob("*.md")) + list(directory.glob("*.txt")))
-    for file in text_files:
+    for file in _prompt_files(directory):
         try:
-            parts.append(file.read_text(encoding="utf-8"))
+            text = file.read_text(encoding="utf-8")
         except OSError:
             continue
-
-    examples_file = directory / "examples.json"
-    if examples_file.exists():
-        try:
-            parts.append("Examples:\n" + examples_file.read_text(encoding="utf-8"))
-        except OSError:
-            pass
+        parts.append("Examples:\n" + text if file.name == "examples.json" else text)
 
     return "\n\n".join(part.rstrip() for part in parts if part)
+
+
+class PromptRegistry:
+    """Caches the concatenated prompt bundle until one of its files changes."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._key: Tuple[Tuple[str, int, int], ...] | None = None
+        self._bundle: str | None = None
+        self.digest = ""
+        self.watched = False
+
+    def _scan(self) -> Tuple[Tuple[str, int, int], ...]:
+        if not self.directory.exists():
+            return ()
+        key: List[Tuple[str, int, int]] = []
+        for file in _prompt_files(self.directory):
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            key.append((file.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(key)
+
+    def _swap(self, key: Tuple[Tuple[str, int, int], ...]) -> bool:
+        bundle = _read_bundle(self.directory)
+        digest = hashlib.sha256(bundle.encode("utf-8")).hexdigest()
+        changed = digest != self.digest or self._bundle is None
+        self._key = key
+        if changed:
+            self._bundle = bundle
+            self.digest = digest
+        return changed
+
+    def get(self) -> str:
+        bundle = self._bundle
+        if self.watched and bundle is not None:
+            return bundle
+        key = self._scan()
+        if bundle is not None and key == self._key:
+            return bundle
+        with self._lock:
+            if self._bundle is None or key != self._key:
+                self._swap(key)
+            return self._bundle or ""
+
+    def _validate(self) -> None:
+        examples_file = self.directory / "examples.json"
+        if examples_file.exists():
+            try:
+                json.loads(examples_file.read_text(encoding="utf-8"))
+            except ValueError as exc:
+                raise ValueError(f"Prompt examples {examples_file.name} is not valid JSON: {exc}") from exc
+
+    def refresh(self) -> bool:
+        """Re-read changed prompt files; invalid edits raise and keep the current bundle."""
+        key = self._scan()
+        with self._lock:
+            if self._bundle is not None and key == self._key:
+                return False
+            self._validate()
+            return self._swap(key)
+
+
+_registries: Dict[Path, PromptRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_prompt_registry(base_dir: Path | None = None) -> PromptRegistry:
+    directory = (base_dir or PROMPT_DIR).resolve()
+    registry = _registries.get(directory)
+    if registry is None:
+        with _registries_lock:
+            registry = _registries.setdefault(directory, PromptRegistry(directory))
+    return registry
+
+
+def load_prompt_templates(base_dir: Path | None = None) -> str:
+    return get_prompt_registry(base_dir).get()
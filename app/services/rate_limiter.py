@@ -0,0 +1,226 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, NamedTuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.resilience import DeadlineExceeded
+from app.models.rate_limit import LLMRateBucket
+
+# never sleep less than this between attempts, so float rounding cannot spin the head of the queue
+MIN_WAIT_SECONDS = 0.005
+
+
+class Bucket(NamedTuple):
+    name: str
+    capacity: float
+    rate: float  # refill per second
+
+
+def _shortfall(bucket: Bucket, level: float, amount: float) -> float:
+    return (amount - level) / bucket.rate if level < amount else 0.0
+
+
+class LocalBucketStore:
+    """Bucket levels for this process only."""
+
+    def __init__(self):
+        self._state: Dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def _level(self, bucket: Bucket, now: float) -> float:
+        tokens, updated_at = self._state.get(bucket.name, (bucket.capacity, now))
+        return min(bucket.capacity, tokens + (now - updated_at) * bucket.rate)
+
+    def take(self, buckets: List[Bucket], amounts: List[float], now: float) -> float:
+        """Takes every amount or none; returns 0.0 on success, else the seconds until it could succeed."""
+        with self._lock:
+            levels = [self._level(bucket, now) for bucket in buckets]
+            wait = max(_shortfall(b, level, amount) for b, level, amount in zip(buckets, levels, amounts))
+            if wait > 0:
+                return wait
+            for bucket, level, amount in zip(buckets, levels, amounts):
+                self._state[bucket.name] = (level - amount, now)
+            return 0.0
+
+    def adjust(self, bucket: Bucket, delta: float, now: float) -> None:
+        with self._lock:
+            self._state[bucket.name] = (min(bucket.capacity, self._level(bucket, now) + delta), now)
+
+
+class SQLiteBucketStore:
+    """Bucket levels in a shared table, so several workers draw from one budget.
+
+    Each take is a conditional UPDATE per bucket inside one transaction; SQLite's
+    write lock makes the whole take atomic across processes. Database errors
+    fall back to the process-local store rather than blocking generation.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        self.session_factory = session_factory
+        self.local = LocalBucketStore()
+
+    def _ensure(self, session: Session, buckets: List[Bucket], now: float) -> None:
+        existing = {
+            name for (name,) in session.query(LLMRateBucket.name).filter(LLMRateBucket.name.in_([b.name for b in buckets]))
+        }
+        for bucket in buckets:
+            if bucket.name not in existing:
+                session.add(LLMRateBucket(name=bucket.name, tokens=bucket.capacity, updated_at=now))
+        if len(existing) < len(buckets):
+            session.commit()
+
+    @staticmethod
+    def _refilled(bucket: Bucket, now: float):
+        return func.min(bucket.capacity, LLMRateBucket.tokens + (now - LLMRateBucket.updated_at) * bucket.rate)
+
+    def take(self, buckets: List[Bucket], amounts: List[float], now: float) -> float:
+        session = self.session_factory()
+        try:
+            self._ensure(session, buckets, now)
+            for bucket, amount in zip(buckets, amounts):
+                refilled = self._refilled(bucket, now)
+                taken = (
+                    session.query(LLMRateBucket)
+                    .filter(LLMRateBucket.name == bucket.name, refilled >= amount)
+                    .update({LLMRateBucket.tokens: refilled - amount, LLMRateBucket.updated_at: now}, synchronize_session=False)
+                )
+                if not taken:
+                    session.rollback()
+                    return self._wait(session, buckets, amounts, now)
+            session.commit()
+            return 0.0
+        except SQLAlchemyError:
+            session.rollback()
+            return self.local.take(buckets, amounts, now)
+        finally:
+            session.close()
+
+    def _wait(self, session: Session, buckets: List[Bucket], amounts: List[float], now: float) -> float:
+        rows = {
+            row.name: row
+            for row in session.query(LLMRateBucket).filter(LLMRateBucket.name.in_([b.name for b in buckets]))
+        }
+        wait = 0.0
+        for bucket, amount in zip(buckets, amounts):
+            row = rows.get(bucket.name)
+            level = bucket.capacity if row is None else min(bucket.capacity, row.tokens + (now - row.updated_at) * bucket.rate)
+            wait = max(wait, _shortfall(bucket, level, amount))
+        return max(wait, MIN_WAIT_SECONDS)
+
+    def adjust(self, bucket: Bucket, delta: float, now: float) -> None:
+        session = self.session_factory()
+        try:
+            refilled = self._refilled(bucket, now)
+            session.query(LLMRateBucket).filter(LLMRateBucket.name == bucket.name).update(
+                {LLMRateBucket.tokens: func.min(bucket.capacity, refilled + delta), LLMRateBucket.updated_at: now},
+                synchronize_session=False,
+            )
+            session.commit()
+        except SQLAlchemyError:
+            session.rollback()
+        finally:
+            session.close()
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute token buckets with FIFO queueing.
+
+    Callers reserve one request plus their estimated tokens before calling the
+    provider and settle the estimate against the actual size afterwards. Only
+    the caller at the head of the queue may draw from the buckets, so a large
+    request cannot be starved by a stream of small ones. Store round-trips
+    (SQLite for the shared store) happen outside the condition lock.
+    """
+
+    def __init__(self, rpm: int, tpm: int, store: LocalBucketStore | SQLiteBucketStore | None = None):
+        self.buckets: List[Bucket] = []
+        if rpm > 0:
+            self.buckets.append(Bucket("requests", float(rpm), rpm / 60))
+        if tpm > 0:
+            self.buckets.append(Bucket("tokens", float(tpm), tpm / 60))
+        self.store = store or LocalBucketStore()
+        self._cond = threading.Condition()
+        self._queue: deque = deque()
+        self.acquired = 0
+        self.waited = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.buckets)
+
+    def _amounts(self, tokens: int) -> List[float]:
+        # a request bigger than the whole minute budget waits for a full bucket instead of forever
+        return [1.0 if b.name == "requests" else float(min(tokens, b.capacity)) for b in self.buckets]
+
+    def acquire(self, tokens: int, timeout: float | None = None) -> float:
+        """Blocks until the request fits; returns the seconds spent waiting.
+
+        Raises DeadlineExceeded when the wait would outlast `timeout`.
+        """
+        if not self.enabled:
+            return 0.0
+        amounts = self._amounts(tokens)
+        started = time.monotonic()
+        ticket = object()
+        with self._cond:
+            self._queue.append(ticket)
+        try:
+            while True:
+                with self._cond:
+                    head = self._queue[0] is ticket
+                # only the head draws, so the store is never called by two waiters at once
+                wait = max(self.store.take(self.buckets, amounts, time.time()), 0.0) if head else None
+                if wait == 0.0:
+                    break
+                if wait is not None:
+                    wait = max(wait, MIN_WAIT_SECONDS)
+                with self._cond:
+                    if timeout is not None:
+                        left = timeout - (time.monotonic() - started)
+                        if left <= 0 or (wait is not None and wait > left):
+                            self.timeouts += 1
+                            raise DeadlineExceeded("LLM rate limit wait exceeds the request budget")
+                        wait = left if wait is None else wait
+                    if head or self._queue[0] is not ticket:
+                        self._cond.wait(wait)
+        finally:
+            with self._cond:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+        waited = time.monotonic() - started
+        with self._cond:
+            self.acquired += 1
+            if waited >= MIN_WAIT_SECONDS:
+                self.waited += 1
+                self.wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        return waited
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Returns over-estimated tokens to the bucket, or charges the shortfall."""
+        bucket = next((b for b in self.buckets if b.name == "tokens"), None)
+        if bucket is None or estimated_tokens == actual_tokens:
+            return
+        self.store.adjust(bucket, float(estimated_tokens - actual_tokens), time.time())
+        with self._cond:
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "enabled": self.enabled,
+                "shared": isinstance(self.store, SQLiteBucketStore),
+                "acquired": self.acquired,
+                "waited": self.waited,
+                "timeouts": self.timeouts,
+                "queued": len(self._queue),
+                "wait_seconds": round(self.wait_seconds, 2),
+                "max_wait_seconds": round(self.max_wait_seconds, 2),
+            }
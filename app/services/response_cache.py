@@ -0,0 +1,100 @@
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models.llm_cache import LLMResponseCache
+
+
+class ResponseCache:
+    """SQLite-backed cache of validated LLM responses.
+
+    Keys hash the model, system prompt and user payload, so any change to the
+    prompt bundle, module config or history window produces a miss. Entries
+    expire after `ttl_seconds` and the least recently used ones are evicted
+    once more than `max_entries` are stored.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], ttl_seconds: int, max_entries: int):
+        self.session_factory = session_factory
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, user_content: str) -> str:
+        raw = json.dumps([model, system_prompt, user_content], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        session = self.session_factory()
+        try:
+            entry = session.query(LLMResponseCache).filter(LLMResponseCache.cache_key == key).first()
+            now = datetime.utcnow()
+            if entry and entry.created_at and now - entry.created_at > self.ttl:
+                session.delete(entry)
+                session.commit()
+                entry = None
+            if not entry:
+                self._count(False)
+                return None
+            entry.last_used_at = now
+            entry.hits = (entry.hits or 0) + 1
+            data = json.loads(entry.response_json)
+            session.commit()
+            self._count(True)
+            return data
+        except (SQLAlchemyError, ValueError):
+            session.rollback()
+            self._count(False)
+            return None
+        finally:
+            session.close()
+
+    def put(self, key: str, model: str, data: Dict[str, Any]) -> None:
+        session = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            entry = session.query(LLMResponseCache).filter(LLMResponseCache.cache_key == key).first()
+            if entry is None:
+                entry = LLMResponseCache(cache_key=key, model=model, hits=0)
+                session.add(entry)
+            entry.response_json = json.dumps(data, ensure_ascii=False)
+            entry.created_at = now
+            entry.last_used_at = now
+            session.flush()
+            keep = (
+                session.query(LLMResponseCache.id)
+                .order_by(LLMResponseCache.last_used_at.desc())
+                .limit(self.max_entries)
+            )
+            session.query(LLMResponseCache).filter(LLMResponseCache.id.not_in(keep.scalar_subquery())).delete(
+                synchronize_session=False
+            )
+            session.commit()
+        except SQLAlchemyError:
+            # caching is best-effort; never fail a generation because of it
+            session.rollback()
+        finally:
+            session.close()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+        }
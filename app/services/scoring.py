@@ -0,0 +1,165 @@
+import heapq
+import itertools
+import threading
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
+
+from app.services.loader import IndexedItem
+
+# below this many items per group the heap loop beats building arrays
+VECTOR_MIN_ITEMS = 64
+STATIC_CACHE_SIZE = 256
+
+
+class ItemFeatures(NamedTuple):
+    last_seen_days: int
+    success_streak: int
+    difficulty_bias: float
+
+
+NO_HISTORY = ItemFeatures(999, 0, 0.0)
+
+
+class ScoreWeights(NamedTuple):
+    """score = importance * w0 + (1 / last_seen_days) * w1 + streak * w2 + difficulty_bias * w3"""
+
+    importance: float = 2.0
+    recency: float = 1.0
+    streak: float = -1.0
+    difficulty: float = 1.0
+
+
+DEFAULT_WEIGHTS = ScoreWeights()
+
+
+def weights_from_settings(overrides: Dict[str, Any] | None) -> ScoreWeights:
+    return DEFAULT_WEIGHTS._replace(**{k: float(v) for k, v in (overrides or {}).items() if k in ScoreWeights._fields})
+
+
+def score(importance: Any, features: ItemFeatures, weights: ScoreWeights = DEFAULT_WEIGHTS) -> float:
+    # evaluated term by term in the same order as the vectorized path so both round identically
+    return (
+        importance * weights.importance
+        + (1 / features.last_seen_days) * weights.recency
+        + features.success_streak * weights.streak
+        + features.difficulty_bias * weights.difficulty
+    )
+
+
+def max_history_bonus(feature_map: Dict[str, ItemFeatures], weights: ScoreWeights) -> float:
+    """Upper bound of the non-importance part of any item's score."""
+    return max(score(0, features, weights) for features in [NO_HISTORY, *feature_map.values()])
+
+
+class GroupArrays(NamedTuple):
+    ranked: List[IndexedItem]
+    importance: Any
+    positions: Any
+    rows: Dict[str, int]
+
+
+# config-derived arrays per ranked list; index lists live as long as their config snapshot
+_group_arrays: Dict[int, GroupArrays] = {}
+_group_lock = threading.Lock()
+
+
+def group_arrays(ranked: List[IndexedItem]) -> GroupArrays:
+    with _group_lock:
+        cached = _group_arrays.get(id(ranked))
+    if cached is not None and cached.ranked is ranked:
+        return cached
+    cached = GroupArrays(
+        ranked,
+        np.array([entry.importance for entry in ranked], dtype=np.float64),
+        np.array([entry.position for entry in ranked], dtype=np.int64),
+        {entry.key: row for row, entry in enumerate(ranked)},
+    )
+    with _group_lock:
+        if len(_group_arrays) >= STATIC_CACHE_SIZE:
+            _group_arrays.clear()
+        _group_arrays[id(ranked)] = cached
+    return cached
+
+
+class TopKScorer:
+    """Picks the `target` best items of a ranked group.
+
+    Order matches a full sort on (score desc, config position asc). Large
+    groups are scored as arrays with an argpartition-style selection when
+    numpy is available; small ones (or no numpy) use a heap with early exit.
+    """
+
+    def __init__(self, weights: ScoreWeights = DEFAULT_WEIGHTS):
+        self.weights = weights
+
+    def top_items(
+        self,
+        ranked: List[IndexedItem],
+        target: int,
+        feature_map: Dict[str, ItemFeatures],
+        max_bonus: float,
+    ) -> List[Dict[str, Any]]:
+        if np is not None and len(ranked) >= VECTOR_MIN_ITEMS:
+            return self._top_vectorized(ranked, target, feature_map)
+        return self._top_heap(ranked, target, feature_map, max_bonus)
+
+    def _top_heap(
+        self,
+        ranked: List[IndexedItem],
+        target: int,
+        feature_map: Dict[str, ItemFeatures],
+        max_bonus: float,
+    ) -> List[Dict[str, Any]]:
+        # ranked is importance-descending, so with a non-negative importance weight
+        # nothing after the first item that cannot beat the current k-th best can qualify
+        can_stop = self.weights.importance >= 0
+        heap: List[Tuple[float, int, Dict[str, Any]]] = []
+        for entry in ranked:
+            if can_stop and len(heap) >= target and entry.importance * self.weights.importance + max_bonus < heap[0][0]:
+                break
+            candidate = (score(entry.importance, feature_map.get(entry.key, NO_HISTORY), self.weights), -entry.position, entry.item)
+            if len(heap) < target:
+                heapq.heappush(heap, candidate)
+            elif candidate[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, candidate)
+        heap.sort(key=lambda v: (v[0], v[1]), reverse=True)
+        return [item for _, _, item in heap]
+
+    def _top_vectorized(
+        self,
+        ranked: List[IndexedItem],
+        target: int,
+        feature_map: Dict[str, ItemFeatures],
+    ) -> List[Dict[str, Any]]:
+        arrays = group_arrays(ranked)
+        positions = arrays.positions
+        n = len(ranked)
+        # start every row at NO_HISTORY and scatter in the (usually few) items with history
+        history = np.empty((n, 3), dtype=np.float64)
+        history[:] = NO_HISTORY
+        rows = list(map(arrays.rows.get, feature_map, itertools.repeat(-1)))
+        values = np.fromiter(itertools.chain.from_iterable(feature_map.values()), np.float64, 3 * len(rows))
+        rows_array = np.array(rows, dtype=np.int64)
+        mine = rows_array >= 0
+        history[rows_array[mine]] = values.reshape(-1, 3)[mine]
+        w = self.weights
+        scores = (
+            arrays.importance * w.importance
+            + (1 / history[:, 0]) * w.recency
+            + history[:, 1] * w.streak
+            + history[:, 2] * w.difficulty
+        )
+        if target < n:
+            kth = np.partition(scores, n - target)[n - target]
+            above = np.flatnonzero(scores > kth)
+            ties = np.flatnonzero(scores == kth)
+            ties = ties[np.argsort(positions[ties], kind="stable")][: target - len(above)]
+            chosen = np.concatenate([above, ties])
+        else:
+            chosen = np.arange(n)
+        order = chosen[np.lexsort((positions[chosen], -scores[chosen]))]
+        return [ranked[i].item for i in order.tolist()]
@@ -1,12 +1,14 @@
 import random
-from collections import defaultdict
 from datetime import date, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List
 
+from sqlalchemy import Date, and_, case, func, or_, select
 from sqlalchemy.orm import Session
 
 from app.models.history import TaskHistory
 from app.core.config import get_settings
+from app.services.loader import ConfigIndex, IndexedItem, item_key, load_configs, rank_items
+from app.services.scoring import ItemFeatures, ScoreWeights, TopKScorer, max_history_bonus, weights_from_settings
 
 
 TaskPlan = Dict[str, Any]
@@ -14,44 +16,70 @@ settings = get_settings()
 
 
 class FallbackSelector:
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, index: ConfigIndex | None = None, weights: ScoreWeights | None = None):
         self.session = session
-
-    def _history_lookup(self) -> Dict[str, List[TaskHistory]]:
-        records: Dict[str, List[TaskHistory]] = defaultdict(list)
-        rows = self.session.query(TaskHistory).order_by(TaskHistory.timestamp.desc()).all()
-        for row in rows:
-            key = f"{row.group}:{row.name}"
-            records[key].append(row)
-        return records
-
-    def _score_item(self, item: Dict[str, Any], group: str, history_map: Dict[str, List[TaskHistory]]) -> float:
-        key = f"{group}:{item['name']}"
-        records = history_map.get(key, [])
-        last_seen_days = 999
-        success_streak = 0
-        difficulty_bias = 0.0
-
-        if records:
-            delta = date.today() - records[0].date
-            last_seen_days = max(delta.days, 1)
-            # compute streak of completions
-            for record in records:
-                if record.completed:
-                    success_streak += 1
-                else:
-                    break
-            difficulties = [r.difficulty for r in records if r.difficulty]
-            if difficulties:
-                avg_diff = sum(difficulties) / len(difficulties)
-                difficulty_bias = (avg_diff - 3) * 0.5
-
-        importance = item.get("importance", 1)
-        score = importance * 2 + (1 / last_seen_days) - success_streak + difficulty_bias
-        return score
-
-    def generate(self, groups: List[Dict[str, Any]]) -> List[TaskPlan]:
-        history_map = self._history_lookup()
+        self.index = index
+        self.weights = weights or weights_from_settings(settings.fallback_score_weights)
+        self.scorer = TopKScorer(self.weights)
+
+    def _feature_map(self, group_names: List[str]) -> Dict[str, ItemFeatures]:
+        """Per-item features from one aggregate query over the history window.
+
+        Only the needed columns are read. The streak counts completions after
+        the item's latest non-completion, found with a window function.
+        """
+        today = date.today()
+        since = today - timedelta(days=settings.fallback_history_days)
+        last_miss = (
+            func.max(case((TaskHistory.completed.is_(True), None), else_=TaskHistory.timestamp))
+            .over(partition_by=(TaskHistory.group, TaskHistory.name))
+            .label("last_miss")
+        )
+        windowed = (
+            select(
+                TaskHistory.group,
+                TaskHistory.name,
+                TaskHistory.date,
+                TaskHistory.timestamp,
+                TaskHistory.completed,
+                TaskHistory.difficulty,
+                last_miss,
+            )
+            .where(TaskHistory.date >= since, TaskHistory.group.in_(group_names))
+            .subquery()
+        )
+        streak_row = and_(
+            windowed.c.completed.is_(True),
+            or_(windowed.c.last_miss.is_(None), windowed.c.timestamp > windowed.c.last_miss),
+        )
+        rows = self.session.execute(
+            select(
+                windowed.c.group,
+                windowed.c.name,
+                func.max(windowed.c.date, type_=Date),
+                func.sum(case((streak_row, 1), else_=0)),
+                func.avg(func.nullif(windowed.c.difficulty, 0)),
+            ).group_by(windowed.c.group, windowed.c.name)
+        )
+        features: Dict[str, ItemFeatures] = {}
+        for group_name, name, last_seen, streak, avg_difficulty in rows:
+            difficulty_bias = (avg_difficulty - 3) * 0.5 if avg_difficulty is not None else 0.0
+            features[item_key(group_name, name)] = ItemFeatures(
+                max((today - last_seen).days, 1), int(streak or 0), difficulty_bias
+            )
+        return features
+
+    def _ranked(self, module_id: str | None, group_data: Dict[str, Any]) -> List[IndexedItem]:
+        group_name = group_data.get("group", "Unknown")
+        if self.index is not None and module_id:
+            # only trust the index for the exact group object it was built from
+            if self.index.groups.get(module_id, {}).get(group_name) is group_data:
+                return self.index.ranked_items(module_id, group_name)
+        return rank_items(group_name, group_data.get("items", []))
+
+    def generate(self, groups: List[Dict[str, Any]], module_id: str | None = None) -> List[TaskPlan]:
+        feature_map = self._feature_map([g.get("group", "Unknown") for g in groups if g.get("items")])
+        max_bonus = max_history_bonus(feature_map, self.weights)
         plan: List[TaskPlan] = []
 
         pick_counts = {k.lower(): v for k, v in settings.task_limits.items()}
@@ -63,14 +91,12 @@ class FallbackSelector:
                 continue
             key = group_name.lower()
             target = pick_counts.get(key, 1)
-            scored = [
-                (self._score_item(item, group_name, history_map), item)
-                for item in items
-            ]
-            scored.sort(key=lambda v: v[0], reverse=True)
-
-            chosen = scored[:target]
-            for _, item in chosen:
+            if target <= 0:
+                chosen: List[Dict[str, Any]] = []
+            else:
+                ranked = self._ranked(module_id, group_data)
+                chosen = self.scorer.top_items(ranked, target, feature_map, max_bonus)
+            for item in chosen:
                 plan.append({
                     "name": item.get("name"),
                     "group": group_name,
@@ -91,5 +117,10 @@ class FallbackSelector:
         return plan
 
 
-def select_with_fallback(session: Session, groups: List[Dict[str, Any]]) -> List[TaskPlan]:
-    return FallbackSelector(session).generate(groups)
+def select_with_fallback(
+    session: Session,
+    groups: List[Dict[str, Any]],
+    module_id: str | None = None,
+) -> List[TaskPlan]:
+    index = load_configs().index if module_id else None
+    return FallbackSelector(session, index).generate(groups, module_id)
@@ -0,0 +1,135 @@
+import hashlib
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+from app.core.config import get_settings
+
+# runs inside the child: apply limits, then execute the template as __main__ (which calls run_tests())
+RUNNER = """
+import runpy, sys
+try:
+    import resource
+except ImportError:
+    resource = None
+if resource is not None:
+    cpu, memory = int(sys.argv[2]), int(sys.argv[3])
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (1 << 20, 1 << 20))
+    # no forking: a template has no reason to start processes (not enforced for root)
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+runpy.run_path(sys.argv[1], run_name="__main__")
+"""
+ERROR_TAIL_CHARS = 600
+CACHE_SIZE = 512
+
+settings = get_settings()
+
+
+def _kill_group(proc: subprocess.Popen) -> None:
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    else:
+        proc.kill()
+
+
+class TemplateCheck(NamedTuple):
+    ok: bool
+    error: str | None = None
+
+
+class TemplateSandbox:
+    """Compiles and runs generated code templates in separate interpreters.
+
+    Each template runs in its own `python -I` subprocess and process group
+    with CPU, address space, file size and process count limits plus a
+    wall-clock timeout, after which the whole group is killed; up to
+    `max_workers` run at once. Results are cached by template hash.
+
+    This catches broken or runaway templates; it is not a security boundary.
+    The code runs as the app user with its network and filesystem access, so
+    run the app as an unprivileged user (or in a container) if that matters.
+    """
+
+    def __init__(self, max_workers: int = 4, timeout: float = 5.0, cpu_seconds: int = 3, memory_mb: int = 512):
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_mb * 1024 * 1024
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="template-sandbox")
+        self._cache: Dict[str, TemplateCheck] = {}
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.failed = 0
+
+    def _run(self, code: str) -> TemplateCheck:
+        try:
+            compile(code, "<template>", "exec")
+        except (SyntaxError, ValueError) as exc:
+            return TemplateCheck(False, f"SyntaxError: {exc}")
+        with tempfile.TemporaryDirectory(prefix="template-") as workdir:
+            path = Path(workdir) / "template.py"
+            path.write_text(code, encoding="utf-8")
+            # a file, not a pipe: a leftover grandchild holding a pipe open would stall the read
+            with open(Path(workdir) / "stderr.txt", "w+", encoding="utf-8", errors="replace") as stderr_file:
+                proc = subprocess.Popen(
+                    [sys.executable, "-I", "-B", "-c", RUNNER, str(path), str(self.cpu_seconds), str(self.memory_bytes)],
+                    cwd=workdir,
+                    env={},
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=stderr_file,
+                    start_new_session=True,
+                )
+                try:
+                    proc.wait(timeout=self.timeout)
+                except subprocess.TimeoutExpired:
+                    return TemplateCheck(False, f"Timed out after {self.timeout:.0f}s")
+                finally:
+                    # the template's whole process group dies with it, grandchildren included
+                    _kill_group(proc)
+                    proc.wait()
+                stderr_file.seek(0)
+                stderr = stderr_file.read()
+        if proc.returncode < 0:
+            return TemplateCheck(False, f"Killed by signal {-proc.returncode} (CPU or memory limit)")
+        if proc.returncode != 0:
+            return TemplateCheck(False, (stderr or f"exit status {proc.returncode}")[-ERROR_TAIL_CHARS:])
+        return TemplateCheck(True)
+
+    def check(self, code: str) -> TemplateCheck:
+        key = hashlib.sha1(code.encode("utf-8")).hexdigest()
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        result = self._run(code)
+        with self._lock:
+            if len(self._cache) >= CACHE_SIZE:
+                self._cache.clear()
+            self._cache[key] = result
+            self.checked += 1
+            if not result.ok:
+                self.failed += 1
+        return result
+
+    def check_many(self, codes: List[str]) -> List[TemplateCheck]:
+        """Checks all templates concurrently; results are in input order."""
+        return list(self._pool.map(self.check, codes))
+
+
+template_sandbox = TemplateSandbox(
+    max_workers=settings.template_workers,
+    timeout=settings.template_timeout_seconds,
+    cpu_seconds=settings.template_cpu_seconds,
+    memory_mb=settings.template_memory_mb,
+)
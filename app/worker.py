@@ -0,0 +1,51 @@
+"""Standalone generation worker: `python -m app.worker`.
+
+Runs the daily/next-day cron triggers and works the generation job queue, so
+web processes can run with JOB_WORKER_EMBEDDED=false and any number of
+uvicorn workers without generating the plan themselves.
+"""
+import signal
+
+from app.core.config import get_settings
+from app.core.database import Base, SessionLocal, add_missing_columns, engine
+from app.core.job_worker import job_worker
+from app.core.scheduler import queue_daily_plan, scheduler, start_scheduler
+from app.models.task import TodayTask  # noqa: F401 - ensure table creation
+from app.models.history import TaskHistory  # noqa: F401 - ensure table creation
+from app.models.daily_summary import DailySummary  # noqa: F401 - ensure table creation
+from app.models.llm_cache import LLMResponseCache  # noqa: F401 - ensure table creation
+from app.models.rate_limit import LLMRateBucket  # noqa: F401 - ensure table creation
+from app.models.plan_stage import PlanStage  # noqa: F401 - ensure table creation
+from app.models.item_stats import TaskItemStats  # noqa: F401 - ensure table creation
+from app.models.job import GenerationJob  # noqa: F401 - ensure table creation
+from app.services.config_watcher import config_watcher
+from app.services.item_stats import ensure_item_stats
+
+settings = get_settings()
+
+
+def main() -> None:
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    if settings.config_watch:
+        config_watcher.start()
+    session = SessionLocal()
+    try:
+        ensure_item_stats(session)
+        queue_daily_plan(session)
+    finally:
+        session.close()
+    start_scheduler(SessionLocal)
+    signal.signal(signal.SIGTERM, lambda *_: job_worker.stop())
+    try:
+        job_worker.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if scheduler.running:
+            scheduler.shutdown(wait=False)
+        config_watcher.stop()
+
+
+if __name__ == "__main__":
+    main()
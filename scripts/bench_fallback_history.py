@@ -0,0 +1,100 @@
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.history import TaskHistory
+from app.services.loader import load_configs
+from app.services.selector import FallbackSelector
+
+BATCH_ROWS = 50_000
+
+
+def add_history(session, items, start: int, stop: int, per_day: int, blob: str, rng: random.Random) -> None:
+    # row n is n / per_day days old, so growing the table only adds older history
+    now = datetime.utcnow()
+    for offset in range(start, stop, BATCH_ROWS):
+        rows = []
+        for n in range(offset, min(stop, offset + BATCH_ROWS)):
+            module_id, group, name = rng.choice(items)
+            timestamp = now - timedelta(minutes=n * 24 * 60 / per_day)
+            rows.append(
+                {
+                    "date": timestamp.date(),
+                    "timestamp": timestamp,
+                    "module_id": module_id,
+                    "group": group,
+                    "name": name,
+                    "task_type": "coding",
+                    "problem_text": blob,
+                    "code_template": blob,
+                    "completed": rng.random() < 0.7,
+                    "difficulty": rng.randint(1, 5),
+                }
+            )
+        session.execute(insert(TaskHistory), rows)
+    session.commit()
+
+
+def measure(session, modules, index, legacy: bool):
+    tracemalloc.start()
+    started = time.perf_counter()
+    if legacy:
+        # what the selector used to do: every row, every column, as ORM objects
+        session.query(TaskHistory).order_by(TaskHistory.timestamp.desc()).all()
+    else:
+        for module_id, groups in modules.items():
+            FallbackSelector(session, index).generate(groups, module_id)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    session.expunge_all()
+    return elapsed * 1000, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fallback selector cost as task_history grows.")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma-separated history row counts")
+    parser.add_argument("--per-day", type=int, default=100, help="history rows per day")
+    parser.add_argument("--blob-bytes", type=int, default=1500, help="size of problem_text/code_template")
+    parser.add_argument("--legacy-max", type=int, default=100000, help="largest size to also time the full-table load at")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    loaded = load_configs()
+    items = [
+        (module_id, group["group"], item["name"])
+        for module_id, groups in loaded.modules.items()
+        for group in groups
+        for item in group["items"]
+    ]
+    rng = random.Random(args.seed)
+    blob = "x" * args.blob_bytes
+
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_engine(f"sqlite:///{Path(workdir) / 'bench.sqlite'}")
+        Base.metadata.create_all(bind=engine, tables=[TaskHistory.__table__])
+        session = sessionmaker(bind=engine)()
+        rows = 0
+        for size in sorted(int(s) for s in args.sizes.split(",")):
+            add_history(session, items, rows, size, args.per_day, blob, rng)
+            rows = size
+            measure(session, loaded.modules, loaded.index, legacy=False)  # warm the page cache
+            ms, mb = measure(session, loaded.modules, loaded.index, legacy=False)
+            line = f"rows={size:>9} fallback_all_modules={ms:8.1f}ms peak={mb:6.2f}MB"
+            if size <= args.legacy_max:
+                legacy_ms, legacy_mb = measure(session, loaded.modules, loaded.index, legacy=True)
+                line += f" | full_table_load={legacy_ms:8.1f}ms peak={legacy_mb:7.2f}MB"
+            print(line)
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
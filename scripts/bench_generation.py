@@ -0,0 +1,92 @@
+import argparse
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from app.core.ai_selector import AISelector
+from app.core.llm_backends import ReplayBackend, SyntheticBackend
+from app.services.loader import load_configs
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline generation benchmark against a local LLM stand-in.")
+    parser.add_argument("--runs", type=int, default=20, help="generations per module")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--sigma", type=float, default=0.5)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--invalid-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--replay", help="JSONL recording to replay instead of synthetic plans")
+    parser.add_argument("--profiles", help='per-model overrides as JSON, e.g. \'{"gpt-4.1": {"latency_ms": 1500}}\'')
+    parser.add_argument("--hedge-percentile", type=float, help="override LLM_HEDGE_PERCENTILE (0 disables)")
+    args = parser.parse_args()
+
+    synthetic = SyntheticBackend(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.sigma,
+        failure_rate=args.failure_rate,
+        invalid_rate=args.invalid_rate,
+        seed=args.seed,
+        profiles=json.loads(args.profiles) if args.profiles else None,
+    )
+    ai = AISelector()
+    if args.hedge_percentile is not None:
+        ai.routing.default = ai.routing.default._replace(hedge_percentile=args.hedge_percentile or None)
+    ai.backend = ReplayBackend(Path(args.replay), fallback=synthetic) if args.replay else synthetic
+    ai.settings.use_ai = True
+    ai.settings.llm_cache_enabled = False
+
+    modules = load_configs().modules
+    jobs = [(module_id, config) for module_id, config in modules.items() for _ in range(args.runs)]
+
+    def run(job):
+        module_id, config = job
+        started = time.perf_counter()
+        try:
+            ai.generate_for_module(module_id, config, [], use_cache=False)
+            ok = True
+        except Exception:
+            ok = False
+        return module_id, ok, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(run, jobs))
+    elapsed = time.perf_counter() - started
+
+    latencies = [ms for _, ok, ms in results if ok]
+    failures = sum(1 for _, ok, _ in results if not ok)
+    print(f"backend={ai.backend.name} jobs={len(jobs)} failures={failures} wall={elapsed:.2f}s")
+    print(f"throughput={len(jobs) / elapsed:.2f} generations/s")
+    if latencies:
+        print(
+            f"latency_ms p50={percentile(latencies, 50):.1f} p95={percentile(latencies, 95):.1f} "
+            f"p99={percentile(latencies, 99):.1f} mean={statistics.mean(latencies):.1f}"
+        )
+    limiter = ai.rate_limiter.stats()
+    if limiter["enabled"]:
+        print(
+            f"rate_limit waited={limiter['waited']}/{limiter['acquired']} wait_total={limiter['wait_seconds']}s "
+            f"max_wait={limiter['max_wait_seconds']}s timeouts={limiter['timeouts']}"
+        )
+    for model, stats in ai.routing.stats.snapshot().items():
+        print(
+            f"model={model} calls={stats['calls']} valid={stats['valid']} invalid={stats['invalid']} "
+            f"failed={stats['failed']} hedges={stats['hedges']} hedge_wins={stats['hedge_wins']} "
+            f"p50={stats['p50_ms'] or 0:.1f}ms p95={stats['p95_ms'] or 0:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+from app.services.loader import get_config_registry
+
+
+def main():
+    registry = get_config_registry()
+    registry.invalidate()
+    loaded = registry.get()
+    if not registry.write_snapshot():
+        raise SystemExit(f"Could not write snapshot to {registry.snapshot_path}")
+    print(f"Wrote {registry.snapshot_path} ({len(loaded.modules)} modules, {len(loaded.flat)} groups)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+from app.core.database import Base, SessionLocal, engine
+from app.models.item_stats import TaskItemStats  # noqa: F401 - ensure table creation
+from app.services.item_stats import rebuild_item_stats
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        count = rebuild_item_stats(session)
+    finally:
+        session.close()
+    print(f"Rebuilt task_item_stats from task_history ({count} items)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import os
+import tempfile
+
+# settings are read once at import, so the test environment must be in place first
+_db_dir = tempfile.mkdtemp(prefix="ai-coach-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.sqlite')}"
+os.environ["LLM_BACKEND"] = "synthetic"
+os.environ["SYNTHETIC_LATENCY_MS"] = "0"
+os.environ["CONFIG_WATCH"] = "false"
+
+from app.core.database import Base, engine  # noqa: E402
+from app.models import (  # noqa: E402,F401
+    daily_summary,
+    history,
+    item_stats,
+    job,
+    llm_cache,
+    module_stream,
+    plan_stage,
+    rate_limit,
+    task,
+)
+
+Base.metadata.create_all(bind=engine)
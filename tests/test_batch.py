@@ -0,0 +1,79 @@
+import json
+from datetime import date
+
+from app.core import scheduler
+from app.core.batch_backends import LocalBatchBackend, batch_line, write_batch_file
+from app.core.database import SessionLocal
+from app.core.llm_backends import SyntheticBackend
+from app.core.resilience import Deadline
+from app.services.loader import load_configs
+
+PLAN_DATE = date(2026, 1, 5)
+
+
+def test_local_batch_round_trip(tmp_path):
+    backend = LocalBatchBackend(tmp_path / "batches", SyntheticBackend(latency_ms=0, profiles={"down": {"failure_rate": 1.0}}))
+    messages = [{"role": "user", "content": json.dumps({"module_id": "habits", "module_config": []})}]
+    input_path = write_batch_file(
+        tmp_path / "input.jsonl",
+        [batch_line("habits", "up", messages), batch_line("dsa", "down", messages)],
+    )
+    results = backend.run(input_path, poll_seconds=0, deadline=Deadline(5))
+    assert set(results) == {"habits", "dsa"}
+    assert json.loads(results["habits"])["summary_notes"]
+    assert isinstance(results["dsa"], Exception)
+
+
+class _DroppingBatchBackend(LocalBatchBackend):
+    """Loses one module's answer, like a batch line that never came back."""
+
+    def __init__(self, directory, backend, dropped):
+        super().__init__(directory, backend)
+        self.dropped = dropped
+        self.submitted = 0
+
+    def submit(self, input_path):
+        self.submitted += 1
+        return super().submit(input_path)
+
+    def results(self, batch_id):
+        results = super().results(batch_id)
+        results.pop(self.dropped, None)
+        return results
+
+
+def test_batch_run_falls_back_to_interactive_calls_for_missing_modules(tmp_path, monkeypatch):
+    modules = load_configs().modules
+    dropped = sorted(modules)[0]
+    batch_backend = _DroppingBatchBackend(tmp_path / "batches", SyntheticBackend(latency_ms=0), dropped)
+    monkeypatch.setattr(scheduler.ai_selector, "batch_backend", batch_backend)
+    monkeypatch.setattr(scheduler.settings, "llm_batch_dir", str(tmp_path / "inputs"))
+    monkeypatch.setattr(scheduler.settings, "llm_batch_poll_seconds", 0)
+    monkeypatch.setattr(scheduler.settings, "template_validation", False)
+    interactive = []
+    generate_for_module = scheduler.ai_selector.generate_for_module
+
+    def counting(module_id, *args, **kwargs):
+        interactive.append(module_id)
+        return generate_for_module(module_id, *args, **kwargs)
+
+    monkeypatch.setattr(scheduler.ai_selector, "generate_for_module", counting)
+    delivered = []
+    session = SessionLocal()
+    try:
+        results = scheduler.generate_all_module_tasks_batch(
+            session,
+            dict(modules),
+            history_window_days=7,
+            force=True,
+            plan_date=PLAN_DATE,
+            on_result=lambda module_id, _result: delivered.append(module_id),
+        )
+    finally:
+        session.close()
+    assert batch_backend.submitted == 1
+    assert interactive == [dropped]
+    assert set(results) == set(modules)
+    assert sorted(delivered) == sorted(modules) and delivered[-1] == dropped
+    batch_input = next((tmp_path / "inputs").glob("*.jsonl")).read_text(encoding="utf-8").splitlines()
+    assert sorted(json.loads(line)["custom_id"] for line in batch_input) == sorted(modules)
@@ -0,0 +1,71 @@
+import random
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List
+
+from app.core.database import SessionLocal
+from app.models.history import TaskHistory
+from app.services.loader import item_key
+from app.services.scoring import ItemFeatures
+from app.services.selector import FallbackSelector, settings
+
+GROUPS = ["Fundamentals", "Graphs"]
+NAMES = ["a", "b", "c", "d", "e"]
+
+
+def _python_features(rows: List[TaskHistory]) -> Dict[str, ItemFeatures]:
+    """The selector's original per-item scoring over fully loaded history rows."""
+    records: Dict[str, List[TaskHistory]] = {}
+    for row in sorted(rows, key=lambda r: r.timestamp, reverse=True):
+        records.setdefault(item_key(row.group, row.name), []).append(row)
+    features = {}
+    for key, item_rows in records.items():
+        last_seen_days = max((date.today() - item_rows[0].date).days, 1)
+        success_streak = 0
+        for record in item_rows:
+            if not record.completed:
+                break
+            success_streak += 1
+        difficulties = [r.difficulty for r in item_rows if r.difficulty]
+        difficulty_bias = (sum(difficulties) / len(difficulties) - 3) * 0.5 if difficulties else 0.0
+        features[key] = ItemFeatures(last_seen_days, success_streak, difficulty_bias)
+    return features
+
+
+def test_sql_features_match_the_python_scoring():
+    rng = random.Random(19)
+    session = SessionLocal()
+    try:
+        session.query(TaskHistory).delete()
+        rows = []
+        for i in range(300):
+            day = date.today() - timedelta(days=rng.randint(0, 60))
+            rows.append(
+                TaskHistory(
+                    module_id="dsa",
+                    group=rng.choice(GROUPS),
+                    name=rng.choice(NAMES),
+                    date=day,
+                    timestamp=datetime.combine(day, time()) + timedelta(seconds=i),
+                    completed=rng.random() < 0.8,
+                    difficulty=rng.choice([None, 0, 1, 2, 3, 4, 5]),
+                )
+            )
+        # outside the window: must not count towards anything
+        old_day = date.today() - timedelta(days=settings.fallback_history_days + 1)
+        old = TaskHistory(module_id="dsa", group="Graphs", name="old", date=old_day, timestamp=datetime.combine(old_day, time()))
+        session.add_all(rows + [old])
+        session.commit()
+
+        features = FallbackSelector(session)._feature_map(GROUPS)
+        expected = _python_features(rows)
+        assert features.keys() == expected.keys()
+        for key, value in expected.items():
+            assert features[key][:2] == value[:2], key
+            assert abs(features[key].difficulty_bias - value.difficulty_bias) < 1e-9, key
+        assert FallbackSelector(session)._feature_map(["Graphs"]).keys() == {
+            key for key in expected if key.startswith("Graphs:")
+        }
+    finally:
+        session.query(TaskHistory).delete()
+        session.commit()
+        session.close()
@@ -0,0 +1,95 @@
+import copy
+from datetime import date, timedelta
+
+import pytest
+
+from app.core import scheduler
+from app.core.database import SessionLocal
+from app.models.daily_summary import DailySummary
+from app.models.job import GenerationJob
+from app.models.task import TodayTask
+from app.services.job_queue import job_queue
+from app.services.loader import load_configs
+
+
+def _reset(session):
+    for model in (TodayTask, DailySummary, GenerationJob):
+        session.query(model).delete()
+    session.commit()
+
+
+def _stages(session):
+    session.expire_all()
+    return {job.module_id: job.stage for job in session.query(GenerationJob)}
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(scheduler.settings, "template_validation", False)
+    session = SessionLocal()
+    _reset(session)
+    yield session
+    _reset(session)
+    session.close()
+
+
+@pytest.fixture
+def generated(monkeypatch):
+    calls = []
+    generate_for_module = scheduler.ai_selector.generate_for_module
+
+    def counting(module_id, *args, **kwargs):
+        calls.append(module_id)
+        return generate_for_module(module_id, *args, **kwargs)
+
+    monkeypatch.setattr(scheduler.ai_selector, "generate_for_module", counting)
+    return calls
+
+
+def _run(session, force=False):
+    job_queue.enqueue(session, date.today(), list(load_configs().modules), force=force, redo=True)
+    session.commit()
+    scheduler.run_generation_jobs(session, job_queue.claim(session))
+
+
+def test_unchanged_modules_are_not_regenerated(session, generated):
+    modules = sorted(load_configs().modules)
+    _run(session)
+    assert sorted(generated) == modules
+    assert all(fingerprint for (fingerprint,) in session.query(DailySummary.fingerprint))
+
+    generated.clear()
+    _run(session)
+    assert generated == []
+    assert set(_stages(session).values()) == {"unchanged"}
+
+    changed = modules[0]
+    session.query(DailySummary).filter(DailySummary.module_id == changed).update({"fingerprint": "other inputs"})
+    session.commit()
+    _run(session)
+    assert generated == [changed]
+    assert _stages(session)[changed] == "persisted"
+
+    generated.clear()
+    _run(session, force=True)
+    assert sorted(generated) == modules
+
+
+def test_fingerprint_tracks_config_and_date(session):
+    module_id, module_config = next(iter(load_configs().modules.items()))
+    today = date.today()
+    fingerprint = scheduler.module_fingerprint(session, module_id, module_config, today)
+    assert scheduler.module_fingerprint(session, module_id, module_config, today) == fingerprint
+    assert scheduler.module_fingerprint(session, module_id, module_config, today + timedelta(days=1)) != fingerprint
+    edited = copy.deepcopy(module_config)
+    edited[0]["items"][0]["importance"] = 99
+    assert scheduler.module_fingerprint(session, module_id, edited, today) != fingerprint
+
+
+def test_fallback_plans_are_stored_without_a_fingerprint(session):
+    module_id, module_config = next(iter(load_configs().modules.items()))
+    result = scheduler._fallback_module_tasks(session, module_id, module_config)
+    scheduler.replace_module_plan(session, module_id, result, date.today(), fingerprint="abc")
+    session.commit()
+    summary = session.query(DailySummary).filter(DailySummary.module_id == module_id).one()
+    assert summary.fingerprint is None
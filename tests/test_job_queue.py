@@ -0,0 +1,107 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.job import GenerationJob
+from app.services.job_queue import JobQueue
+
+PLAN_DATE = date(2026, 1, 5)
+MODULES = ["dsa", "leetcode"]
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'queue.sqlite'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine, tables=[GenerationJob.__table__])
+    session = sessionmaker(bind=engine, autoflush=False)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _jobs(session):
+    session.expire_all()
+    return {job.module_id: job for job in session.query(GenerationJob)}
+
+
+def _expire_leases(session):
+    session.query(GenerationJob).update({GenerationJob.lease_expires_at: 0.0}, synchronize_session=False)
+    session.commit()
+
+
+def test_duplicate_enqueue_is_a_noop(session):
+    queue = JobQueue()
+    run_id = queue.enqueue(session, PLAN_DATE, MODULES)
+    session.commit()
+    queue.enqueue(session, PLAN_DATE, MODULES)
+    session.commit()
+    jobs = _jobs(session)
+    assert sorted(jobs) == MODULES
+    assert {job.run_id for job in jobs.values()} == {run_id}
+
+    claim = queue.claim(session)
+    queue.enqueue(session, PLAN_DATE, MODULES, redo=True)
+    session.commit()
+    jobs = _jobs(session)
+    assert {job.status for job in jobs.values()} == {"running"}
+    assert {job.lease_owner for job in jobs.values()} == {claim.owner}
+
+
+def test_expired_lease_is_taken_over_and_old_owner_writes_nothing(session):
+    queue = JobQueue(lease_seconds=60)
+    queue.enqueue(session, PLAN_DATE, MODULES)
+    session.commit()
+    first = queue.claim(session)
+    assert sorted(first.module_ids) == MODULES
+    assert queue.claim(session) is None
+
+    _expire_leases(session)
+    second = queue.claim(session)
+    assert second.owner != first.owner
+    assert sorted(second.job_ids) == sorted(first.job_ids)
+
+    assert queue.finish(session, first) == []
+    session.commit()
+    assert not queue.renew(session, first)
+    queue.release(session, first, "late failure")
+    jobs = _jobs(session)
+    assert {job.status for job in jobs.values()} == {"running"}
+    assert {job.lease_owner for job in jobs.values()} == {second.owner}
+    assert {job.attempts for job in jobs.values()} == {2}
+
+    assert sorted(queue.finish(session, second)) == MODULES
+    session.commit()
+    assert {job.status for job in _jobs(session).values()} == {"done"}
+
+
+def test_release_respects_max_attempts(session):
+    queue = JobQueue(max_attempts=2)
+    queue.enqueue(session, PLAN_DATE, MODULES)
+    session.commit()
+
+    queue.release(session, queue.claim(session), "first failure")
+    jobs = _jobs(session)
+    assert {job.status for job in jobs.values()} == {"queued"}
+    assert {job.attempts for job in jobs.values()} == {1}
+
+    queue.release(session, queue.claim(session), "second failure")
+    jobs = _jobs(session)
+    assert {job.status for job in jobs.values()} == {"failed"}
+    assert all(job.finished_at is not None for job in jobs.values())
+    assert {job.error for job in jobs.values()} == {"second failure"}
+    assert queue.claim(session) is None
+
+
+def test_expired_lease_on_last_attempt_fails_the_job(session):
+    queue = JobQueue(max_attempts=1)
+    queue.enqueue(session, PLAN_DATE, MODULES)
+    session.commit()
+    queue.claim(session)
+    _expire_leases(session)
+    assert queue.claim(session) is None
+    jobs = _jobs(session)
+    assert {job.status for job in jobs.values()} == {"failed"}
+    assert {job.error for job in jobs.values()} == {"Lease expired"}
@@ -0,0 +1,31 @@
+from app.core.ai_selector import SystemPromptCompiler
+from app.services.prompt_loader import PromptRegistry
+
+
+def _compiler(tmp_path, text="Be concise."):
+    (tmp_path / "system.md").write_text(text, encoding="utf-8")
+    return SystemPromptCompiler(PromptRegistry(tmp_path), shared_context="User settings: {}")
+
+
+def test_modules_share_a_byte_stable_prefix(tmp_path):
+    compiler = _compiler(tmp_path)
+    dsa = compiler.build("dsa")
+    habits = compiler.build("habits", "Daily Habits")
+    assert dsa.startswith(compiler.prefix + "\n\n")
+    assert habits.startswith(compiler.prefix + "\n\n")
+    assert "(dsa)" in dsa and "Daily Habits (habits)" in habits
+    assert "dsa" not in compiler.prefix
+    # memoized: the same string object comes back until the bundle changes
+    assert compiler.build("dsa") is dsa
+    assert SystemPromptCompiler(PromptRegistry(tmp_path), "User settings: {}").build("dsa") == dsa
+
+
+def test_prompt_edit_rebuilds_the_prefix(tmp_path):
+    compiler = _compiler(tmp_path)
+    before = compiler.build("dsa")
+    prefix_hash = compiler.prefix_hash
+    (tmp_path / "system.md").write_text("Be concise and kind.", encoding="utf-8")
+    after = compiler.build("dsa")
+    assert compiler.prefix_hash != prefix_hash
+    assert after != before and "Be concise and kind." in after
+    assert set(compiler.stats()["module_tokens"]) == {"dsa"}
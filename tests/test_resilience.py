@@ -0,0 +1,39 @@
+from app.core.ai_selector import AISelector
+from app.core.llm_backends import BackendError
+from app.core.resilience import CircuitBreaker, is_transport_error
+from app.services.loader import load_configs
+
+
+def _half_open_due(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker.opened_at -= breaker.reset_seconds + 1
+
+
+def test_cancel_probe_frees_the_half_open_slot():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+    _half_open_due(breaker)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.cancel_probe()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+
+def test_closed_stream_releases_the_probe():
+    selector = AISelector()
+    _half_open_due(selector.breaker)
+    module_id, module_config = next(iter(load_configs().modules.items()))
+    stream = selector.stream_for_module(module_id, module_config, [], use_cache=False)
+    assert next(stream)[0] == "task"
+    assert selector.breaker.state == "half_open"
+    stream.close()
+    assert selector.breaker.allow()
+
+
+def test_local_os_errors_are_not_transport_errors():
+    assert not is_transport_error(OSError(28, "No space left on device"))
+    assert not is_transport_error(PermissionError("record file"))
+    assert is_transport_error(ConnectionResetError())
+    assert is_transport_error(TimeoutError())
+    assert is_transport_error(BackendError("no completion"))
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+from app.core.ai_selector import AISelector
+from app.core.database import SessionLocal
+from app.models.llm_cache import LLMResponseCache
+from app.services.loader import load_configs
+from app.services.response_cache import ResponseCache
+
+
+def _clear_cache() -> None:
+    session = SessionLocal()
+    session.query(LLMResponseCache).delete()
+    session.commit()
+    session.close()
+
+
+def test_hits_misses_and_expiry():
+    _clear_cache()
+    cache = ResponseCache(SessionLocal, ttl_seconds=60, max_entries=10)
+    key = ResponseCache.make_key("gpt-4.1-mini", "system", '{"module_id": "dsa"}')
+    assert key != ResponseCache.make_key("gpt-4.1", "system", '{"module_id": "dsa"}')
+    assert cache.get(key) is None
+    cache.put(key, "gpt-4.1-mini", {"tasks": []})
+    assert cache.get(key) == {"tasks": []}
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+    session = SessionLocal()
+    session.query(LLMResponseCache).update({"created_at": datetime.utcnow() - timedelta(seconds=61)})
+    session.commit()
+    session.close()
+    assert cache.get(key) is None
+    assert cache.misses == 2
+
+
+def test_least_recently_used_entries_are_evicted():
+    _clear_cache()
+    cache = ResponseCache(SessionLocal, ttl_seconds=60, max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, "m", {"key": key})
+    assert cache.get("a") is None
+    assert cache.get("c") == {"key": "c"}
+
+
+def test_module_generation_reuses_cached_replies():
+    _clear_cache()
+    selector = AISelector()
+    calls = []
+    complete = selector.backend.complete
+
+    def counting(model, messages, timeout=None):
+        calls.append(model)
+        return complete(model, messages, timeout=timeout)
+
+    selector.backend.complete = counting
+    module_id, module_config = next(iter(load_configs().modules.items()))
+    first = selector.generate_for_module(module_id, module_config, [])
+    assert len(calls) == 1
+    assert selector.generate_for_module(module_id, module_config, []) == first
+    assert len(calls) == 1
+    assert selector.response_cache.hits == 1
+
+    history = [{"date": "2026-01-04", "module_id": module_id, "task_name": "Arrays"}]
+    selector.generate_for_module(module_id, module_config, history)
+    assert len(calls) == 2
+    selector.generate_for_module(module_id, module_config, [], use_cache=False)
+    assert len(calls) == 3
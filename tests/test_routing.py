@@ -0,0 +1,71 @@
+import json
+import threading
+
+from app.core.ai_selector import AISelector
+from app.core.config import Settings
+from app.core.llm_backends import LLMBackend, SyntheticBackend
+from app.core.routing import ModelStats, RoutingPolicy
+from app.services.loader import load_configs
+
+
+def test_routes_and_hedge_threshold():
+    settings = Settings(
+        llm_model="small",
+        llm_escalation_model="large",
+        llm_hedge_percentile=0.9,
+        llm_hedge_min_samples=5,
+        llm_routes={"dsa": {"primary": "medium", "hedge_percentile": None}},
+    )
+    policy = RoutingPolicy(settings, ModelStats())
+    assert policy.route("habits") == ("small", "large", 0.9)
+    assert policy.route("dsa") == ("medium", "large", None)
+    assert policy.hedge_after(policy.route("habits")) is None
+    for latency_ms in (100, 200, 300, 400, 1000):
+        policy.stats.record("small", "valid", latency_ms)
+    assert policy.hedge_after(policy.route("habits")) == 1.0
+    assert policy.hedge_after(policy.route("dsa")) is None
+
+
+def test_invalid_replies_escalate_to_the_larger_model():
+    selector = AISelector()
+    primary = selector.routing.default.primary
+    escalation = selector.routing.default.escalation
+    selector.backend = SyntheticBackend(latency_ms=0, profiles={primary: {"invalid_rate": 1.0}})
+    module_id, module_config = next(iter(load_configs().modules.items()))
+    tasks, _notes, _raw = selector.generate_for_module(module_id, module_config, [], use_cache=False)
+    assert tasks
+    stats = selector.routing.stats.snapshot()
+    assert stats[primary]["invalid"] == 3 and stats[primary]["valid"] == 0
+    assert stats[escalation]["valid"] == 1
+
+
+class _SlowFirstBackend(LLMBackend):
+    name = "slow-first"
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def complete(self, model, messages, timeout=None):
+        with self._lock:
+            self.calls += 1
+            first = self.calls == 1
+        if first:
+            self.release.wait(5)
+        return json.dumps({"answer": "slow" if first else "hedge"})
+
+
+def test_slow_primary_is_hedged():
+    selector = AISelector()
+    backend = _SlowFirstBackend()
+    selector.backend = backend
+    messages = [{"role": "user", "content": "{}"}]
+    try:
+        data = selector._call_model(messages, timeout=10, model="m", hedge_after=0.05)
+    finally:
+        backend.release.set()
+    assert data == {"answer": "hedge"}
+    assert backend.calls == 2
+    stats = selector.routing.stats.snapshot()["m"]
+    assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
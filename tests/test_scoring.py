@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from app.services.loader import item_key, rank_items
+from app.services.scoring import (
+    NO_HISTORY,
+    VECTOR_MIN_ITEMS,
+    ItemFeatures,
+    ScoreWeights,
+    TopKScorer,
+    max_history_bonus,
+    score,
+    weights_from_settings,
+)
+
+
+def _group(rng, size):
+    # few distinct importances so score ties are common
+    items = [{"name": f"item-{i}", "importance": rng.randint(1, 4)} for i in range(size)]
+    features = {
+        item_key("g", item["name"]): ItemFeatures(rng.randint(1, 30), rng.randint(0, 3), rng.choice([-1.0, 0.0, 0.5]))
+        for item in rng.sample(items, size // 3)
+    }
+    # history for items outside the group is ignored
+    features[item_key("other", "item-0")] = ItemFeatures(1, 0, 5.0)
+    return rank_items("g", items), features
+
+
+def _full_sort(ranked, target, features, weights):
+    ordered = sorted(ranked, key=lambda e: (-score(e.importance, features.get(e.key, NO_HISTORY), weights), e.position))
+    return [entry.item for entry in ordered[:target]]
+
+
+@pytest.mark.parametrize("weights", [ScoreWeights(), ScoreWeights(importance=1.0, recency=3.0, streak=-0.5, difficulty=2.0)])
+def test_top_k_matches_a_full_sort(weights):
+    rng = random.Random(20)
+    scorer = TopKScorer(weights)
+    for size in (5, VECTOR_MIN_ITEMS - 1, VECTOR_MIN_ITEMS, 500):
+        ranked, features = _group(rng, size)
+        bonus = max_history_bonus(features, weights)
+        for target in (1, 3, size, size + 2):
+            expected = _full_sort(ranked, target, features, weights)
+            assert scorer.top_items(ranked, target, features, bonus) == expected
+            assert scorer._top_heap(ranked, target, features, bonus) == expected
+
+
+def test_vectorized_path_matches_the_heap():
+    pytest.importorskip("numpy")
+    rng = random.Random(21)
+    scorer = TopKScorer()
+    ranked, features = _group(rng, 1000)
+    bonus = max_history_bonus(features, scorer.weights)
+    for target in (1, 2, 7, 999):
+        assert scorer._top_vectorized(ranked, target, features) == scorer._top_heap(ranked, target, features, bonus)
+
+
+def test_weights_from_settings_ignores_unknown_keys():
+    assert weights_from_settings(None) == ScoreWeights()
+    assert weights_from_settings({"recency": "2", "bogus": 9}) == ScoreWeights(recency=2.0)
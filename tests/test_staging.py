@@ -0,0 +1,64 @@
+from datetime import date, timedelta
+
+from app.core import scheduler
+from app.core.database import SessionLocal
+from app.models.daily_summary import DailySummary
+from app.models.history import TaskHistory
+from app.models.job import GenerationJob
+from app.models.plan_stage import PlanStage
+from app.models.task import TodayTask
+from app.services.job_queue import job_queue
+from app.services.loader import load_configs
+
+TOMORROW = date.today() + timedelta(days=1)
+
+
+class _Tomorrow(date):
+    @classmethod
+    def today(cls):
+        return TOMORROW
+
+
+def _reset(session):
+    for model in (TodayTask, DailySummary, PlanStage, GenerationJob, TaskHistory):
+        session.query(model).delete()
+    session.commit()
+
+
+def _planned(session, plan_date):
+    return {module_id for (module_id,) in session.query(TodayTask.module_id).filter(TodayTask.date == plan_date).distinct()}
+
+
+def test_staged_plan_is_promoted_unless_history_moved_on(monkeypatch):
+    monkeypatch.setattr(scheduler.settings, "template_validation", False)
+    modules = sorted(load_configs().modules)
+    session = SessionLocal()
+    try:
+        _reset(session)
+        scheduler.queue_next_day_plan(session)
+        claim = job_queue.claim(session)
+        assert claim.plan_date == TOMORROW
+        scheduler.run_generation_jobs(session, claim)
+        assert _planned(session, TOMORROW) == set(modules)
+        assert _planned(session, date.today()) == set()
+        stages = {stage.module_id: stage for stage in session.query(PlanStage).filter(PlanStage.plan_date == TOMORROW)}
+        assert sorted(stages) == modules
+        assert all(stage.promoted_at is None for stage in stages.values())
+
+        # a task completed after staging makes that module's staged plan stale
+        stale = modules[0]
+        session.add(TaskHistory(module_id=stale, name="Arrays", group="basics", completed=True))
+        session.commit()
+
+        monkeypatch.setattr(scheduler, "date", _Tomorrow)
+        assert scheduler.queue_daily_plan(session) == [stale]
+        session.expire_all()
+        assert all(stage.promoted_at is not None for stage in session.query(PlanStage))
+        # the staged rows stay visible until the regenerated plan replaces them
+        assert _planned(session, TOMORROW) == set(modules)
+        claim = job_queue.claim(session)
+        assert claim.plan_date == TOMORROW and claim.module_ids == [stale]
+        assert job_queue.claim(session) is None
+    finally:
+        _reset(session)
+        session.close()
@@ -0,0 +1,46 @@
+from app.core import scheduler
+from app.services.loader import load_configs
+from app.services.template_sandbox import TemplateSandbox, template_sandbox
+
+VALID = "def run_tests():\n    assert sum([1, 2]) == 3\n\n\nif __name__ == '__main__':\n    run_tests()\n"
+
+
+def test_sandbox_rejects_broken_and_runaway_templates():
+    sandbox = TemplateSandbox(max_workers=4, timeout=1, cpu_seconds=2)
+    checks = sandbox.check_many(
+        [
+            VALID,
+            "def run_tests(:\n    pass\n",
+            "raise ValueError('bad fixture')\n",
+            "while True:\n    pass\n",
+        ]
+    )
+    assert [check.ok for check in checks] == [True, False, False, False]
+    assert checks[1].error.startswith("SyntaxError")
+    assert "ValueError: bad fixture" in checks[2].error
+    assert "Timed out" in checks[3].error or "Killed by signal" in checks[3].error
+    assert (sandbox.checked, sandbox.failed) == (4, 3)
+    # results are cached by template hash
+    assert sandbox.check(VALID).ok
+    assert sandbox.checked == 4
+
+
+def test_templates_run_without_the_app_environment():
+    sandbox = TemplateSandbox(timeout=5)
+    check = sandbox.check("import os\nassert not os.environ.get('DATABASE_URL'), os.environ\n")
+    assert check.ok, check.error
+
+
+def test_broken_template_is_repaired_or_dropped(monkeypatch):
+    monkeypatch.setattr(scheduler.settings, "template_validation", True)
+    group = load_configs().modules["leetcode"][0]
+    item = group["items"][0]
+    broken = {"name": item["name"], "group": group["group"], "task_type": "coding", "code_template": "def solve(:\n"}
+    todo = {"name": "Read notes", "group": group["group"], "task_type": "todo"}
+    tasks = scheduler._checked_tasks("leetcode", [broken, todo])
+    assert [task["name"] for task in tasks] == [item["name"], "Read notes"]
+    assert tasks[0]["code_template"] != broken["code_template"]
+    assert template_sandbox.check(tasks[0]["code_template"]).ok
+
+    monkeypatch.setattr(scheduler.ai_selector, "backend", None)
+    assert scheduler._checked_tasks("leetcode", [broken]) is None